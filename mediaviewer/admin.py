@@ -12,12 +12,16 @@ from mediaviewer.models import (
     MediaPath,
     Movie,
     Poster,
+    PosterJob,
     Request,
     SiteGreeting,
     UserSettings,
     VideoProgress,
+    WatchedCount,
     ApiKey,
 )
+from mediaviewer.models.posterjob import ACTIVE_STATUSES
+from mediaviewer.tmdb.cache import response_cache
 
 
 @admin.register(DownloadToken)
@@ -243,10 +247,24 @@ class MediaFileAdmin(admin.ModelAdmin):
         queryset.refresh_display_name()
 
     def hide(self, request, queryset):
-        queryset.update(hide=True)
+        self._set_hide(queryset, True)
 
     def unhide(self, request, queryset):
-        queryset.update(hide=False)
+        self._set_hide(queryset, False)
+
+    @staticmethod
+    def _set_hide(queryset, hide):
+        tv_ids = set(
+            queryset.exclude(media_path__tv=None).values_list(
+                "media_path__tv", flat=True
+            )
+        )
+        queryset.update(hide=hide)
+
+        # update() skips the signals that keep these up to date
+        if tv_ids:
+            TV.objects.filter(pk__in=tv_ids).refresh_episode_stats()
+            WatchedCount.objects.refresh(tv_ids)
 
     def repopulate_poster_data(self, request, queryset):
         queryset.populate_poster()
@@ -302,11 +320,52 @@ class PosterAdmin(admin.ModelAdmin):
             tagline="",
             release_date=None,
         )
-        self._populate(queryset, clear=True)
+        with response_cache.bypass():
+            self._populate(queryset, clear=True)
 
     clear_and_populate.description = "Clear and Populate"
 
 
+@admin.register(PosterJob)
+class PosterJobAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "poster",
+        "status",
+        "priority",
+        "attempts",
+        "run_after",
+        "date_edited",
+        "last_error",
+    )
+    list_filter = ("status",)
+    search_fields = (
+        "poster__tv__name",
+        "poster__movie__name",
+        "poster__media_file__filename",
+    )
+    ordering = ("-id",)
+    raw_id_fields = ("poster",)
+    actions = ("retry",)
+
+    def get_queryset(self, request):
+        qs = super().get_queryset(request)
+        qs = qs.select_related(
+            "poster__tv",
+            "poster__movie",
+            "poster__media_file__media_path__tv",
+        )
+        return qs
+
+    def retry(self, request, queryset):
+        for job in queryset.exclude(status__in=ACTIVE_STATUSES):
+            PosterJob.objects.enqueue(
+                job.poster, priority=job.priority, clear=job.clear
+            )
+
+    retry.description = "Retry"
+
+
 @admin.register(Collection)
 class CollectionAdmin(admin.ModelAdmin):
     list_display = (
@@ -1,8 +1,10 @@
+from django.db import transaction
 from rest_framework import serializers, viewsets
+from rest_framework.decorators import action
 from rest_framework.response import Response
 
 from mediaviewer.api.permissions import IsStaffOrReadOnly
-from mediaviewer.api.serializers import MediaPathSerializer
+from mediaviewer.api.serializers import BulkMediaPathSerializer, MediaPathSerializer
 from mediaviewer.models import TV, MediaPath, Movie
 
 
@@ -28,6 +30,16 @@ class _MediaPathViewSet(viewsets.ModelViewSet):
         serializer = self.serializer_class(mp)
         return Response(serializer.data)
 
+    def _bulk(self, media_class, request):
+        serializer = BulkMediaPathSerializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+
+        with transaction.atomic():
+            result = MediaPath.objects.bulk_ingest(
+                media_class, serializer.validated_data
+            )
+        return Response(result)
+
 
 class TVMediaPathViewSet(_MediaPathViewSet):
     queryset = MediaPath.objects.filter(tv__isnull=False).order_by("id")
@@ -35,9 +47,17 @@ class TVMediaPathViewSet(_MediaPathViewSet):
     def create(self, request):
         return self._create(TV, request)
 
+    @action(detail=False, methods=["post"])
+    def bulk(self, request):
+        return self._bulk(TV, request)
+
 
 class MovieMediaPathViewSet(_MediaPathViewSet):
     queryset = MediaPath.objects.filter(movie__isnull=False).order_by("id")
 
     def create(self, request):
         return self._create(Movie, request)
+
+    @action(detail=False, methods=["post"])
+    def bulk(self, request):
+        return self._bulk(Movie, request)
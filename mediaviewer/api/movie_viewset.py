@@ -40,7 +40,6 @@ class MCPMovieViewSet(viewsets.ReadOnlyModelViewSet):
 
     def list(self, request):
         fields = {
-            "name": "name__icontains",
             "imdb": "_poster__imdb",
             "tmdb": "_poster__tmdb",
         }
@@ -52,6 +51,10 @@ class MCPMovieViewSet(viewsets.ReadOnlyModelViewSet):
             posters = self.queryset
             at_least_one_filter = False
 
+        if name := request.query_params.get("name", None):
+            posters = posters.search(name, rank=True)
+            at_least_one_filter = True
+
         for external_name, internal_name in fields.items():
             if val := request.query_params.get(external_name, None):
                 posters = posters.filter(**{internal_name: val})
@@ -59,7 +62,7 @@ class MCPMovieViewSet(viewsets.ReadOnlyModelViewSet):
 
         if not at_least_one_filter:
             raise serializers.ValidationError(
-                f"At least one field of 'genre, {', '.join(fields.keys())}' is required"
+                f"At least one field of 'genre, name, {', '.join(fields.keys())}' is required"
             )
         serializer = self.serializer_class(posters, many=True)
         return Response(serializer.data)
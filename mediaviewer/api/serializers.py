@@ -12,7 +12,6 @@ from mediaviewer.models import (
     MediaPath,
     Message,
     Movie,
-    UserSettings,
     VideoProgress,
     Genre,
 )
@@ -56,6 +55,9 @@ class DownloadTokenSerializer(serializers.ModelSerializer):
             "is_mcp",
         )
 
+    # Fields that may change between requests for the same token
+    VOLATILE_FIELDS = ("isvalid", "videoprogresses", "donation_site")
+
     userid = serializers.IntegerField(required=True, source="user.id")
     username = serializers.SerializerMethodField()
     tokenid = serializers.IntegerField(required=True, source="id")
@@ -93,8 +95,7 @@ class DownloadTokenSerializer(serializers.ModelSerializer):
         return previous_obj and previous_obj.id
 
     def get_binge_mode(self, obj):
-        user_settings = UserSettings.getSettings(obj.user)
-        return user_settings.binge_mode
+        return obj.user.usersettings.binge_mode
 
     def get_donation_site(self, obj):
         donation_site = DonationSite.objects.random()
@@ -105,13 +106,19 @@ class DownloadTokenSerializer(serializers.ModelSerializer):
         return movie_or_media_file.downloadLink(obj.guid)
 
     def get_theme(self, obj):
-        user_settings = UserSettings.getSettings(obj.user)
-        return user_settings.theme
+        return obj.user.usersettings.theme
 
     def get_tv_id(self, obj):
         tv = obj.media_file.tv if obj.media_file else None
         return tv and tv.id
 
+    def volatile_data(self, obj):
+        return {
+            "isvalid": obj.isvalid,
+            "videoprogresses": self.get_videoprogresses(obj),
+            "donation_site": self.get_donation_site(obj),
+        }
+
 
 class MediaPathSerializer(serializers.ModelSerializer):
     class Meta:
@@ -135,6 +142,21 @@ class MediaPathSerializer(serializers.ModelSerializer):
         return obj.mediafile_set.values_list("filename", flat=True)
 
 
+class BulkMediaFileSerializer(serializers.Serializer):
+    filename = serializers.CharField(max_length=256)
+    display_name = serializers.CharField(
+        max_length=256, required=False, allow_blank=True
+    )
+    size = serializers.IntegerField(required=False, allow_null=True)
+
+
+class BulkMediaPathSerializer(serializers.Serializer):
+    path = serializers.CharField(max_length=256)
+    tv = serializers.IntegerField(required=False, allow_null=True)
+    movie = serializers.IntegerField(required=False, allow_null=True)
+    files = BulkMediaFileSerializer(many=True, required=False)
+
+
 class TVSerializer(serializers.ModelSerializer):
     class Meta:
         model = TV
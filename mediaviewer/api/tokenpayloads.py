@@ -0,0 +1,68 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, models, transaction
+
+KEY_PREFIX = "mediaviewer:token_payload:"
+
+
+class TokenPayloadCache:
+    """
+    Serialized DownloadTokens keyed by guid, shared by every process.
+
+    Payloads are kept in the default Django cache, which is stored on disk in
+    CACHE_DIR, so a token deleted or changed through one process is dropped
+    for all of them. Writes only drop the payloads of the tokens they affect
+    and entries otherwise expire after DOWNLOAD_TOKEN_CACHE_TTL seconds.
+    """
+
+    @staticmethod
+    def _key(guid):
+        return f"{KEY_PREFIX}{guid}"
+
+    def get(self, guid):
+        """Return the cached (token, data) pair for guid or None."""
+        return cache.get(self._key(guid))
+
+    def set(self, guid, token, data):
+        cache.set(
+            self._key(guid), (token, data), timeout=settings.DOWNLOAD_TOKEN_CACHE_TTL
+        )
+
+    def invalidate(self, guids):
+        keys = [self._key(guid) for guid in guids]
+        if not keys:
+            return
+
+        cache.delete_many(keys)
+        if connection.in_atomic_block:
+            # A request between now and the commit would cache the old rows
+            # again
+            transaction.on_commit(lambda: cache.delete_many(keys))
+
+    def invalidate_media(self, media_file_ids=(), tv_ids=()):
+        """
+        Drop the payloads of tokens for media_file_ids and for any episode of
+        their shows or of tv_ids, since next and previous span the show.
+        """
+        from mediaviewer.models import DownloadToken, MediaFile
+
+        files = MediaFile.objects.filter(pk__in=media_file_ids)
+        self.invalidate(
+            DownloadToken.objects.filter(
+                models.Q(media_file__in=files)
+                | models.Q(media_file__media_path__tv__in=tv_ids)
+                | models.Q(
+                    media_file__media_path__tv__in=files.values("media_path__tv")
+                )
+            ).values_list("guid", flat=True)
+        )
+
+    def invalidate_user(self, user_id):
+        from mediaviewer.models import DownloadToken
+
+        self.invalidate(
+            DownloadToken.objects.filter(user=user_id).values_list("guid", flat=True)
+        )
+
+
+token_payloads = TokenPayloadCache()
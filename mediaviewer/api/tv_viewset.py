@@ -11,6 +11,12 @@ class TVViewSet(viewsets.ModelViewSet):
     queryset = TV.objects.filter(hide=False).order_by("id")
     serializer_class = TVSerializer
 
+    def get_queryset(self):
+        qs = super().get_queryset()
+        if self.request.user.is_authenticated:
+            qs = qs.with_unwatched(self.request.user)
+        return qs
+
     def create(self, request):
         if "media_path" not in request.POST:
             raise serializers.ValidationError("'media_path' is a required argument")
@@ -39,7 +45,6 @@ class MCPTVViewSet(viewsets.ReadOnlyModelViewSet):
 
     def list(self, request):
         fields = {
-            "name": "name__icontains",
             "imdb": "_poster__imdb",
             "tmdb": "_poster__tmdb",
         }
@@ -51,6 +56,10 @@ class MCPTVViewSet(viewsets.ReadOnlyModelViewSet):
             posters = self.queryset
             at_least_one_filter = False
 
+        if name := request.query_params.get("name", None):
+            posters = posters.search(name, rank=True)
+            at_least_one_filter = True
+
         for external_name, internal_name in fields.items():
             if val := request.query_params.get(external_name, None):
                 posters = posters.filter(**{internal_name: val})
@@ -58,7 +67,7 @@ class MCPTVViewSet(viewsets.ReadOnlyModelViewSet):
 
         if not at_least_one_filter:
             raise serializers.ValidationError(
-                f"At least one field of 'genre, {', '.join(fields.keys())}' is required"
+                f"At least one field of 'genre, name, {', '.join(fields.keys())}' is required"
             )
         serializer = self.serializer_class(posters, many=True)
         return Response(serializer.data)
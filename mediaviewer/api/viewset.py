@@ -3,6 +3,7 @@ from rest_framework import permissions, views, viewsets
 from rest_framework.response import Response as RESTResponse
 from rest_framework import serializers
 from mediaviewer.api.permissions import IsStaffReadOnlyOrCheckAPIKey
+from mediaviewer.api.tokenpayloads import token_payloads
 
 from mediaviewer.api.serializers import (
     CollectionSerializer,
@@ -31,12 +32,22 @@ class DownloadTokenViewSet(viewsets.ModelViewSet):
 
     def retrieve(self, request, pk=None):
         log.debug(f"Attempting to find token with guid = {pk}")
-        queryset = DownloadToken.objects.filter(guid=pk)
-        obj = get_object_or_404(queryset, guid=pk)
-        if obj:
-            log.debug(f"Found token. isValid: {obj.isvalid}")
-        serializer = self.serializer_class(obj)
-        return RESTResponse(serializer.data)
+        cached = token_payloads.get(pk)
+        if cached is None:
+            queryset = DownloadToken.objects.select_related(
+                "user__usersettings", "media_file__media_path__tv", "movie"
+            )
+            obj = get_object_or_404(queryset, guid=pk)
+            serializer = self.serializer_class(obj)
+            data = serializer.data
+            token_payloads.set(pk, obj, data)
+        else:
+            obj, data = cached
+            serializer = self.serializer_class(obj)
+            data = {**data, **serializer.volatile_data(obj)}
+
+        log.debug(f"Found token. isValid: {obj.isvalid}")
+        return RESTResponse(data)
 
 
 class FilenameScrapeFormatViewSet(viewsets.ModelViewSet):
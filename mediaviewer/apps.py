@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class MediaviewerConfig(AppConfig):
     name = "mediaviewer"
     default_auto_field = "django.db.models.BigAutoField"
+
+    def ready(self):
+        from mediaviewer import signals  # noqa: F401
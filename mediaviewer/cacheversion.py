@@ -0,0 +1,45 @@
+from uuid import uuid4
+
+from django.core.cache import cache
+
+from mediaviewer.log import log
+
+KEY_PREFIX = "mediaviewer:version:"
+
+
+class CacheVersion:
+    """
+    Version of a process wide cache shared by every process.
+
+    The version lives in the default Django cache, which is stored on disk
+    in CACHE_DIR so every worker sees it. A process bumps it after writing
+    the data behind its cache and the others drop their copy once they see
+    it change. It is not thread safe and is used under the owning cache's
+    lock.
+    """
+
+    def __init__(self, name):
+        self._key = f"{KEY_PREFIX}{name}"
+        self._seen = None
+
+    def changed(self):
+        """Return whether the version moved since the last call."""
+        try:
+            current = cache.get(self._key)
+            if current is None:
+                cache.add(self._key, uuid4().hex, timeout=None)
+                current = cache.get(self._key)
+        except OSError as e:
+            log.warning(f"Could not read {self._key}: {e}")
+            current = None
+
+        changed = current is None or current != self._seen
+        self._seen = current
+        return changed
+
+    def bump(self):
+        try:
+            cache.set(self._key, uuid4().hex, timeout=None)
+        except OSError as e:
+            # The TTL of the cache still bounds how stale other processes get
+            log.warning(f"Could not bump {self._key}: {e}")
@@ -3,6 +3,7 @@ from pathlib import Path
 
 import pytest
 from django.contrib.auth.models import Group
+from django.core.cache import cache
 from faker import Faker
 
 from mediaviewer.models import (
@@ -13,7 +14,12 @@ from mediaviewer.models import (
     MediaPath,
     Movie,
 )
+from mediaviewer.models.filenamescrapeformat import scraper_engine
+from mediaviewer.models.tv import tv_name_index
 from mediaviewer.models.usersettings import UserSettings
+from mediaviewer.tmdb.cache import response_cache
+from mediaviewer.views.counts import row_counts
+from mediaviewer.views.sitecontext import site_context
 
 DEFAULT_USERNAME = "test_user"
 DEFAULT_EMAIL = "asdf@example.com"
@@ -33,10 +39,46 @@ _count = _counter_gen()
 
 @pytest.fixture(autouse=True)
 def mock_requests(mocker):
-    mock = mocker.patch("mediaviewer.models.tvdbconfiguration.requests.get")
+    mock = mocker.patch("mediaviewer.tmdb.session.HTTPAdapter.send")
     mock.side_effect = Exception("Failing external requests on purpose")
 
 
+@pytest.fixture(autouse=True)
+def tmdb_cache_dir(settings, tmp_path):
+    settings.TMDB_CACHE_DIR = tmp_path / "tmdb_cache"
+    response_cache.clear()
+    yield settings.TMDB_CACHE_DIR
+    response_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def tmdb_rate_limit_file(settings, tmp_path):
+    settings.TMDB_RATE_LIMIT_FILE = tmp_path / "tmdb_ratelimit.json"
+    return settings.TMDB_RATE_LIMIT_FILE
+
+
+@pytest.fixture(autouse=True)
+def shared_cache(settings):
+    # Keep each test worker's cache versions to itself
+    settings.CACHES = {
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    }
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_scraper_engine(shared_cache):
+    scraper_engine.invalidate()
+    tv_name_index.invalidate()
+    row_counts.invalidate()
+    site_context.invalidate()
+    yield
+    scraper_engine.invalidate()
+    tv_name_index.invalidate()
+    row_counts.invalidate()
+    site_context.invalidate()
+
+
 @pytest.fixture
 def temp_dir(tmp_path):
     base_dir = Path(tmp_path)
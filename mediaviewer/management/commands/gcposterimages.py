@@ -0,0 +1,104 @@
+import argparse
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from mediaviewer.models import Poster
+from mediaviewer.storage import IMAGE_DIR, LEGACY_IMAGE_DIR, poster_storage
+
+RENDITION_DIR = "renditions"
+DEFAULT_MIN_AGE = 24  # In hours
+DEFAULT_BATCH_SIZE = 1000
+
+
+def _walk(storage, path):
+    """Yield the name of every file below path in storage."""
+    if not storage.exists(path):
+        return
+
+    dirs, files = storage.listdir(path)
+    for filename in files:
+        yield f"{path}/{filename}"
+    for dirname in dirs:
+        yield from _walk(storage, f"{path}/{dirname}")
+
+
+class Command(BaseCommand):
+    help = "Delete poster images and renditions that no poster references anymore"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action=argparse.BooleanOptionalAction)
+        parser.add_argument(
+            "--min-age",
+            type=int,
+            default=DEFAULT_MIN_AGE,
+            help="Only delete files older than this many hours",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help="Number of image names checked per query",
+        )
+
+    def handle(self, *args, **kwargs):
+        self.dry_run = kwargs.get("dry_run", False) or False
+        # Images are written to storage before their poster is saved
+        self.cutoff = timezone.now() - timedelta(hours=kwargs["min_age"])
+        batch_size = max(kwargs["batch_size"], 1)
+
+        removed = 0
+        for path in (IMAGE_DIR, LEGACY_IMAGE_DIR):
+            batch = []
+            for name in _walk(poster_storage, path):
+                batch.append(name)
+                if len(batch) >= batch_size:
+                    removed += self._remove_images(batch)
+                    batch = []
+            removed += self._remove_images(batch)
+        self.stdout.write(f"Removed {removed} poster images")
+
+        referenced = set()
+        for renditions in Poster.objects.exclude(renditions={}).values_list(
+            "renditions", flat=True
+        ):
+            for size, names in renditions.items():
+                if size != "source":
+                    referenced.update(names.values())
+
+        removed = 0
+        for name in _walk(default_storage, RENDITION_DIR):
+            if name not in referenced and self._delete(default_storage, name):
+                removed += 1
+        self.stdout.write(f"Removed {removed} renditions")
+
+        if self.dry_run:
+            self.stdout.write(self.style.WARNING("dry-run=True nothing was deleted"))
+        self.stdout.write(self.style.SUCCESS("Done"))
+
+    def _remove_images(self, names):
+        referenced = set(
+            Poster.objects.filter(image__in=names).values_list("image", flat=True)
+        )
+        return sum(
+            1
+            for name in names
+            if name not in referenced and self._delete(poster_storage, name)
+        )
+
+    def _delete(self, storage, name):
+        if storage.get_modified_time(name) >= self.cutoff:
+            return False
+
+        if self.dry_run:
+            return True
+
+        if storage is poster_storage:
+            # Also drops the StoredImage lookups unless a poster started
+            # using the image since it was checked
+            return poster_storage.purge(name)
+
+        storage.delete(name)
+        return True
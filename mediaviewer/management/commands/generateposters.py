@@ -1,12 +1,26 @@
+import argparse
+import contextvars
+import json
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
 
+from django.conf import settings
 from django.core.management.base import BaseCommand
+from django.db import close_old_connections
 from django.db.models import Q
 from django.db.models.functions import Coalesce
 
 from mediaviewer.models import Poster
+from mediaviewer.models.tvdbconfiguration import batch_episode_info
+from mediaviewer.tmdb.cache import response_cache
+from mediaviewer.tmdb.session import tmdb_session
 
 DEFAULT_LIMIT = 10
+DEFAULT_WORKERS = 1
+DEFAULT_BATCH_SIZE = 100
 logger = logging.getLogger(__file__)
 
 
@@ -23,14 +37,46 @@ class Command(BaseCommand):
         parser.add_argument(
             "--force",
             action="store_true",
-            help="Clear existing imdb and tmdb fields before populating objects",
+            help="Clear existing imdb and tmdb fields and ignore cached TMDB responses before populating objects",
+        )
+
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=DEFAULT_WORKERS,
+            help="Number of threads populating posters concurrently",
+        )
+
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help="Number of posters loaded from the database at a time",
+        )
+
+        parser.add_argument(
+            "--resume",
+            action=argparse.BooleanOptionalAction,
+            default=False,
+            help="Continue after the last batch completed by a previous run",
+        )
+
+        parser.add_argument(
+            "--cursor-file",
+            metavar="PATH",
+            help="File used to remember progress between runs",
         )
 
     def handle(self, *args, **kwargs):
         limit = kwargs["limit"]
         limit = int(limit) if limit else DEFAULT_LIMIT
 
-        force = kwargs["force"]
+        self.force = kwargs["force"]
+        workers = max(kwargs["workers"], 1)
+        batch_size = max(kwargs["batch_size"], 1)
+        cursor_file = Path(
+            kwargs["cursor_file"] or settings.CACHE_DIR / "generateposters_cursor.json"
+        )
 
         poster_qs = (
             Poster.objects.filter(Q(image="") | Q(release_date__isnull=True))
@@ -39,36 +85,164 @@ class Command(BaseCommand):
                     "movie__date_created",
                     "tv__date_created",
                     "media_file__date_created",
+                    "date_created",
                 )
             )
-            .order_by("-obj_created")
+            .order_by("-obj_created", "-id")
         )
 
-        total = poster_qs.count()
+        cursor = self._load_cursor(cursor_file) if kwargs["resume"] else None
+        if cursor:
+            self.stdout.write(f"Resuming after poster id={cursor[1]}")
+
+        total = min(self._after(poster_qs, cursor).count(), limit)
         count = 0
-        poster_qs = poster_qs[:limit]
-        for poster in poster_qs:
-            count += 1
+        start = time.monotonic()
+        cache_stats = response_cache.stats()
+        session_stats = tmdb_session.stats()
 
-            if not poster.ref_obj:
-                logger.warning(f"Poster id={poster.id} is orphaned. Removing...")
-                poster.delete()
+        with (
+            batch_episode_info(),
+            ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="generateposters"
+            ) as executor,
+        ):
+            while count < limit:
+                batch = list(
+                    self._after(poster_qs, cursor)[: min(batch_size, limit - count)]
+                )
+                if not batch:
+                    cursor_file.unlink(missing_ok=True)
+                    break
 
-                self.stdout.write(f" {count}/{total}")
-                continue
-            else:
-                if force:
-                    poster.imdb = ""
-                    poster.tmdb = ""
-
-                try:
-                    poster.populate_data()
-                    poster.save()
-                except Exception as e:
-                    logger.warning(f"Got error processing {poster}")
-                    logger.warning(e)
-                    continue
-
-            self.stdout.write(f" {count}/{total} - {str(poster.ref_obj):<100}")
+                if workers == 1:
+                    # Keep using this thread's connection when not running
+                    # concurrently.
+                    results = map(self._process, batch)
+                else:
+                    # Each poster gets its own copy of this thread's context so
+                    # the episode batch and cache bypass follow it.
+                    futures = [
+                        executor.submit(
+                            contextvars.copy_context().run,
+                            self._process_in_thread,
+                            poster,
+                        )
+                        for poster in batch
+                    ]
+                    results = (future.result() for future in futures)
+
+                unsaved = []
+                for name, elapsed, poster in results:
+                    count += 1
+                    if poster is not None:
+                        unsaved.append(poster)
+                    if name is None:
+                        self.stdout.write(f" {count}/{total}")
+                    else:
+                        self.stdout.write(
+                            f" {count}/{total} - {name:<100} {elapsed:.2f}s"
+                        )
+
+                # populate_data saves every poster it found data for. The rest
+                # only need their cleared ids written.
+                if unsaved:
+                    Poster.objects.bulk_update(unsaved, ["imdb", "tmdb"])
+
+                cursor = (batch[-1].obj_created, batch[-1].id)
+                self._save_cursor(cursor_file, cursor)
         self.stdout.write()
+
+        elapsed = max(time.monotonic() - start, 1e-6)
+        # Session counters are kept for the whole process
+        stats = {
+            name: max(value - session_stats[name], 0)
+            for name, value in tmdb_session.stats().items()
+        }
+        self.stdout.write(
+            f"HTTP requests: {stats['requests']} "
+            f"new connections: {stats['new_connections']} "
+            f"reused connections: {stats['reused_connections']}"
+        )
+
+        hits = response_cache.stats()["hits"] - cache_stats["hits"]
+        misses = response_cache.stats()["misses"] - cache_stats["misses"]
+        self.stdout.write(f"TMDB cache hits: {hits} misses: {misses}")
+
+        requests = stats["requests"]
+        hit_rate = hits / (hits + misses) if hits + misses else 0
+        self.stdout.write(
+            f"Processed {count} posters in {elapsed:.1f}s: "
+            f"{count / elapsed:.2f} posters/s "
+            f"{requests / elapsed:.2f} TMDB calls/s "
+            f"{hit_rate:.0%} cache hit rate"
+        )
         self.stdout.write(self.style.SUCCESS("Done"))
+
+    @staticmethod
+    def _after(poster_qs, cursor):
+        if not cursor:
+            return poster_qs
+
+        obj_created, poster_id = cursor
+        return poster_qs.filter(
+            Q(obj_created__lt=obj_created)
+            | Q(obj_created=obj_created, id__lt=poster_id)
+        )
+
+    @staticmethod
+    def _load_cursor(cursor_file):
+        try:
+            data = json.loads(cursor_file.read_text())
+            return datetime.fromisoformat(data["obj_created"]), data["id"]
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable cursor file {cursor_file}: {e}")
+            return None
+
+    @staticmethod
+    def _save_cursor(cursor_file, cursor):
+        obj_created, poster_id = cursor
+        cursor_file.parent.mkdir(parents=True, exist_ok=True)
+        cursor_file.write_text(
+            json.dumps({"obj_created": obj_created.isoformat(), "id": poster_id})
+        )
+
+    def _process_in_thread(self, poster):
+        # Worker threads each hold their own connection. Treat every poster
+        # like a request so connections are recycled according to
+        # CONN_MAX_AGE instead of leaking when the pool shuts down.
+        close_old_connections()
+        try:
+            return self._process(poster)
+        finally:
+            close_old_connections()
+
+    def _process(self, poster):
+        start = time.monotonic()
+
+        if not poster.ref_obj:
+            logger.warning(f"Poster id={poster.id} is orphaned. Removing...")
+            poster.delete()
+            return None, time.monotonic() - start, None
+
+        if self.force:
+            poster.imdb = ""
+            poster.tmdb = ""
+
+        unsaved = None
+        try:
+            if self.force:
+                with response_cache.bypass():
+                    data = poster.populate_data()
+            else:
+                data = poster.populate_data()
+
+            if not data and self.force:
+                unsaved = poster
+        except Exception as e:
+            logger.warning(f"Got error processing {poster}")
+            logger.warning(e)
+
+        return str(poster.ref_obj), time.monotonic() - start, unsaved
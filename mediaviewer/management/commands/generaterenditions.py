@@ -0,0 +1,90 @@
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from mediaviewer.models import Poster
+from mediaviewer.renditions import create_renditions_from_storage
+
+DEFAULT_WORKERS = 4
+DEFAULT_BATCH_SIZE = 100
+logger = logging.getLogger(__file__)
+
+
+class Command(BaseCommand):
+    help = "Create the downsized renditions of every poster image"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Recreate renditions of posters that already have them",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=DEFAULT_WORKERS,
+            help="Number of processes resizing images concurrently",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help="Number of posters loaded from the database at a time",
+        )
+
+    def handle(self, *args, **kwargs):
+        batch_size = max(kwargs["batch_size"], 1)
+
+        poster_qs = Poster.objects.exclude(image="").only("pk", "image", "renditions")
+        if not kwargs["force"]:
+            poster_qs = poster_qs.exclude(renditions__has_key="source")
+
+        workers = max(kwargs["workers"], 1)
+        count = 0
+        failed = 0
+        last_pk = 0
+        # Resizing is CPU bound so it runs in separate processes. Spawned
+        # workers never inherit this process' database connection.
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        ) as executor:
+            while True:
+                batch = list(
+                    poster_qs.filter(pk__gt=last_pk).order_by("pk")[:batch_size]
+                )
+                if not batch:
+                    break
+
+                names = [poster.image.name for poster in batch]
+                if workers == 1:
+                    # Skip the round trip to another process when not running
+                    # concurrently.
+                    results = map(create_renditions_from_storage, names)
+                else:
+                    futures = [
+                        executor.submit(create_renditions_from_storage, name)
+                        for name in names
+                    ]
+                    results = (future.result() for future in futures)
+
+                updated = []
+                for poster, (renditions, error) in zip(batch, results):
+                    # Exceptions without a message still fail
+                    if error is not None:
+                        logger.warning(f"Could not create renditions for {poster.pk}")
+                        logger.warning(error)
+                        failed += 1
+                        continue
+
+                    poster.renditions = {"source": poster.image.name, **renditions}
+                    updated.append(poster)
+
+                Poster.objects.bulk_update(updated, ["renditions"])
+                count += len(updated)
+                last_pk = batch[-1].pk
+
+        self.stdout.write(f"Created renditions for {count} posters ({failed} failed)")
+        self.stdout.write(self.style.SUCCESS("Done"))
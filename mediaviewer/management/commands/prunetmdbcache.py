@@ -0,0 +1,22 @@
+import argparse
+
+from django.core.management.base import BaseCommand
+
+from mediaviewer.tmdb.cache import response_cache
+
+
+class Command(BaseCommand):
+    help = "Remove expired TMDB responses from the cache"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action=argparse.BooleanOptionalAction,
+            help="Remove every cached response, expired or not",
+        )
+
+    def handle(self, *args, **kwargs):
+        everything = kwargs.get("all", False) or False
+
+        removed = response_cache.prune(everything=everything)
+        self.stdout.write(f"Removed {removed} cached TMDB responses.")
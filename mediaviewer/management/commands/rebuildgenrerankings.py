@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from mediaviewer.models import GenreRanking
+
+
+class Command(BaseCommand):
+    help = "Recount how many movies and TV shows have each genre"
+
+    def handle(self, *args, **kwargs):
+        GenreRanking.objects.refresh()
+
+        self.stdout.write(f"Rebuilt {GenreRanking.objects.count()} genre rankings")
+        self.stdout.write(self.style.SUCCESS("Done"))
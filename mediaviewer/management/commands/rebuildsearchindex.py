@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from mediaviewer.models import TV, MediaFile, Movie
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = "Recompute the full text search vectors of every Movie, TV and MediaFile"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help="Number of rows updated per query",
+        )
+
+    def handle(self, *args, **kwargs):
+        batch_size = max(kwargs["batch_size"], 1)
+
+        for model in (Movie, TV, MediaFile):
+            count = 0
+            last_pk = 0
+            while True:
+                pks = list(
+                    model.objects.filter(pk__gt=last_pk)
+                    .order_by("pk")
+                    .values_list("pk", flat=True)[:batch_size]
+                )
+                if not pks:
+                    break
+
+                count += model.objects.filter(pk__in=pks).refresh_search_vector()
+                last_pk = pks[-1]
+            self.stdout.write(f"Rebuilt {count} {model._meta.verbose_name_plural}")
+        self.stdout.write(self.style.SUCCESS("Done"))
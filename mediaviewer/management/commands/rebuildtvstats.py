@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from mediaviewer.models import TV, WatchedCount
+
+DEFAULT_BATCH_SIZE = 100
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the episode count and latest episode date of every TV and "
+        "how many episodes each user watched"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help="Number of TV shows refreshed at a time",
+        )
+
+    def handle(self, *args, **kwargs):
+        batch_size = max(kwargs["batch_size"], 1)
+
+        count = TV.objects.all().refresh_episode_stats()
+
+        tv_ids = list(TV.objects.order_by("pk").values_list("pk", flat=True))
+        for idx in range(0, len(tv_ids), batch_size):
+            WatchedCount.objects.refresh(tv_ids[idx : idx + batch_size])
+
+        self.stdout.write(f"Rebuilt stats for {count} TV shows")
+        self.stdout.write(self.style.SUCCESS("Done"))
@@ -0,0 +1,223 @@
+import argparse
+import json
+import logging
+from collections import defaultdict
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from mediaviewer.models import TV, MediaFile, MediaPath, Movie, WatchedCount
+from mediaviewer.scanner import (
+    CREATE,
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_WORKERS,
+    DELETE,
+    HIDE,
+    RESTORE,
+    reconcile_media_paths,
+)
+
+logger = logging.getLogger(__file__)
+
+# Reported for directories that are gone from disk
+MISSING = "missing"
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the files of every MediaPath directory on disk against the "
+        "database. New files are added, missing files are hidden and hidden "
+        "files that reappear are restored. Directories that are missing "
+        "entirely are reported and left alone"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action=argparse.BooleanOptionalAction,
+            default=False,
+            help="Only print what would change",
+        )
+        parser.add_argument(
+            "--delete-missing",
+            action="store_true",
+            help="Delete files that are missing from disk instead of hiding them",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="List directories even if their mtime has not changed",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=DEFAULT_WORKERS,
+            help="Number of threads listing directories concurrently",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help="Number of paths loaded from the database at a time",
+        )
+        parser.add_argument(
+            "--resume",
+            action=argparse.BooleanOptionalAction,
+            default=False,
+            help="Continue after the last batch completed by a previous run",
+        )
+        parser.add_argument(
+            "--cursor-file",
+            metavar="PATH",
+            help="File used to remember progress between runs",
+        )
+
+    def handle(self, *args, **kwargs):
+        dry_run = kwargs["dry_run"]
+        cursor_file = Path(
+            kwargs["cursor_file"] or settings.CACHE_DIR / "reconcile_cursor.json"
+        )
+
+        after = self._load_cursor(cursor_file) if kwargs["resume"] else None
+        if after:
+            self.stdout.write(f"Resuming after media path id={after}")
+
+        counts = defaultdict(int)
+        for batch, actions in reconcile_media_paths(
+            MediaPath.objects.filter(skip=False).only(
+                "pk", "_path", "tv", "movie", "reconciled_mtime", "missing"
+            ),
+            delete_missing=kwargs["delete_missing"],
+            workers=kwargs["workers"],
+            batch_size=max(kwargs["batch_size"], 1),
+            force=kwargs["force"],
+            after=after or 0,
+        ):
+            for mp, mtime, files in batch:
+                if mtime is None:
+                    counts[MISSING] += 1
+                    self.stdout.write(f" {MISSING:<8} {mp._path}")
+
+            for action in actions:
+                counts[action.kind] += 1
+                self.stdout.write(
+                    f" {action.kind:<8} {Path(action.media_path._path) / action.filename}"
+                )
+
+            if not dry_run:
+                with transaction.atomic():
+                    self._apply(batch, actions)
+                self._infer_scrapers(actions)
+                self._save_cursor(cursor_file, batch[-1][0].pk)
+
+        if not dry_run:
+            cursor_file.unlink(missing_ok=True)
+
+        self.stdout.write(
+            " ".join(
+                f"{kind}: {counts[kind]}"
+                for kind in (CREATE, HIDE, RESTORE, DELETE, MISSING)
+            )
+        )
+        if dry_run:
+            self.stdout.write(self.style.WARNING("dry-run=True nothing was changed"))
+        self.stdout.write(self.style.SUCCESS("Done"))
+
+    def _apply(self, batch, actions):
+        now = timezone.now()
+        by_kind = defaultdict(list)
+        for action in actions:
+            by_kind[action.kind].append(action)
+
+        for media_class, field in ((TV, "tv"), (Movie, "movie")):
+            entries = {}
+            for action in by_kind[CREATE]:
+                mp = action.media_path
+                if getattr(mp, f"{field}_id") is None:
+                    continue
+
+                entry = entries.setdefault(
+                    mp.pk,
+                    {"path": mp._path, field: getattr(mp, f"{field}_id"), "files": []},
+                )
+                entry["files"].append(
+                    {
+                        "filename": action.filename,
+                        "display_name": action.filename,
+                        "size": action.size,
+                    }
+                )
+            if entries:
+                MediaPath.objects.bulk_ingest(media_class, list(entries.values()))
+
+        MediaFile.objects.filter(
+            pk__in=[action.media_file_id for action in by_kind[HIDE]]
+        ).update(hide=True, missing=True, date_edited=now)
+        MediaFile.objects.filter(
+            pk__in=[action.media_file_id for action in by_kind[RESTORE]]
+        ).update(hide=False, missing=False, date_edited=now)
+
+        # update() skips the signals that keep these up to date
+        tv_ids = {
+            action.media_path.tv_id for action in by_kind[HIDE] + by_kind[RESTORE]
+        } - {None}
+        if tv_ids:
+            TV.objects.filter(pk__in=tv_ids).refresh_episode_stats()
+            WatchedCount.objects.refresh(tv_ids)
+
+        MediaFile.objects.filter(
+            pk__in=[action.media_file_id for action in by_kind[DELETE]]
+        ).delete()
+
+        changed_paths = []
+        for mp, mtime, files in batch:
+            if files is None and mtime is not None:
+                continue
+
+            missing = mtime is None
+            if mp.reconciled_mtime != mtime or mp.missing != missing:
+                mp.reconciled_mtime = mtime
+                mp.missing = missing
+                # bulk_update does not apply auto_now
+                mp.date_edited = now
+                changed_paths.append(mp)
+        MediaPath.objects.bulk_update(
+            changed_paths, ["reconciled_mtime", "missing", "date_edited"]
+        )
+
+    @staticmethod
+    def _infer_scrapers(actions):
+        # New episodes need their season, episode, display name and poster
+        # just like files added through the API. This talks to TMDB so it is
+        # done outside of the batch's transaction.
+        created = [
+            action
+            for action in actions
+            if action.kind == CREATE and action.media_path.tv_id is not None
+        ]
+        if not created:
+            return
+
+        MediaFile.objects.filter(
+            media_path__in={action.media_path.pk for action in created},
+            filename__in={action.filename for action in created},
+            scraper=None,
+        ).infer_scrapers()
+
+    @staticmethod
+    def _load_cursor(cursor_file):
+        try:
+            return json.loads(cursor_file.read_text())["id"]
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable cursor file {cursor_file}: {e}")
+            return None
+
+    @staticmethod
+    def _save_cursor(cursor_file, media_path_id):
+        cursor_file.parent.mkdir(parents=True, exist_ok=True)
+        cursor_file.write_text(json.dumps({"id": media_path_id}))
@@ -0,0 +1,65 @@
+import argparse
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from mediaviewer.models import PosterJob
+from mediaviewer.models.posterjob import DONE
+
+
+class Command(BaseCommand):
+    help = "Process queued poster population jobs"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--burst",
+            action=argparse.BooleanOptionalAction,
+            help="Exit once no jobs are ready instead of waiting for more",
+        )
+
+        parser.add_argument(
+            "--limit",
+            metavar="LIMIT",
+            type=int,
+            help="Exit after processing LIMIT jobs",
+        )
+
+    def handle(self, *args, **kwargs):
+        burst = kwargs.get("burst", False) or False
+        limit = kwargs.get("limit")
+
+        requeued = PosterJob.objects.requeue_stale()
+        if requeued:
+            self.stdout.write(f"Requeued {requeued} stale jobs")
+
+        processed = 0
+        while limit is None or processed < limit:
+            close_old_connections()
+
+            job = PosterJob.objects.claim()
+            if job is None:
+                if burst:
+                    break
+
+                time.sleep(settings.POSTER_JOB_POLL_INTERVAL)
+                PosterJob.objects.requeue_stale()
+                continue
+
+            start = time.monotonic()
+            job.run()
+            processed += 1
+
+            if job.status == DONE:
+                self.stdout.write(
+                    f" {job.poster} done in {time.monotonic() - start:.2f}s"
+                )
+            else:
+                self.stdout.write(
+                    self.style.WARNING(
+                        f" {job.poster} {job.status} after {job.attempts} attempts: {job.last_error}"
+                    )
+                )
+
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} jobs"))
@@ -0,0 +1,117 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from mediaviewer.models import MediaFile, MediaPath
+from mediaviewer.scanner import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_WORKERS,
+    UNREADABLE,
+    scan_media_paths,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Stat every MediaPath directory on disk and store the size and mtime of "
+        "its files. Directories and files that no longer exist are flagged as "
+        "missing"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=DEFAULT_WORKERS,
+            help="Number of threads listing directories concurrently",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help="Number of paths loaded from the database at a time",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="List directories even if their mtime has not changed",
+        )
+
+    def handle(self, *args, **kwargs):
+        self.counts = {
+            "paths": 0,
+            "unchanged": 0,
+            "unreadable": 0,
+            "missing": 0,
+            "files": 0,
+        }
+
+        for batch in scan_media_paths(
+            MediaPath.objects.filter(skip=False).only(
+                "pk", "_path", "scanned_mtime", "missing"
+            ),
+            workers=kwargs["workers"],
+            batch_size=max(kwargs["batch_size"], 1),
+            force=kwargs["force"],
+        ):
+            self._update(batch)
+
+        self.stdout.write(
+            f"Scanned {self.counts['paths']} paths: "
+            f"{self.counts['unchanged']} unchanged "
+            f"{self.counts['unreadable']} unreadable "
+            f"{self.counts['missing']} missing "
+            f"{self.counts['files']} files updated"
+        )
+        self.stdout.write(self.style.SUCCESS("Done"))
+
+    def _update(self, batch):
+        now = timezone.now()
+        scanned = {}
+        changed_paths = []
+        for mp, mtime, files in batch:
+            self.counts["paths"] += 1
+            if mtime == UNREADABLE:
+                self.counts["unreadable"] += 1
+                continue
+
+            if files is None and mtime is not None:
+                self.counts["unchanged"] += 1
+                continue
+
+            missing = mtime is None
+            if missing:
+                self.counts["missing"] += 1
+            scanned[mp.pk] = files or {}
+
+            if mp.scanned_mtime != mtime or mp.missing != missing:
+                mp.scanned_mtime = mtime
+                mp.missing = missing
+                # bulk_update does not apply auto_now
+                mp.date_edited = now
+                changed_paths.append(mp)
+
+        # Files in directories that have not changed are left alone
+        changed_files = []
+        for mf in MediaFile.objects.filter(media_path__in=scanned).only(
+            "pk", "media_path", "filename", "size", "mtime", "missing"
+        ):
+            stat = scanned[mf.media_path_id].get(mf.filename)
+            if stat is None:
+                size, mtime, missing = mf.size, mf.mtime, True
+            else:
+                (size, mtime), missing = stat, False
+
+            if (mf.size, mf.mtime, mf.missing) != (size, mtime, missing):
+                mf.size = size
+                mf.mtime = mtime
+                mf.missing = missing
+                mf.date_edited = now
+                changed_files.append(mf)
+
+        MediaPath.objects.bulk_update(
+            changed_paths, ["scanned_mtime", "missing", "date_edited"]
+        )
+        MediaFile.objects.bulk_update(
+            changed_files, ["size", "mtime", "missing", "date_edited"]
+        )
+        self.counts["files"] += len(changed_files)
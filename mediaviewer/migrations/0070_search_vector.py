@@ -0,0 +1,64 @@
+# Generated by Django 6.0.6 on 2026-10-18 20:09
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+from mediaviewer.models.search import refresh_search_vector
+
+
+def populate_search_vectors(apps, schema_editor):
+    refresh_search_vector(apps.get_model("mediaviewer", "Movie").objects.all(), "name")
+    refresh_search_vector(apps.get_model("mediaviewer", "TV").objects.all(), "name")
+    refresh_search_vector(
+        apps.get_model("mediaviewer", "MediaFile").objects.all(), "display_name"
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("mediaviewer", "0069_posterjob"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="mediafile",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="movie",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="tv",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="mediafile",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="mediafile_search"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="movie",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="movie_search"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="tv",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="tv_search"
+            ),
+        ),
+        migrations.RunPython(populate_search_vectors, migrations.RunPython.noop),
+    ]
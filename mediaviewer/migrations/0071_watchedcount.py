@@ -0,0 +1,96 @@
+# Generated by Django 6.0.6 on 2026-10-18 20:16
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_counts(apps, schema_editor):
+    TV = apps.get_model("mediaviewer", "TV")
+    MediaFile = apps.get_model("mediaviewer", "MediaFile")
+    Comment = apps.get_model("mediaviewer", "Comment")
+    WatchedCount = apps.get_model("mediaviewer", "WatchedCount")
+
+    episodes = (
+        MediaFile.objects.filter(media_path__tv=OuterRef("pk"), hide=False)
+        .values("media_path__tv")
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    TV.objects.update(episode_count=Coalesce(Subquery(episodes), 0))
+
+    watched = (
+        Comment.objects.filter(
+            viewed=True,
+            media_file__hide=False,
+            media_file__media_path__tv__isnull=False,
+        )
+        .values("user", "media_file__media_path__tv")
+        .annotate(watched=Count("pk"))
+    )
+    WatchedCount.objects.bulk_create(
+        (
+            WatchedCount(
+                user_id=row["user"],
+                tv_id=row["media_file__media_path__tv"],
+                watched=row["watched"],
+            )
+            for row in watched.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("mediaviewer", "0070_search_vector"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="tv",
+            name="episode_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name="WatchedCount",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("watched", models.PositiveIntegerField(default=0)),
+                (
+                    "tv",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="watched_counts",
+                        to="mediaviewer.tv",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("user", "tv"), name="unique_user_tv"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(populate_counts, migrations.RunPython.noop),
+    ]
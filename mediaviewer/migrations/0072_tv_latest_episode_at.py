@@ -0,0 +1,32 @@
+# Generated by Django 6.0.6 on 2026-10-18 20:22
+
+from django.db import migrations, models
+from django.db.models import Max, OuterRef, Subquery
+
+
+def populate_latest_episode_at(apps, schema_editor):
+    TV = apps.get_model("mediaviewer", "TV")
+    MediaFile = apps.get_model("mediaviewer", "MediaFile")
+
+    latest = (
+        MediaFile.objects.filter(media_path__tv=OuterRef("pk"), hide=False)
+        .values("media_path__tv")
+        .annotate(latest=Max("date_created"))
+        .values("latest")
+    )
+    TV.objects.update(latest_episode_at=Subquery(latest))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("mediaviewer", "0071_watchedcount"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="tv",
+            name="latest_episode_at",
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.RunPython(populate_latest_episode_at, migrations.RunPython.noop),
+    ]
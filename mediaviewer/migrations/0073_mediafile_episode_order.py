@@ -0,0 +1,19 @@
+# Generated by Django 6.0.6 on 2026-10-18 20:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("mediaviewer", "0072_tv_latest_episode_at"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="mediafile",
+            index=models.Index(
+                fields=["media_path", "display_name", "id"],
+                name="mediafile_episode_order",
+            ),
+        ),
+    ]
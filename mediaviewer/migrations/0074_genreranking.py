@@ -0,0 +1,69 @@
+# Generated by Django 6.0.6 on 2026-10-18 20:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_rankings(apps, schema_editor):
+    Genre = apps.get_model("mediaviewer", "Genre")
+    GenreRanking = apps.get_model("mediaviewer", "GenreRanking")
+
+    GenreRanking.objects.bulk_create(
+        GenreRanking(genre_id=row["id"], media_type=media_type, count=row["count"])
+        for media_type, lookup in (("movie", "poster__movie"), ("tv", "poster__tv"))
+        for row in Genre.objects.filter(**{f"{lookup}__isnull": False})
+        .values("id")
+        .annotate(count=Count(lookup))
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("mediaviewer", "0073_mediafile_episode_order"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="GenreRanking",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "media_type",
+                    models.CharField(
+                        choices=[("movie", "Movie"), ("tv", "TV")], max_length=8
+                    ),
+                ),
+                ("count", models.PositiveIntegerField(default=0)),
+                (
+                    "genre",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="rankings",
+                        to="mediaviewer.genre",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["media_type", "-count"], name="genreranking_media_type"
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("genre", "media_type"), name="unique_genre_media_type"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(populate_rankings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 6.0.6 on 2026-10-18 20:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("mediaviewer", "0074_genreranking"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="mediafile",
+            name="missing",
+            field=models.BooleanField(blank=True, default=False),
+        ),
+        migrations.AddField(
+            model_name="mediafile",
+            name="mtime",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="mediapath",
+            name="missing",
+            field=models.BooleanField(blank=True, default=False),
+        ),
+        migrations.AddField(
+            model_name="mediapath",
+            name="scanned_mtime",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0.6 on 2026-10-18 21:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("mediaviewer", "0075_mediafile_scan"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="mediapath",
+            name="reconciled_mtime",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
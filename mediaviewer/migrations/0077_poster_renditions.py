@@ -0,0 +1,17 @@
+# Generated by Django 6.0.6 on 2026-10-18 21:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("mediaviewer", "0076_mediapath_reconciled_mtime"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="poster",
+            name="renditions",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 6.0.6 on 2026-10-18 21:14
+
+import mediaviewer.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("mediaviewer", "0077_poster_renditions"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StoredImage",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date_created", models.DateTimeField(auto_now_add=True)),
+                ("date_edited", models.DateTimeField(auto_now=True)),
+                ("tmdb_path", models.CharField(max_length=256, unique=True)),
+                ("name", models.CharField(db_index=True, max_length=256)),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+        migrations.AlterField(
+            model_name="poster",
+            name="image",
+            field=models.ImageField(
+                blank=True,
+                storage=mediaviewer.storage.get_poster_storage,
+                upload_to="uploads/%Y/%m/%d/",
+            ),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0.6 on 2026-10-18 21:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("mediaviewer", "0078_storedimage"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="storedimage",
+            name="etag",
+            field=models.CharField(blank=True, default="", max_length=256),
+        ),
+    ]
@@ -6,7 +6,7 @@ from .director import Director
 from .donation_site import DonationSite
 from .downloadtoken import DownloadToken
 from .filenamescrapeformat import FilenameScrapeFormat
-from .genre import Genre
+from .genre import Genre, GenreRanking
 from .loginevent import LoginEvent
 from .media import Media
 from .mediafile import MediaFile
@@ -15,11 +15,14 @@ from .message import Message
 from .movie import Movie
 from .person import Person
 from .poster import Poster
+from .posterjob import PosterJob
 from .request import Request, RequestVote
 from .sitegreeting import SiteGreeting
+from .storedimage import StoredImage
 from .tv import TV
 from .tvdbconfiguration import TVDBConfiguration
 from .usersettings import BadEmail, ImproperLogin, UserSettings
 from .videoprogress import VideoProgress
 from .waiterstatus import WaiterStatus
+from .watchedcount import WatchedCount
 from .writer import Writer
@@ -7,11 +7,9 @@ sys_random = random.SystemRandom()
 
 class DonationSiteManager(models.Manager):
     def random(self):
-        count = self.count()
-        if count:
-            rand_idx = sys_random.randint(0, count - 1)
-            return self.all()[rand_idx]
-        return None
+        # There are only ever a handful of sites so load them all at once
+        sites = list(self.all())
+        return sys_random.choice(sites) if sites else None
 
 
 class DonationSite(models.Model):
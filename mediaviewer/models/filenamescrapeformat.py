@@ -1,7 +1,14 @@
 import re
+import threading
+import time
+from functools import lru_cache
 
+from django.conf import settings
 from django.db import models
 
+from mediaviewer.cacheversion import CacheVersion
+from mediaviewer.log import log
+
 
 class FilenameScrapeFormat(models.Model):
     nameRegex = models.TextField(
@@ -45,51 +52,38 @@ class FilenameScrapeFormat(models.Model):
 
     def valid_for_filename(self, filename):
         from mediaviewer.models import TV
+        from mediaviewer.models.tv import tv_name_index
 
         tv = None
 
         if self.subPeriods:
             filename = filename.replace(".", " ")
 
-        name = re.findall(self.nameRegex, filename)
-        name = name[0].strip() if name and len(name[0]) > 1 else None
+        compiled = scraper_engine.compiled(self)
+
+        name = compiled.find(compiled.name_regex, filename)
+        name = name.strip() if name and len(name) > 1 else None
 
         if not name:
             return None
         else:
-            query = models.Q()
-            words = name.split()
-            for word in words:
-                query = query | models.Q(name__icontains=word)
-            tv_objs = TV.objects.filter(query).order_by("-pk")
-            max_word_score = 0
-
-            for tv_obj in tv_objs:
-                word_score = self._tv_name_score_for_words(tv_obj, words)
-                if word_score > max_word_score:
-                    tv = tv_obj
-                    max_word_score = word_score
+            tv_id = tv_name_index.best_match(name.split())
+            tv = TV.objects.filter(pk=tv_id).first() if tv_id else None
 
             if not tv:
                 return None
 
-        season = re.findall(self.seasonRegex, filename)
-        if not season or not season[0].strip():
+        season = compiled.find(compiled.season_regex, filename)
+        if not season or not season.strip():
             return None
-        else:
-            season = season[0]
-
-            if not season.isdigit() or int(season) == 0:
-                return None
-
-        episode = re.findall(self.episodeRegex, filename)
-        if not episode or not episode[0].strip():
+        elif not season.isdigit() or int(season) == 0:
             return None
-        else:
-            episode = episode[0]
 
-            if not episode.isdigit() or int(episode) == 0:
-                return None
+        episode = compiled.find(compiled.episode_regex, filename)
+        if not episode or not episode.strip():
+            return None
+        elif not episode.isdigit() or int(episode) == 0:
+            return None
 
         # Filenames containing 264 are most likely not right
         if int(season) == 2 and int(episode) == 64:
@@ -97,25 +91,114 @@ class FilenameScrapeFormat(models.Model):
 
         return (tv, name, season, episode)
 
-    @staticmethod
-    def _tv_name_score_for_words(tv, words):
-        count = 0
-        for word in words:
-            if word.lower() in tv.name.lower():
-                count += 1
-
-        if tv.name.lower() == " ".join([x.lower() for x in words]):
-            count += 5
-        return count
-
     @classmethod
     def tv_for_filename(cls, filename):
         paths = []
 
-        for scraper in FilenameScrapeFormat.objects.all():
-            path = scraper.valid_for_filename(filename)
+        for compiled in scraper_engine.scrapers():
+            path = compiled.scraper.valid_for_filename(filename)
             if path:
                 paths.append(path)
 
         paths.sort(key=lambda x: len(x[1]), reverse=True)
         return paths[0][0] if paths else ""
+
+
+@lru_cache(maxsize=256)
+def _compile(regex_str):
+    return re.compile(regex_str) if regex_str else None
+
+
+class CompiledScraper:
+    """A FilenameScrapeFormat with its regexes compiled."""
+
+    def __init__(self, scraper):
+        self.scraper = scraper
+        self.name_regex = _compile(scraper.nameRegex)
+        self.season_regex = _compile(scraper.seasonRegex)
+        self.episode_regex = _compile(scraper.episodeRegex)
+
+    @staticmethod
+    def find(regex, text):
+        """Return the first match of regex in text, like re.findall(...)[0]."""
+        if regex is None:
+            return None
+
+        res = regex.findall(text)
+        return res[0] if res else None
+
+    @staticmethod
+    def _number(val):
+        return val.zfill(2) if val and val.isdigit() else None
+
+    def season_and_episode(self, filename):
+        return (
+            self._number(self.find(self.season_regex, filename)),
+            self._number(self.find(self.episode_regex, filename)),
+        )
+
+
+class ScraperEngine:
+    """
+    Process wide cache of every FilenameScrapeFormat, compiled once.
+
+    Saving or deleting a format bumps a version shared with every other
+    process, which then reload their copy. Entries also expire after
+    SCRAPER_CACHE_TTL seconds to catch writes that skip the signals.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = CacheVersion("scrapers")
+        self._scrapers = None
+        self._expires = 0
+
+    def _load(self):
+        scrapers = []
+        for scraper in FilenameScrapeFormat.objects.order_by("id"):
+            try:
+                scrapers.append(CompiledScraper(scraper))
+            except re.error as e:
+                log.warning(f"Skipping scraper with invalid regex {scraper}: {e}")
+        return scrapers
+
+    def scrapers(self):
+        with self._lock:
+            if (
+                self._version.changed()
+                or self._scrapers is None
+                or time.monotonic() >= self._expires
+            ):
+                self._scrapers = self._load()
+                self._expires = time.monotonic() + settings.SCRAPER_CACHE_TTL
+            return self._scrapers
+
+    def invalidate(self):
+        with self._lock:
+            self._scrapers = None
+            self._version.bump()
+
+    @staticmethod
+    def compiled(scraper):
+        # Patterns are memoized by _compile so this is cheap for any instance
+        return CompiledScraper(scraper)
+
+    def episode_for_filename(self, filename, scrapers=None):
+        """
+        Find the first format able to scrape a season and episode.
+
+        Returns a tuple of (scraper, season, episode) or None.
+        """
+        if not scrapers:
+            compiled_scrapers = self.scrapers()
+        else:
+            compiled_scrapers = [self.compiled(scraper) for scraper in scrapers]
+
+        for compiled in compiled_scrapers:
+            season, episode = compiled.season_and_episode(filename)
+            if season and episode and int(episode) not in (64, 65):
+                return compiled.scraper, season, episode
+        return None
+
+
+scraper_engine = ScraperEngine()
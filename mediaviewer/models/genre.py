@@ -1,28 +1,19 @@
-from django.db import models
+from django.db import models, transaction
 
 
 class GenreManager(models.Manager):
     def get_movie_genres(self, limit=10):
-        genres = self.filter(
-            pk__in=(
-                self.filter(poster__movie__isnull=False)
-                .values("id")
-                .annotate(genre_count=models.Count("poster__movie"))
-                .order_by("-genre_count", "genre")
-                .values("id")[:limit]
-            )
-        ).order_by("genre")
-
-        return genres
+        return self._ranked(GenreRanking.MOVIE, limit)
 
     def get_tv_genres(self, limit=10):
+        return self._ranked(GenreRanking.TV, limit)
+
+    def _ranked(self, media_type, limit):
         genres = self.filter(
             pk__in=(
-                self.filter(poster__tv__isnull=False)
-                .values("id")
-                .annotate(genre_count=models.Count("poster__tv"))
-                .order_by("-genre_count", "genre")
-                .values("id")[:limit]
+                GenreRanking.objects.filter(media_type=media_type)
+                .order_by("-count", "genre__genre")
+                .values("genre")[:limit]
             )
         ).order_by("genre")
 
@@ -54,3 +45,89 @@ class Genre(models.Model):
         new_obj.genre = genre.title()
         new_obj.save()
         return new_obj
+
+
+class GenreRankingManager(models.Manager):
+    def refresh(self, genre_ids=None):
+        """
+        Recount how many movies and TV shows have each genre.
+
+        Only the genres in genre_ids are recounted when it is given. Counts
+        are upserted so concurrent refreshes never collide on the unique
+        constraint.
+        """
+        genres = Genre.objects.all()
+        if genre_ids is not None:
+            genres = genres.filter(pk__in=genre_ids)
+
+        rankings = sorted(
+            (
+                self.model(
+                    genre_id=row["id"], media_type=media_type, count=row["count"]
+                )
+                for media_type, lookup in (
+                    (GenreRanking.MOVIE, "poster__movie"),
+                    (GenreRanking.TV, "poster__tv"),
+                )
+                for row in genres.filter(**{f"{lookup}__isnull": False})
+                .values("id")
+                .annotate(count=models.Count(lookup))
+            ),
+            # Lock rows in the same order as every other refresh
+            key=lambda ranking: (ranking.genre_id, ranking.media_type),
+        )
+
+        stale = self.all()
+        if genre_ids is not None:
+            stale = stale.filter(genre__in=genre_ids)
+
+        with transaction.atomic():
+            self.bulk_create(
+                rankings,
+                update_conflicts=True,
+                unique_fields=("genre", "media_type"),
+                update_fields=("count",),
+            )
+            for media_type, _ in GenreRanking.MEDIA_TYPES:
+                stale.filter(media_type=media_type).exclude(
+                    genre__in=[
+                        ranking.genre_id
+                        for ranking in rankings
+                        if ranking.media_type == media_type
+                    ]
+                ).delete()
+
+
+class GenreRanking(models.Model):
+    MOVIE = "movie"
+    TV = "tv"
+
+    MEDIA_TYPES = (
+        (MOVIE, "Movie"),
+        (TV, "TV"),
+    )
+
+    genre = models.ForeignKey(
+        Genre, on_delete=models.CASCADE, null=False, related_name="rankings"
+    )
+    media_type = models.CharField(
+        max_length=8, choices=MEDIA_TYPES, null=False, blank=False
+    )
+    count = models.PositiveIntegerField(null=False, default=0)
+
+    objects = GenreRankingManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=("genre", "media_type"), name="unique_genre_media_type"
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=("media_type", "-count"), name="genreranking_media_type"
+            ),
+        ]
+
+    def __str__(self):
+        return f"<GenreRanking g:{self.genre_id} {self.media_type} c:{self.count}>"
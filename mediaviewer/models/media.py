@@ -1,23 +1,25 @@
 import re
 from pathlib import Path
 
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 
-from mediaviewer.models import FilenameScrapeFormat
-from mediaviewer.utils import get_search_query
+from mediaviewer.models.filenamescrapeformat import scraper_engine
 
 from .core import TimeStampModel
 from .poster import Poster
+from .posterjob import PosterJob
+from .search import refresh_search_vector, search_queryset
+
+sFailRegex = re.compile(r"\s[sS]$")
 
 
 class MediaQuerySet(models.QuerySet):
-    def search(self, search_str):
-        qs = self
-        if search_str:
-            filename_query = get_search_query(search_str, ["name"])
+    def search(self, search_str, rank=False):
+        return search_queryset(self, search_str, "name", rank=rank)
 
-            qs = qs.filter(filename_query)
-        return qs
+    def refresh_search_vector(self):
+        return refresh_search_vector(self, "name")
 
     def delete(self, *args, **kwargs):
         Poster.objects.filter(pk__in=self.values("_poster")).delete()
@@ -28,28 +30,25 @@ class MediaManager(models.Manager):
     def from_path(self, path, name=None):
         if name is None:
             ref_name = Path(path).name
-            for scraper in FilenameScrapeFormat.objects.all():
-                name_regex = re.compile(scraper.nameRegex)
-                res = name_regex.findall(ref_name)
-                name = res and res[0] or None
-                sFail = re.compile(r"\s[sS]$")
+            for compiled in scraper_engine.scrapers():
+                name = compiled.find(compiled.name_regex, ref_name)
 
                 if not name:
                     continue
 
                 name = (
-                    scraper.subPeriods
+                    compiled.scraper.subPeriods
                     and name.replace(".", " ").replace("-", " ").title()
                     or name
                 ).strip()
 
-                if name and name != ref_name and not sFail.findall(name):
+                if name and name != ref_name and not sFailRegex.findall(name):
                     break
             else:
                 name = ref_name
 
         obj, _ = self.get_or_create(name=name)
-        obj._populate_poster()  # Generate poster
+        obj._enqueue_poster()  # Generate poster in the background
         return obj, _
 
 
@@ -58,6 +57,7 @@ class Media(TimeStampModel):
     finished = models.BooleanField(null=False, default=False)
     hide = models.BooleanField(null=False, default=False)
     collections = models.ManyToManyField("mediaviewer.Collection", blank=True)
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
         abstract = True
@@ -72,6 +72,10 @@ class Media(TimeStampModel):
         self._poster = Poster.objects.from_ref_obj(self)
         self._poster.populate_data()
 
+    def _enqueue_poster(self):
+        self._poster = Poster.objects.from_ref_obj(self)
+        PosterJob.objects.enqueue(self._poster)
+
     @property
     def media_path(self):
         return self.mediapath_set.order_by("-pk").first()
@@ -1,14 +1,17 @@
 import re
 
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.urls import reverse
 
 from mediaviewer.log import log
-from mediaviewer.utils import get_search_query
 
 from .core import TimeStampModel, ViewableManagerMixin, ViewableObjectMixin
-from .filenamescrapeformat import FilenameScrapeFormat
+from .filenamescrapeformat import scraper_engine
 from .poster import Poster
+from .search import refresh_search_vector, search_queryset
+from .tvdbconfiguration import batch_episode_info
 
 yearRegex = re.compile(r"20\d{2}\D?.*$")
 dvdRegex = re.compile(r"[A-Z]{2,}.*$")
@@ -24,17 +27,18 @@ class MediaFileQuerySet(models.QuerySet):
         Poster.objects.filter(pk__in=self.values("_poster")).delete()
         return super().delete(*args, **kwargs)
 
-    def search(self, search_str):
-        qs = self
-        if search_str:
-            filename_query = get_search_query(search_str, ["display_name"])
+    def search(self, search_str, rank=False):
+        return search_queryset(self, search_str, "display_name", rank=rank)
 
-            qs = qs.filter(filename_query)
-        return qs
+    def refresh_search_vector(self):
+        return refresh_search_vector(self, "display_name")
 
     def infer_scrapers(self):
-        for mf in self:
-            mf.infer_scraper()
+        with batch_episode_info():
+            for mf in self.select_related(
+                "media_path__tv", "media_path__movie", "_poster"
+            ):
+                mf.infer_scraper()
 
     def refresh_display_name(self):
         for mf in self:
@@ -42,9 +46,10 @@ class MediaFileQuerySet(models.QuerySet):
 
     def populate_poster(self):
         posters = Poster.objects.filter(media_file__in=self)
-        for poster in posters:
-            poster.populate_data()
-            poster.save()
+        with batch_episode_info():
+            for poster in posters:
+                poster.populate_data()
+                poster.save()
 
 
 class MediaFileManager(models.Manager, ViewableManagerMixin):
@@ -75,15 +80,38 @@ class MediaFile(TimeStampModel, ViewableObjectMixin):
     )
     hide = models.BooleanField(null=False, blank=True, default=False)
     size = models.BigIntegerField(null=True, blank=True)
+    mtime = models.DateTimeField(null=True, blank=True)
+    missing = models.BooleanField(null=False, blank=True, default=False)
+    search_vector = SearchVectorField(null=True, editable=False)
 
     objects = MediaFileManager.from_queryset(MediaFileQuerySet)()
 
+    class Meta:
+        indexes = [
+            GinIndex(fields=["search_vector"], name="mediafile_search"),
+            # Episodes of a path in display order for next and previous
+            models.Index(
+                fields=["media_path", "display_name", "id"],
+                name="mediafile_episode_order",
+            ),
+        ]
+
     def __str__(self):
         return f"<{self.__class__.__name__} f:{self.filename} s:{self.season} e:{self.episode}>"
 
     def __repr__(self):
         return str(self)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember these so saving can tell when the stats of the TV change
+        instance._loaded_stats = instance.stats_fields()
+        return instance
+
+    def stats_fields(self):
+        return {field: self.__dict__.get(field) for field in ("hide", "date_created")}
+
     def _get_tvdb(self):
         return self.media_path.tv.tvdb if self.media_path.tv else None
 
@@ -159,27 +187,19 @@ class MediaFile(TimeStampModel, ViewableObjectMixin):
         if self.movie:
             return
 
-        if not scrapers:
-            scrapers = FilenameScrapeFormat.objects.all()
-
         if self._poster:
             self._poster.delete()
             self._poster = None
 
-        for scraper in scrapers:
-            self.scraper = scraper
-            name = self.media.name
-            season = self._scraped_season()
-            episode = self._scraped_episode()
-            if season and episode and int(episode) not in (64, 65):
-                # Success!
-
-                log.debug("Success!!!")
-                log.debug(
-                    f"Name: {name} Season: {season} Episode: {episode} Fullname: {self.full_name} FSid: {scraper.id}"
-                )
+        match = scraper_engine.episode_for_filename(self.filename, scrapers=scrapers)
+        if match:
+            # Success!
+            self.scraper, season, episode = match
 
-                break
+            log.debug("Success!!!")
+            log.debug(
+                f"Name: {self.media.name} Season: {season} Episode: {episode} Fullname: {self.full_name} FSid: {self.scraper.id}"
+            )
         else:
             self.scraper = None
 
@@ -223,26 +243,45 @@ class MediaFile(TimeStampModel, ViewableObjectMixin):
             )
 
     def next(self):
-        if self.is_movie():
-            return None
-        else:
-            shows = list(self.tv.episodes())
-            index = shows.index(self)
-            if index + 1 >= len(shows):
-                return None
-            else:
-                return shows[index + 1]
+        return self._neighbour(
+            # The redundant bound lets the index seek rather than filter
+            models.Q(display_name__gte=self.display_name)
+            & (
+                models.Q(display_name__gt=self.display_name)
+                | models.Q(display_name=self.display_name, pk__gt=self.pk)
+            ),
+            ("display_name", "pk"),
+        )
 
     def previous(self):
+        return self._neighbour(
+            models.Q(display_name__lte=self.display_name)
+            & (
+                models.Q(display_name__lt=self.display_name)
+                | models.Q(display_name=self.display_name, pk__lt=self.pk)
+            ),
+            ("-display_name", "-pk"),
+        )
+
+    def _neighbour(self, keyset, ordering):
+        from mediaviewer.models import MediaPath
+
         if self.is_movie():
             return None
-        else:
-            shows = list(self.tv.episodes())
-            index = shows.index(self)
-            if index - 1 < 0:
-                return None
-            else:
-                return shows[index - 1]
+
+        # mediafile_episode_order leads with media_path so it can only order
+        # the episodes of one path. Take the closest episode of each of the
+        # show's paths through the index and pick between those.
+        candidates = MediaPath.objects.filter(tv=self.media_path.tv_id).values(
+            candidate=models.Subquery(
+                MediaFile.objects.filter(
+                    keyset, media_path=models.OuterRef("pk"), hide=False
+                )
+                .order_by(*ordering)
+                .values("pk")[:1]
+            )
+        )
+        return MediaFile.objects.filter(pk__in=candidates).order_by(*ordering).first()
 
     def _scraped_season(self):
         return self._scraped_episode_or_season(SEASON)
@@ -254,22 +293,23 @@ class MediaFile(TimeStampModel, ViewableObjectMixin):
         if self.movie:
             return None
 
+        season, episode = scraper_engine.compiled(self.scraper).season_and_episode(
+            self.filename
+        )
+
         if episode_or_season == EPISODE:
-            regex_str = self.scraper.episodeRegex
+            return episode
         elif episode_or_season == SEASON:
-            regex_str = self.scraper.seasonRegex
+            return season
         else:
             raise Exception(f"Invalid episode_or_season. Got {episode_or_season}")
 
-        regex = re.compile(regex_str)
-        res = regex.findall(self.filename)
-        val = res and res[0] or None
-        return val and (val.isdigit() and val.zfill(2) or None) or None
-
     def ajax_row_payload(self, can_download, waiterstatus, user):
-        poster = self.poster
+        # Rows are rendered for every page of a listing so don't create
+        # missing posters here.
+        poster = self._poster
         tooltip_img = (
-            f"""data-bs-content="<img class='tooltip-img' src='{poster.image.url}' />\""""
+            f"""data-bs-content="<img class='tooltip-img' src='{poster.thumbnail_url}' />\""""
             if poster and poster.image
             else ""
         )
@@ -282,10 +322,18 @@ class MediaFile(TimeStampModel, ViewableObjectMixin):
                 link_html = f"""<center><a class='btn btn-info' name='download-btn' id={self.id} target=_blank rel="noopener noreferrer" onclick="openDownloadWindow('{self.id}')">Open</a></center>"""
             else:
                 link_html = "Alfred is down"
+        else:
+            link_html = ""
+
+        viewed = (
+            self._viewed
+            if hasattr(self, "_viewed")
+            else self.comments.filter(user=user, viewed=True).exists()
+        )
 
         cell = """<center>"""
 
-        if self.comments.filter(user=user, viewed=True).exists():
+        if viewed:
             cell = f"""{cell}<input class="viewed-checkbox" name="{self.id}" type="checkbox" checked onclick="ajaxTVCheckBox(['{self.id}'], false)" />"""
         else:
             cell = f"""{cell}<input class="viewed-checkbox" name="{self.id}" type="checkbox" onclick="ajaxTVCheckBox(['{self.id}'], false)" />"""
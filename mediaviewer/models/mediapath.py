@@ -1,15 +1,183 @@
 from pathlib import Path
 
 from django.db import models
+from django.utils import timezone
 
 from .core import TimeStampModel
 
 
+class MediaPathManager(models.Manager):
+    def bulk_ingest(self, media_class, entries):
+        """
+        Create or update many paths and their files at once.
+
+        entries is a list of dicts with a path, an optional tv or movie id
+        and a list of files, each with a filename and optional size and
+        display_name. Paths are upserted on _path and files are diffed
+        against what is already stored so unchanged rows are never written.
+
+        Returns created/updated/skipped counts for paths and files along with
+        any per path errors.
+        """
+        from mediaviewer.api.tokenpayloads import token_payloads
+        from mediaviewer.models import TV, MediaFile
+        from mediaviewer.views.counts import row_counts
+
+        media_field, other_field = (
+            ("tv", "movie") if media_class is TV else ("movie", "tv")
+        )
+        result = {
+            "paths": {"created": 0, "updated": 0, "skipped": 0},
+            "files": {"created": 0, "updated": 0, "skipped": 0},
+            "errors": [],
+        }
+
+        # A path repeated in one request is ingested once with its files
+        # merged, the last media id given winning.
+        merged = {}
+        for entry in entries:
+            if (seen := merged.get(entry["path"])) is None:
+                merged[entry["path"]] = {**entry, "files": list(entry.get("files", []))}
+            else:
+                seen["files"].extend(entry.get("files", []))
+                if entry.get(media_field) is not None:
+                    seen[media_field] = entry[media_field]
+        entries = list(merged.values())
+
+        existing = {
+            mp._path: mp
+            for mp in self.filter(_path__in=[entry["path"] for entry in entries])
+        }
+        media_ids = set(
+            media_class.objects.filter(
+                pk__in=[
+                    entry[media_field] for entry in entries if entry.get(media_field)
+                ]
+            ).values_list("pk", flat=True)
+        )
+
+        upserts = {}
+        media_paths = {}
+        # TVs whose episodes changed, including the ones paths moved away from
+        tv_ids = set()
+        for entry in entries:
+            path = entry["path"]
+            media_id = entry.get(media_field)
+            mp = existing.get(path)
+
+            if mp is not None and getattr(mp, f"{other_field}_id") is not None:
+                error = f"{path} does not belong to a {media_class.__name__}"
+            elif media_id is not None and media_id not in media_ids:
+                error = f"{media_class.__name__} {media_id} does not exist"
+            else:
+                error = None
+
+            if error:
+                result["errors"].append(error)
+                result["paths"]["skipped"] += 1
+            elif mp is None and media_id is None:
+                # Unknown media has to go through from_path to resolve its
+                # name and queue its poster.
+                media_class.objects.from_path(path)
+                media_paths[path] = self.get(_path=path)
+                result["paths"]["created"] += 1
+            elif mp is None or (
+                media_id is not None and getattr(mp, f"{media_field}_id") != media_id
+            ):
+                upserts[path] = self.model(
+                    _path=path, **{f"{media_field}_id": media_id}
+                )
+                if media_class is TV:
+                    tv_ids.add(media_id)
+                    if mp is not None:
+                        tv_ids.add(mp.tv_id)
+                result["paths"]["created" if mp is None else "updated"] += 1
+            else:
+                media_paths[path] = mp
+                result["paths"]["skipped"] += 1
+
+        if upserts:
+            for mp in self.bulk_create(
+                upserts.values(),
+                update_conflicts=True,
+                unique_fields=["_path"],
+                update_fields=[media_field, "date_edited"],
+            ):
+                media_paths[mp._path] = mp
+
+        files = {}
+        for entry in entries:
+            if mp := media_paths.get(entry["path"]):
+                for file_data in entry.get("files", []):
+                    files[(mp.pk, file_data["filename"])] = (mp, file_data)
+
+        existing_files = {
+            (mf.media_path_id, mf.filename): mf
+            for mf in MediaFile.objects.filter(media_path__in=media_paths.values())
+        }
+
+        new_files = []
+        changed_files = []
+        now = timezone.now()
+        for key, (mp, file_data) in files.items():
+            mf = existing_files.get(key)
+            if mf is None:
+                new_files.append(
+                    MediaFile(
+                        media_path=mp,
+                        filename=file_data["filename"],
+                        display_name=file_data.get("display_name", ""),
+                        size=file_data.get("size"),
+                    )
+                )
+                continue
+
+            changed = False
+            for field in ("size", "display_name"):
+                if field in file_data and getattr(mf, field) != file_data[field]:
+                    setattr(mf, field, file_data[field])
+                    changed = True
+
+            if changed:
+                # bulk_update does not apply auto_now
+                mf.date_edited = now
+                changed_files.append(mf)
+
+        MediaFile.objects.bulk_create(new_files)
+        MediaFile.objects.bulk_update(
+            changed_files, ["size", "display_name", "date_edited"]
+        )
+        # Bulk writes skip the signals that normally keep these up to date
+        MediaFile.objects.filter(
+            pk__in=[mf.pk for mf in new_files + changed_files]
+        ).refresh_search_vector()
+        tv_ids.update(mf.media_path.tv_id for mf in new_files)
+        tv_ids.discard(None)
+        if tv_ids:
+            TV.objects.filter(pk__in=tv_ids).refresh_episode_stats()
+
+        if upserts or new_files or changed_files:
+            row_counts.invalidate()
+            token_payloads.invalidate_media(
+                media_file_ids=[mf.pk for mf in changed_files], tv_ids=tv_ids
+            )
+
+        result["files"]["created"] = len(new_files)
+        result["files"]["updated"] = len(changed_files)
+        result["files"]["skipped"] = len(files) - len(new_files) - len(changed_files)
+        return result
+
+
 class MediaPath(TimeStampModel):
     _path = models.CharField(
         null=False, blank=True, max_length=256, unique=True, db_index=True
     )
     skip = models.BooleanField(null=False, blank=True, default=False)
+    # Directory mtime when scanmediafiles last listed it
+    scanned_mtime = models.DateTimeField(null=True, blank=True)
+    # Directory mtime when reconcilemediapaths last listed it
+    reconciled_mtime = models.DateTimeField(null=True, blank=True)
+    missing = models.BooleanField(null=False, blank=True, default=False)
     tv = models.ForeignKey(
         "mediaviewer.TV", null=True, on_delete=models.CASCADE, blank=True
     )
@@ -17,6 +185,8 @@ class MediaPath(TimeStampModel):
         "mediaviewer.Movie", null=True, on_delete=models.CASCADE, blank=True
     )
 
+    objects = MediaPathManager()
+
     def __str__(self):
         return f"<MediaPath {self.path}>"
 
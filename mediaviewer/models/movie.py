@@ -1,5 +1,6 @@
 import re
 
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
 from django.urls import reverse
 
@@ -71,6 +72,9 @@ class Movie(Media, ViewableObjectMixin):
 
     objects = MovieManager.from_queryset(MovieQuerySet)()
 
+    class Meta:
+        indexes = [GinIndex(fields=["search_vector"], name="movie_search")]
+
     @property
     def display_name(self):
         return self.name
@@ -97,9 +101,11 @@ class Movie(Media, ViewableObjectMixin):
         return self.url()
 
     def ajax_row_payload(self, can_download, waiterstatus, user):
-        poster = self.poster
+        # Rows are rendered for every page of a listing so don't create or
+        # populate missing posters here.
+        poster = self._poster
         tooltip_img = (
-            f"""data-bs-content="<img class='tooltip-img' src='{poster.image.url}' />\""""
+            f"""data-bs-content="<img class='tooltip-img' src='{poster.thumbnail_url}' />\""""
             if poster and poster.image
             else ""
         )
@@ -115,8 +121,14 @@ class Movie(Media, ViewableObjectMixin):
         else:
             link_html = ""
 
+        viewed = (
+            self._viewed
+            if hasattr(self, "_viewed")
+            else self.comments.filter(user=user, viewed=True).exists()
+        )
+
         cell = """<center>"""
-        if self.comments.filter(user=user, viewed=True).exists():
+        if viewed:
             cell = f"""{cell}<input class="viewed-checkbox" name="{self.id}" type="checkbox" checked onclick="ajaxMovieCheckBox(['{self.id}'])" />"""
         else:
             cell = f"""{cell}<input class="viewed-checkbox" name="{self.id}" type="checkbox" onclick="ajaxMovieCheckBox(['{self.id}'])" />"""
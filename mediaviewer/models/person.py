@@ -4,12 +4,16 @@ from django.db import models
 
 
 class PersonManager(models.Manager):
+    @staticmethod
+    def normalize_name(name):
+        # Remove anything appearing in parens
+        return re.sub(r"\s+\(.*\)", "", name).title()
+
     def create(self, *args, **kwargs):
         return self.get_or_create(*args, **kwargs)[0]
 
     def get_or_create(self, *args, **kwargs):
-        # Remove anything appearing in parens
-        kwargs["name"] = re.sub(r"\s+\(.*\)", "", kwargs["name"]).title()
+        kwargs["name"] = self.normalize_name(kwargs["name"])
 
         existing = self.filter(name=kwargs["name"]).first()
 
@@ -18,6 +22,35 @@ class PersonManager(models.Manager):
 
         return super().get_or_create(*args, **kwargs)
 
+    def bulk_get_or_create(self, people):
+        """
+        Batched version of get_or_create.
+
+        people is an iterable of field values, each including a name. The
+        matching objects are returned in the same order using one query to
+        find existing rows and one more to insert the missing ones.
+        """
+        people = [
+            {**values, "name": self.normalize_name(values["name"])} for values in people
+        ]
+
+        objs = {}
+        for obj in self.filter(name__in={values["name"] for values in people}).order_by(
+            "id"
+        ):
+            objs.setdefault(obj.name, obj)
+
+        new_objs = {}
+        for values in people:
+            if values["name"] not in objs and values["name"] not in new_objs:
+                new_objs[values["name"]] = self.model(**values)
+
+        if new_objs:
+            self.bulk_create(new_objs.values())
+            objs.update(new_objs)
+
+        return [objs[values["name"]] for values in people]
+
 
 class Person(models.Model):
     name = models.TextField(blank=False, null=False)
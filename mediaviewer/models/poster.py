@@ -2,26 +2,47 @@
 Re-implementation of PosterFile
 """
 
+import contextvars
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from datetime import date
-from io import BytesIO
+from pathlib import PurePosixPath
 
-import requests
 from django.conf import settings
 from django.contrib import admin
-from django.core.files.images import ImageFile
-from django.db import models
+from django.db import models, transaction
 
 from mediaviewer.log import log
+from mediaviewer.renditions import WEBP, create_renditions
+from mediaviewer.storage import get_poster_storage
 
 from .actor import Actor
 from .core import TimeStampModel
 from .director import Director
 from .genre import Genre
-from .tvdbconfiguration import getJSONData, getTVDBEpisodeInfo, tvdbConfig
+from .storedimage import StoredImage
+from .tvdbconfiguration import (
+    getImageResponse,
+    getJSONData,
+    getTVDBEpisodeInfo,
+    imageChunks,
+    imageContentLength,
+    tvdbConfig,
+)
 from .writer import Writer
 
 SENTINEL = object()
 
+_fetch_executor = ThreadPoolExecutor(
+    max_workers=settings.TMDB_FETCH_WORKERS, thread_name_prefix="tmdb-fetch"
+)
+
+
+def _submit(fn, *args, **kwargs):
+    # Run in a copy of the caller's context so flags such as a cache bypass
+    # follow the request onto the fetch pool.
+    context = contextvars.copy_context()
+    return _fetch_executor.submit(context.run, fn, *args, **kwargs)
+
 
 def _getDataFromIMDBBySearchString(searchString, is_movie=True):
     log.debug(f"Getting data from IMDB using {searchString}")
@@ -116,6 +137,50 @@ def _get_extended_info(tmdb_id, is_movie=True):
     return data
 
 
+def _get_episode_info(tmdb_id, season, episode):
+    if not tmdb_id:
+        return None
+    return getTVDBEpisodeInfo(tmdb_id, season, episode)
+
+
+def _get_episode_info_and_image_url(tmdb_id, season, episode, poster_url):
+    tvinfo = _get_episode_info(tmdb_id, season, episode)
+
+    if tvinfo:
+        poster_url = tvinfo.get("still_path") or tvinfo.get("poster_path") or poster_url
+
+    return tvinfo, poster_url
+
+
+def _download_image(poster_url, etag=None, stored_name=None):
+    """
+    Stream the image at poster_url straight into poster storage.
+
+    Returns (poster_name, name, etag) where name is the storage name of the
+    image and etag the one TMDB sent for it. When etag is given the request
+    is conditional and stored_name is returned with an etag of None if the
+    image is unchanged.
+    """
+    poster_name = poster_url.rpartition("/")[-1] if poster_url else None
+
+    if not poster_name:
+        return poster_name, None, None
+
+    with getImageResponse(poster_url, etag=etag) as r:
+        if r.status_code == 304:
+            return poster_name, stored_name, None
+
+        if r.status_code != 200:
+            return poster_name, None, None
+
+        name = get_poster_storage().save_stream(
+            imageChunks(r),
+            PurePosixPath(poster_name).suffix,
+            expected_size=imageContentLength(r),
+        )
+        return poster_name, name, r.headers.get("ETag", "")
+
+
 class PosterManager(models.Manager):
     def from_ref_obj(self, ref_obj, imdb="", tmdb="", genres=None):
         new_poster = ref_obj._poster or self.model()
@@ -123,12 +188,11 @@ class PosterManager(models.Manager):
         new_poster.tmdb = tmdb
         new_poster.save()
 
-        if genres:
-            for genre in genres:
-                new_poster.genres.add(genre)
-
         ref_obj._poster = new_poster
         ref_obj.save()
+
+        if genres:
+            new_poster.genres.add(*genres)
         return new_poster
 
 
@@ -146,7 +210,12 @@ class Poster(TimeStampModel):
     rating = models.CharField(blank=True, null=False, default="", max_length=32)
     tmdb = models.CharField(null=False, default="", blank=True, max_length=32)
     imdb = models.CharField(null=False, default="", blank=True, max_length=32)
-    image = models.ImageField(upload_to="uploads/%Y/%m/%d/", blank=True)
+    image = models.ImageField(
+        upload_to="uploads/%Y/%m/%d/", blank=True, storage=get_poster_storage
+    )
+    # Storage names of the downsized copies of image by size and format along
+    # with the name of the image they were made from
+    renditions = models.JSONField(default=dict, blank=True, editable=False)
     tagline = models.CharField(blank=True, null=False, default="", max_length=256)
     release_date = models.DateField(blank=True, null=True)
 
@@ -158,6 +227,50 @@ class Poster(TimeStampModel):
         else:
             return f"<Poster n:{self.short_name} s:{self.season} e:{self.episode} i:{bool(self.image)}>"
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+
+        if self.renditions.get("source") != (self.image.name or None):
+            self.refresh_renditions()
+
+    def refresh_renditions(self):
+        """Recreate the renditions of image if it changed since the last time."""
+        if not self.image:
+            self.renditions = {}
+        else:
+            try:
+                with self.image.open() as image_file:
+                    self.renditions = {
+                        "source": self.image.name,
+                        **create_renditions(image_file),
+                    }
+            except Exception as e:
+                log.warning(f"Could not create renditions for {self}")
+                log.warning(e)
+                return
+
+        # Avoid sending another post_save for the same change
+        Poster.objects.filter(pk=self.pk).update(renditions=self.renditions)
+
+    def rendition_url(self, size, fmt=WEBP):
+        """URL of the named rendition falling back to the original image."""
+        name = self.renditions.get(size, {}).get(fmt)
+        if name:
+            return self.image.storage.url(name)
+        return self.image.url if self.image else ""
+
+    @property
+    def thumbnail_url(self):
+        return self.rendition_url("thumbnail")
+
+    @property
+    def medium_url(self):
+        return self.rendition_url("medium")
+
+    @property
+    def full_url(self):
+        return self.rendition_url("full")
+
     def clear(self):
         self.imdb = ""
         self.tmdb = ""
@@ -317,65 +430,132 @@ class Poster(TimeStampModel):
         if not self.tmdb and "id" in data:
             self.tmdb = data["id"]
 
-        self._cast_and_crew()
-        self._store_extended_info()
-        self._store_plot(data)
-        self._store_genres(data)
-        self._store_rated(data)
+        fetched = self._fetch_tmdb_data(data, revalidate=clear)
+        # Finish every request before the transaction so no locks are held
+        # while waiting on the network
+        wait([future for future in fetched.values() if isinstance(future, Future)])
 
-        if not self.ref_obj.is_movie():
-            self._tmdb_episode_info()
-        else:
-            self._store_release_date(data)
+        with transaction.atomic():
+            self._store_fetched_data(data, fetched)
+            self.save()
 
+        return data
+
+    def _fetch_tmdb_data(self, data, revalidate=False):
+        """
+        Start every TMDB request this poster still needs.
+
+        Credits, extended info, episode info and the image download do not
+        depend on each other so they are run concurrently on the shared fetch
+        pool. Anything requiring the database is resolved here before
+        submitting so that the workers only ever touch the network. Stored
+        images are checked against TMDB when revalidate is set.
+
+        An episode still takes precedence over the show poster so for
+        episodes this waits on the episode info before starting the image
+        download.
+        """
+        is_movie = self.ref_obj.is_movie()
+        season = self.season
+        episode = self.episode
         poster_url = (
             getattr(self, "poster_url", None)
             or data.get("Poster")
             or data.get("poster_path")
         )
-        poster_name = poster_url.rpartition("/")[-1] if poster_url else None
-
-        if poster_name:
-            r = requests.get(
-                "{url}{poster_size}{path}".format(
-                    url=tvdbConfig.url,
-                    poster_size=tvdbConfig.poster_size,
-                    path=poster_url,
-                ),
-                stream=True,
-                timeout=settings.REQUEST_TIMEOUT,
+
+        fetched = {
+            "revalidate": revalidate,
+            "cast_and_crew": _submit(
+                _get_cast_data,
+                self.tmdb,
+                season=season,
+                episode=episode,
+                is_movie=is_movie,
+            ),
+            "extended_info": _submit(_get_extended_info, self.tmdb, is_movie=is_movie),
+        }
+
+        if not is_movie:
+            fetched["episode_info"] = _submit(
+                _get_episode_info_and_image_url, self.tmdb, season, episode, poster_url
             )
-            r.raise_for_status()
+            _, poster_url = fetched["episode_info"].result()
+
+        fetched["image_url"] = poster_url
+        fetched["image"] = self._fetch_image(poster_url, revalidate=revalidate)
+        return fetched
+
+    def _fetch_image(self, poster_url, revalidate=False):
+        """
+        Start downloading the image at poster_url unless it is already stored.
+
+        Returns a future of (poster_name, name, etag) as returned by
+        _download_image. A stored copy is reused without any request unless
+        revalidate is set, in which case it is only downloaded again if its
+        ETag changed.
+        """
+        stored = StoredImage.objects.lookup(poster_url)
+        if stored and self.image.storage.exists(stored.name):
+            if revalidate and stored.etag:
+                return _submit(
+                    _download_image,
+                    poster_url,
+                    etag=stored.etag,
+                    stored_name=stored.name,
+                )
 
-            io = BytesIO()
+            future = Future()
+            future.set_result((poster_url.rpartition("/")[-1], stored.name, None))
+            return future
 
-            if r.status_code == 200:
-                for chunk in r.iter_content(1024):
-                    io.write(chunk)
+        return _submit(_download_image, poster_url)
 
-                io.seek(0)
+    def _store_fetched_data(self, data, fetched):
+        self._store_cast_and_crew(fetched["cast_and_crew"].result())
 
-                image = ImageFile(io, name=poster_name)
-                self.image = image
+        try:
+            extended_info = fetched["extended_info"].result()
+        except Exception as e:
+            log.warning("Extended info not found")
+            log.warning(e)
         else:
-            self.image.delete()
+            self._store_extended_info(extended_info)
 
-        self.save()
+        self._store_plot(data)
+        self._store_genres(data)
+        self._store_rated(data)
 
-        return data
+        if not self.ref_obj.is_movie():
+            tvinfo, _ = fetched["episode_info"].result()
+            self._store_tmdb_episode_info(tvinfo)
+        else:
+            self._store_release_date(data)
 
-    def _tmdb_episode_info(self):
-        if not self.tmdb:
-            return None
+        poster_url = fetched["image_url"]
+        poster_name, image, etag = fetched["image"].result()
 
-        tvinfo = getTVDBEpisodeInfo(self.tmdb, self.season, self.episode)
+        if not poster_name:
+            self.image.delete()
+        elif not image:
+            return
+        elif etag is not None:
+            self.image = image
+            StoredImage.objects.update_or_create(
+                tmdb_path=poster_url, defaults={"name": image, "etag": etag}
+            )
+        elif StoredImage.objects.select_for_update().filter(name=image).exists():
+            # The stored copy was reused. Its lookup stays locked until this
+            # poster is saved so gcposterimages cannot purge it meanwhile.
+            self.image = image
+        else:
+            log.warning(f"{image} was purged before {self} could use it")
+
+    def _store_tmdb_episode_info(self, tvinfo):
+        if tvinfo is None:
+            return
 
         if tvinfo:
-            self.poster_url = (
-                tvinfo.get("still_path")
-                or tvinfo.get("poster_path")
-                or getattr(self, "poster_url", None)
-            )
             self.extendedplot = tvinfo.get("overview", "")
             self.episodename = tvinfo.get("name")
             self.tmdb = tvinfo.get("id", self.tmdb) or ""
@@ -405,16 +585,7 @@ class Poster(TimeStampModel):
         )
         self.plot = plot if plot and plot != "undefined" else ""
 
-    def _store_extended_info(self):
-        try:
-            extended_info = _get_extended_info(
-                self.tmdb, is_movie=self.ref_obj.is_movie()
-            )
-        except Exception as e:
-            log.warning("Extended info not found")
-            log.warning(e)
-            return
-
+    def _store_extended_info(self, extended_info):
         self._store_rating(extended_info)
         self._store_tagline(extended_info)
 
@@ -431,6 +602,7 @@ class Poster(TimeStampModel):
         self.rated = rated if rated and rated != "undefined" else ""
 
     def _store_genres(self, imdb_data):
+        genre_objs = []
         if imdb_data.get("results") or imdb_data.get("genre_ids"):
             genre_ids = (
                 imdb_data.get("genre_ids") or imdb_data["results"][0]["genre_ids"]
@@ -438,38 +610,41 @@ class Poster(TimeStampModel):
             for genre_id in genre_ids:
                 g = tvdbConfig.genres.get(genre_id)
                 if g:
-                    genre_obj = Genre.new(g)
-                    self.genres.add(genre_obj)
+                    genre_objs.append(Genre.new(g))
                 else:
                     log.warn("Genre for ID = {} not found".format(genre_id))
         elif imdb_data.get("genres"):
             for genre in imdb_data.get("genres"):
-                genre_obj = Genre.new(genre["name"])
-                self.genres.add(genre_obj)
+                genre_objs.append(Genre.new(genre["name"]))
 
-    def _cast_and_crew(self):
-        """Populate cast and crew info for this posterfile."""
-        cast_and_crew = _get_cast_data(
-            self.tmdb,
-            season=self.season,
-            episode=self.episode,
-            is_movie=self.ref_obj.is_movie(),
-        )
+        if genre_objs:
+            self.genres.add(*genre_objs)
 
+    def _store_cast_and_crew(self, cast_and_crew):
+        """Populate cast and crew info for this posterfile."""
         if cast_and_crew:
-            for actor in cast_and_crew["cast"]:
-                actor_obj = Actor.objects.create(
-                    name=actor["name"], order=actor.get("order")
+            self.actors.add(
+                *Actor.objects.bulk_get_or_create(
+                    {"name": actor["name"], "order": actor.get("order")}
+                    for actor in cast_and_crew["cast"]
                 )
-                self.actors.add(actor_obj)
-
-            for job in cast_and_crew["crew"]:
-                if job["job"] == "Writer":
-                    writer_obj = Writer.objects.create(name=job["name"])
-                    self.writers.add(writer_obj)
-                elif job["job"] == "Director":
-                    director_obj = Director.objects.create(name=job["name"])
-                    self.directors.add(director_obj)
+            )
+
+            self.writers.add(
+                *Writer.objects.bulk_get_or_create(
+                    {"name": job["name"]}
+                    for job in cast_and_crew["crew"]
+                    if job["job"] == "Writer"
+                )
+            )
+
+            self.directors.add(
+                *Director.objects.bulk_get_or_create(
+                    {"name": job["name"]}
+                    for job in cast_and_crew["crew"]
+                    if job["job"] == "Director"
+                )
+            )
 
     def _store_release_date(self, imdb_data):
         if release_date_str := imdb_data.get("release_date"):
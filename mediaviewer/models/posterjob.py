@@ -0,0 +1,139 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, models, transaction
+from django.utils import timezone
+
+from mediaviewer.log import log
+
+from .core import TimeStampModel
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+ACTIVE_STATUSES = (PENDING, RUNNING)
+
+
+class PosterJobQuerySet(models.QuerySet):
+    def active(self):
+        return self.filter(status__in=ACTIVE_STATUSES)
+
+    def ready(self):
+        return self.filter(status=PENDING, run_after__lte=timezone.now())
+
+
+class PosterJobManager(models.Manager):
+    def enqueue(self, poster, priority=0, clear=False):
+        """
+        Queue poster for population.
+
+        At most one pending or running job exists per poster. Enqueueing a
+        poster that already has one only raises that job's priority if needed.
+        """
+        try:
+            with transaction.atomic():
+                return self.create(poster=poster, priority=priority, clear=clear)
+        except IntegrityError:
+            self.active().filter(poster=poster, priority__lt=priority).update(
+                priority=priority
+            )
+            return self.active().filter(poster=poster).first()
+
+    def claim(self):
+        """
+        Mark the next ready job as running and return it.
+
+        Rows are locked with SKIP LOCKED so several workers can poll the
+        queue without handing out the same job twice.
+        """
+        with transaction.atomic():
+            job = (
+                self.ready()
+                .select_for_update(skip_locked=True)
+                .order_by("-priority", "run_after", "id")
+                .first()
+            )
+            if job is None:
+                return None
+
+            job.status = RUNNING
+            job.attempts += 1
+            job.save(update_fields=["status", "attempts", "date_edited"])
+        return job
+
+    def requeue_stale(self):
+        """Return jobs left running by a worker that went away to the queue."""
+        cutoff = timezone.now() - timedelta(seconds=settings.POSTER_JOB_TIMEOUT)
+        return self.filter(status=RUNNING, date_edited__lt=cutoff).update(
+            status=PENDING, run_after=timezone.now(), date_edited=timezone.now()
+        )
+
+
+class PosterJob(TimeStampModel):
+    STATUSES = (
+        (PENDING, "Pending"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    )
+
+    poster = models.ForeignKey(
+        "mediaviewer.Poster", on_delete=models.CASCADE, related_name="jobs"
+    )
+    status = models.CharField(
+        max_length=16, choices=STATUSES, default=PENDING, null=False, blank=True
+    )
+    priority = models.IntegerField(default=0, null=False)
+    clear = models.BooleanField(default=False, null=False)
+    attempts = models.PositiveSmallIntegerField(default=0, null=False)
+    run_after = models.DateTimeField(default=timezone.now, null=False)
+    last_error = models.TextField(blank=True, null=False, default="")
+
+    objects = PosterJobManager.from_queryset(PosterJobQuerySet)()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=("poster",),
+                condition=models.Q(status__in=ACTIVE_STATUSES),
+                name="unique_active_poster_job",
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=("-priority", "run_after", "id"),
+                condition=models.Q(status=PENDING),
+                name="poster_job_ready",
+            ),
+        ]
+
+    def __str__(self):
+        return f"<PosterJob p:{self.poster_id} s:{self.status} a:{self.attempts}>"
+
+    def run(self):
+        try:
+            if self.poster.ref_obj is None:
+                raise ValueError(f"Poster id={self.poster_id} is orphaned")
+
+            self.poster.populate_data(clear=self.clear)
+            self.poster.save()
+        except Exception as e:
+            log.warning(f"Failed to populate {self.poster}")
+            log.warning(e)
+            self.fail(e)
+        else:
+            self.status = DONE
+            self.last_error = ""
+            self.save()
+
+    def fail(self, error):
+        self.last_error = str(error)
+        if self.attempts >= settings.POSTER_JOB_MAX_ATTEMPTS:
+            self.status = FAILED
+        else:
+            self.status = PENDING
+            delay = settings.POSTER_JOB_RETRY_DELAY * 2 ** max(self.attempts - 1, 0)
+            self.run_after = timezone.now() + timedelta(seconds=delay)
+        self.save()
@@ -0,0 +1,98 @@
+import re
+
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connections, models
+from django.db.models import F, Func, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from mediaviewer.utils import get_search_query
+
+SEARCH_CONFIG = "simple"
+TERM_REGEX = re.compile(r"[^\W_]+")
+
+
+def _is_postgres(qs):
+    return connections[qs.db].vendor == "postgresql"
+
+
+def _words(expression):
+    # Punctuation is replaced so names like Foo.Bar.S01E02 are indexed as
+    # separate words instead of being parsed as a single host or file token.
+    return Func(
+        Coalesce(expression, Value("")),
+        Value(r"[\W_]+"),
+        Value(" "),
+        Value("g"),
+        function="regexp_replace",
+        output_field=models.TextField(),
+    )
+
+
+def _poster_names(poster_model, relation, name_field):
+    through = poster_model._meta.get_field(relation).remote_field.through
+    return Subquery(
+        through.objects.filter(poster=OuterRef("_poster"))
+        .values("poster")
+        .annotate(names=StringAgg(name_field, " "))
+        .values("names")[:1]
+    )
+
+
+def search_document(model, name_field):
+    """
+    Build the search vector for rows of model.
+
+    The name is weighted highest followed by the poster's plot and then its
+    actors and genres.
+    """
+    poster_model = model._meta.get_field("_poster").related_model
+    plot = Subquery(
+        poster_model.objects.filter(pk=OuterRef("_poster")).values("plot")[:1]
+    )
+    actors = _poster_names(poster_model, "actors", "actor__name")
+    genres = _poster_names(poster_model, "genres", "genre__genre")
+
+    return (
+        SearchVector(_words(F(name_field)), weight="A", config=SEARCH_CONFIG)
+        + SearchVector(_words(plot), weight="B", config=SEARCH_CONFIG)
+        + SearchVector(_words(actors), weight="C", config=SEARCH_CONFIG)
+        + SearchVector(_words(genres), weight="C", config=SEARCH_CONFIG)
+    )
+
+
+def refresh_search_vector(qs, name_field):
+    """Recompute the search vector of every row in qs."""
+    if not _is_postgres(qs):
+        return 0
+
+    return qs.update(search_vector=search_document(qs.model, name_field))
+
+
+def search_queryset(qs, search_str, name_field, rank=False):
+    """
+    Filter qs down to rows matching every word of search_str.
+
+    Each word is matched as a prefix so partially typed words still match.
+    Results are ordered by relevance when rank is True. Databases other than
+    Postgres fall back to icontains lookups against name_field.
+    """
+    terms = TERM_REGEX.findall(search_str or "")
+    if not terms:
+        return qs
+
+    if not _is_postgres(qs):
+        return qs.filter(get_search_query(search_str, [name_field]))
+
+    query = SearchQuery(
+        " & ".join(f"{term}:*" for term in terms),
+        search_type="raw",
+        config=SEARCH_CONFIG,
+    )
+    qs = qs.filter(search_vector=query)
+
+    if rank:
+        qs = qs.annotate(search_rank=SearchRank(F("search_vector"), query)).order_by(
+            "-search_rank", *qs.query.order_by
+        )
+    return qs
@@ -0,0 +1,26 @@
+from django.db import models
+
+from .core import TimeStampModel
+
+
+class StoredImageManager(models.Manager):
+    def lookup(self, tmdb_path):
+        """Return the StoredImage already holding the image at tmdb_path."""
+        if not tmdb_path:
+            return None
+
+        return self.filter(tmdb_path=tmdb_path).first()
+
+
+class StoredImage(TimeStampModel):
+    # TMDB file path such as /abc123.jpg
+    tmdb_path = models.CharField(null=False, max_length=256, unique=True)
+    # Name of the content addressed file in poster storage
+    name = models.CharField(null=False, max_length=256, db_index=True)
+    # ETag TMDB sent with the image, used to revalidate it
+    etag = models.CharField(null=False, blank=True, default="", max_length=256)
+
+    objects = StoredImageManager()
+
+    def __str__(self):
+        return f"<StoredImage {self.tmdb_path} -> {self.name}>"
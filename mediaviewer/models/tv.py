@@ -1,8 +1,19 @@
+import bisect
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
+from django.db.models import Count, F, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 
-from mediaviewer.models import Comment, MediaFile, MediaPath, Poster
+from mediaviewer.cacheversion import CacheVersion
+from mediaviewer.models import MediaFile, MediaPath, Poster
 
 from .media import Media, MediaManager, MediaQuerySet
+from .watchedcount import WatchedCount
 
 
 class TVQuerySet(MediaQuerySet):
@@ -12,6 +23,25 @@ class TVQuerySet(MediaQuerySet):
             poster.populate_data()
             poster.save()
 
+    def refresh_episode_stats(self):
+        episodes = (
+            MediaFile.objects.filter(media_path__tv=OuterRef("pk"), hide=False)
+            .values("media_path__tv")
+            .annotate(count=Count("pk"), latest=Max("date_created"))
+        )
+        return self.update(
+            episode_count=Coalesce(Subquery(episodes.values("count")), 0),
+            latest_episode_at=Subquery(episodes.values("latest")),
+        )
+
+    def with_unwatched(self, user):
+        watched = WatchedCount.objects.filter(user=user, tv=OuterRef("pk")).values(
+            "watched"
+        )[:1]
+        return self.annotate(
+            _number_unwatched=F("episode_count") - Coalesce(Subquery(watched), 0)
+        )
+
 
 class TVManager(MediaManager):
     def from_path(self, path, name=None, tv_id=None, movie_id=None):
@@ -44,10 +74,16 @@ class TV(Media):
         related_name="tv",
     )
 
+    # Number of episodes that are not hidden and when the newest of them was
+    # added. Kept up to date by signals
+    episode_count = models.PositiveIntegerField(null=False, default=0)
+    latest_episode_at = models.DateTimeField(null=True, blank=True, db_index=True)
+
     objects = TVManager.from_queryset(TVQuerySet)()
 
     class Meta:
         verbose_name_plural = "TV"
+        indexes = [GinIndex(fields=["search_vector"], name="tv_search")]
 
     def add_path(self, path):
         return MediaPath.objects.create(tv=self, _path=path)
@@ -66,32 +102,24 @@ class TV(Media):
 
     def episodes(self):
         base_qs = MediaFile.objects.filter(media_path__tv=self).filter(hide=False)
-        return base_qs.order_by("display_name")
+        return base_qs.order_by("display_name", "pk")
 
     def last_created_episode_at(self):
-        if not hasattr(self, "_last_created_episode_at"):
-            result = list(
-                self.episodes()
-                .order_by("-date_created")
-                .values_list("date_created", flat=True)
-            )
-            self._last_created_episode_at = result[0] if result else None
-        return self._last_created_episode_at
+        return self.latest_episode_at
 
     def number_of_unwatched_shows(self, user):
         if not user:
             return 0
 
-        episodes = list(
-            MediaFile.objects.filter(media_path__tv=self)
-            .filter(hide=False)
-            .values_list("id", flat=True)
+        if hasattr(self, "_number_unwatched"):
+            return self._number_unwatched
+
+        watched = (
+            self.watched_counts.filter(user=user)
+            .values_list("watched", flat=True)
+            .first()
         )
-        episodes_count = len(episodes)
-        viewed_count = Comment.objects.filter(
-            media_file__in=episodes, user=user, viewed=True
-        ).count()
-        return episodes_count - viewed_count
+        return self.episode_count - (watched or 0)
 
     def ajax_row_payload(self, user):
         unwatched_count = (
@@ -99,9 +127,11 @@ class TV(Media):
             if hasattr(self, "_number_unwatched")
             else self.number_of_unwatched_shows(user)
         )
-        poster = self.poster
+        # Rows are rendered for every page of a listing so don't create or
+        # populate missing posters here.
+        poster = self._poster
         tooltip_img = (
-            f"<img class='tooltip-img' src='{poster.image.url}' />"
+            f"<img class='tooltip-img' src='{poster.thumbnail_url}' />"
             if poster and poster.image
             else ""
         )
@@ -121,3 +151,96 @@ class TV(Media):
             timestamp_html,
         ]
         return payload
+
+
+class TVNameIndex:
+    """
+    In memory inverted index of TV names.
+
+    Names are lowercased and split on whitespace. A scraped word never
+    contains whitespace so it can only be found inside a single token of a
+    name. Every suffix of every token is kept in a sorted list, which turns
+    finding the tokens containing a word into a bisect for the suffixes it
+    starts. Saving or deleting a TV bumps a version shared with every other
+    process, which then rebuild their index. It is also rebuilt after
+    TV_NAME_INDEX_TTL seconds to catch writes that skip the signals.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = CacheVersion("tv_names")
+        self._names = None
+        self._tokens = defaultdict(set)
+        self._exact = defaultdict(set)
+        self._suffixes = []
+        self._expires = 0
+
+    def _ensure_loaded(self):
+        if (
+            not self._version.changed()
+            and self._names is not None
+            and time.monotonic() < self._expires
+        ):
+            return
+
+        self._names = {}
+        self._tokens = defaultdict(set)
+        self._exact = defaultdict(set)
+        for pk, name in TV.objects.values_list("pk", "name"):
+            name = name.lower()
+            self._names[pk] = name
+            self._exact[name].add(pk)
+            for token in name.split():
+                self._tokens[token].add(pk)
+        self._suffixes = sorted(
+            (token[i:], token) for token in self._tokens for i in range(len(token))
+        )
+        self._expires = time.monotonic() + settings.TV_NAME_INDEX_TTL
+
+    def _containing(self, word):
+        """Yield every token that word is a substring of."""
+        i = bisect.bisect_left(self._suffixes, (word,))
+        while i < len(self._suffixes) and self._suffixes[i][0].startswith(word):
+            yield self._suffixes[i][1]
+            i += 1
+
+    def update(self, tv):
+        with self._lock:
+            # Most saves leave the name alone and should not make every
+            # process rebuild
+            if self._names is not None and self._names.get(tv.pk) == tv.name.lower():
+                return
+            self._names = None
+            self._version.bump()
+
+    def invalidate(self):
+        with self._lock:
+            self._names = None
+            self._version.bump()
+
+    def best_match(self, words):
+        """
+        Return the pk of the TV whose name best matches words or None.
+
+        Every word found in a name scores a point and matching the whole name
+        scores five more. Ties go to the newest show.
+        """
+        scores = Counter()
+        with self._lock:
+            self._ensure_loaded()
+
+            for word in words:
+                matches = set()
+                for token in self._containing(word.lower()):
+                    matches |= self._tokens[token]
+                scores.update(matches)
+
+            for pk in self._exact.get(" ".join(words).lower(), ()):
+                scores[pk] += 5
+
+        if not scores:
+            return None
+        return max(scores, key=lambda pk: (scores[pk], pk))
+
+
+tv_name_index = TVNameIndex()
@@ -1,35 +1,45 @@
+import contextvars
 import os
-import time
+import threading
+from contextlib import contextmanager
 
-import requests
 from django.conf import settings
 
 from mediaviewer.log import log
+from mediaviewer.storage import stream_to_temp_file
+from mediaviewer.tmdb.cache import response_cache
+from mediaviewer.tmdb.ratelimit import parse_retry_after, rate_limiter
+from mediaviewer.tmdb.session import tmdb_session
 
 
-def getJSONData(url):
+def getJSONData(url, use_cache=True):
     try:
         url = url.replace(" ", "+")
+
+        if use_cache:
+            data = response_cache.get(url)
+            if data is not None:
+                log.debug("Using cached json for %s" % (url,))
+                return data
+
         log.info("Getting json from %s" % (url,))
-        resp = requests.get(url, timeout=settings.REQUEST_TIMEOUT)
-        try:
-            resp.raise_for_status()
-        except Exception:
-            time.sleep(1)
-            raise
+        for attempt in range(settings.TMDB_MAX_RETRIES + 1):
+            rate_limiter.acquire()
+            resp = tmdb_session.get(url)
+            if resp.status_code != 429 or attempt == settings.TMDB_MAX_RETRIES:
+                break
+
+            retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+            log.warning(
+                f"Rate limited by TMDB. Holding requests for {retry_after} seconds"
+            )
+            rate_limiter.block(retry_after)
+
+        resp.raise_for_status()
         data = resp.json()
         log.debug("Got %s" % (data,))
 
-        if "X-RateLimit-Remaining" in resp.headers:
-            remaining = int(resp.headers["X-RateLimit-Remaining"])
-            limit = int(resp.headers.get("X-RateLimit-Limit", "40"))
-
-            if remaining < 0.3 * limit:
-                log.warning(
-                    "90%% of the rate limit has been used. Sleeping for 1 second"
-                )
-                time.sleep(1)
-
+        response_cache.set(url, data)
         return data
     except Exception:
         raise
@@ -113,6 +123,69 @@ def searchTVDBByName(name):
     return getJSONData(url)
 
 
+_season_batch = contextvars.ContextVar("tmdb_season_batch", default=None)
+
+
+class SeasonBatch:
+    """
+    Memoized /tv/{id}/season/{n} responses.
+
+    The season response already lists every episode so while a batch is
+    active each season is requested once and its episodes are handed out
+    from memory.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._season_locks = {}
+        self._seasons = {}
+
+    def _get_season(self, tvdb_id, season):
+        key = (str(tvdb_id), int(season))
+        with self._lock:
+            season_lock = self._season_locks.setdefault(key, threading.Lock())
+
+        # Episodes of the same season are usually fetched concurrently so
+        # hold the other workers back until the first request completes.
+        with season_lock:
+            if key not in self._seasons:
+                url = f"https://api.themoviedb.org/3/tv/{tvdb_id}/season/{season}?api_key={settings.API_KEY}"
+                try:
+                    data = getJSONData(url)
+                except Exception as e:
+                    log.debug(e)
+                    data = {}
+
+                self._seasons[key] = {
+                    ep["episode_number"]: ep
+                    for ep in (data or {}).get("episodes", [])
+                    if "episode_number" in ep
+                }
+            return self._seasons[key]
+
+    def episode_info(self, tvdb_id, season, episode):
+        info = self._get_season(tvdb_id, season).get(int(episode))
+        return dict(info) if info else {}
+
+
+@contextmanager
+def batch_episode_info():
+    """
+    Serve getTVDBEpisodeInfo from whole season responses within the block.
+
+    Nested blocks share the outermost batch.
+    """
+    if _season_batch.get() is not None:
+        yield
+        return
+
+    token = _season_batch.set(SeasonBatch())
+    try:
+        yield
+    finally:
+        _season_batch.reset(token)
+
+
 def getTVDBEpisodeInfo(tvdb_id, season, episode):
     if not tvdbConfig.connected:
         log.debug(
@@ -124,6 +197,12 @@ def getTVDBEpisodeInfo(tvdb_id, season, episode):
         f"Getting tvdb episode info for {tvdb_id}, season: {season}, episode: {episode}"
     )
 
+    batch = _season_batch.get()
+    if batch is not None and episode and season:
+        resp = batch.episode_info(tvdb_id, season, episode)
+        if resp:
+            return resp
+
     urls = []
 
     if episode and season:
@@ -151,23 +230,59 @@ def getTVDBEpisodeInfo(tvdb_id, season, episode):
     return resp
 
 
+def getImageResponse(path, etag=None):
+    """
+    Start a streamed request for the TMDB image at path.
+
+    When etag is given the request is conditional and a 304 response means
+    the image is unchanged. The caller is responsible for closing the
+    response.
+    """
+    headers = {"If-None-Match": etag} if etag else {}
+    r = tmdb_session.get(
+        "{url}{poster_size}{path}".format(
+            url=tvdbConfig.url, poster_size=tvdbConfig.poster_size, path=path
+        ),
+        headers=headers,
+        stream=True,
+    )
+    try:
+        r.raise_for_status()
+    except Exception:
+        r.close()
+        raise
+    return r
+
+
+def imageChunks(r):
+    return r.iter_content(settings.IMAGE_DOWNLOAD_CHUNK_SIZE)
+
+
+def imageContentLength(r):
+    """Expected size of the body of r or None when it cannot be checked."""
+    # iter_content decodes compressed bodies so their length will not match
+    if r.headers.get("Content-Encoding"):
+        return None
+
+    try:
+        return int(r.headers["Content-Length"])
+    except (KeyError, ValueError):
+        return None
+
+
 def saveImageToDisk(path, imgName):
     log.debug("Getting image from %s" % (path,))
     if imgName:
         exists = os.path.isfile(settings.IMAGE_PATH + imgName)
         if not exists:
-            r = requests.get(
-                "{url}{poster_size}{path}".format(
-                    url=tvdbConfig.url, poster_size=tvdbConfig.poster_size, path=path
-                ),
-                stream=True,
-                timeout=settings.REQUEST_TIMEOUT,
-            )
-            r.raise_for_status()
-            if r.status_code == 200:
-                with open(settings.IMAGE_PATH + imgName, "wb") as f:
-                    for chunk in r.iter_content(1024):
-                        f.write(chunk)
+            with getImageResponse(path) as r:
+                if r.status_code == 200:
+                    temp_path, _ = stream_to_temp_file(
+                        imageChunks(r),
+                        settings.IMAGE_PATH,
+                        expected_size=imageContentLength(r),
+                    )
+                    os.replace(temp_path, settings.IMAGE_PATH + imgName)
         else:
             log.debug("File already exists. Skipping")
     else:
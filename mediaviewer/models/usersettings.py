@@ -175,7 +175,21 @@ class UserSettings(models.Model):
         return newUser
 
 
-setattr(User, "settings", lambda x: UserSettings.getSettings(x))
+def _user_settings(user):
+    # request.user is loaded fresh for every request so memoizing on the
+    # instance keeps a request from looking its settings up more than once
+    try:
+        return user._settings_cache
+    except AttributeError:
+        pass
+
+    user_settings = UserSettings.getSettings(user)
+    if user_settings is not None:
+        user._settings_cache = user_settings
+    return user_settings
+
+
+setattr(User, "settings", _user_settings)
 
 
 def case_insensitive_authenticate(request, username, password):
@@ -0,0 +1,73 @@
+from django.db import models, transaction
+from django.db.models import Count
+
+from .comment import Comment
+
+
+class WatchedCountManager(models.Manager):
+    def refresh(self, tv_ids, user_ids=None):
+        """
+        Recompute how many visible episodes of each TV in tv_ids users watched.
+
+        Only the counts of user_ids are touched when it is provided.
+        """
+        tv_ids = {tv_id for tv_id in tv_ids if tv_id is not None}
+        if not tv_ids:
+            return
+
+        existing = self.filter(tv__in=tv_ids)
+        comments = Comment.objects.filter(
+            viewed=True,
+            media_file__hide=False,
+            media_file__media_path__tv__in=tv_ids,
+        )
+        if user_ids is not None:
+            existing = existing.filter(user__in=user_ids)
+            comments = comments.filter(user__in=user_ids)
+
+        counts = [
+            self.model(
+                user_id=row["user"],
+                tv_id=row["media_file__media_path__tv"],
+                watched=row["watched"],
+            )
+            for row in comments.values("user", "media_file__media_path__tv").annotate(
+                watched=Count("pk")
+            )
+        ]
+
+        with transaction.atomic():
+            existing.delete()
+            self.bulk_create(
+                counts,
+                update_conflicts=True,
+                unique_fields=("user", "tv"),
+                update_fields=("watched",),
+            )
+
+
+class WatchedCount(models.Model):
+    user = models.ForeignKey(
+        "auth.User",
+        on_delete=models.CASCADE,
+        null=False,
+        blank=False,
+    )
+    tv = models.ForeignKey(
+        "mediaviewer.TV",
+        on_delete=models.CASCADE,
+        null=False,
+        blank=False,
+        related_name="watched_counts",
+    )
+    watched = models.PositiveIntegerField(null=False, default=0)
+
+    objects = WatchedCountManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=("user", "tv"), name="unique_user_tv"),
+        ]
+
+    def __str__(self):
+        return f"<WatchedCount u:{self.user_id} tv:{self.tv_id} w:{self.watched}>"
@@ -0,0 +1,71 @@
+import hashlib
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image
+
+WEBP = "webp"
+JPEG = "jpeg"
+
+FORMATS = {
+    WEBP: ("WEBP", "webp"),
+    JPEG: ("JPEG", "jpg"),
+}
+
+
+def _resize(image, width):
+    if image.width <= width:
+        return image
+
+    height = max(round(image.height * width / image.width), 1)
+    return image.resize((width, height), Image.Resampling.LANCZOS)
+
+
+def _store(data, extension):
+    # Renditions are named by their content so identical images share a file
+    digest = hashlib.sha256(data).hexdigest()
+    name = f"renditions/{digest[:2]}/{digest}.{extension}"
+    if not default_storage.exists(name):
+        name = default_storage.save(name, ContentFile(data))
+    return name
+
+
+def create_renditions(image_file):
+    """
+    Store every size in POSTER_RENDITIONS of image_file as WebP and JPEG.
+
+    Returns a dict mapping each size name to a dict of format to the storage
+    name of that rendition.
+    """
+    with Image.open(image_file) as source:
+        source = source.convert("RGB")
+
+        renditions = {}
+        for size, width in settings.POSTER_RENDITIONS.items():
+            image = _resize(source, width)
+            renditions[size] = {}
+            for fmt, (pil_format, extension) in FORMATS.items():
+                output = BytesIO()
+                image.save(
+                    output,
+                    format=pil_format,
+                    quality=settings.POSTER_RENDITION_QUALITY,
+                )
+                renditions[size][fmt] = _store(output.getvalue(), extension)
+    return renditions
+
+
+def create_renditions_from_storage(name):
+    """
+    Open the stored image name and create its renditions.
+
+    Used by worker processes which only ever touch storage so failures are
+    returned as a message instead of raised. Returns (renditions, error).
+    """
+    try:
+        with default_storage.open(name) as image_file:
+            return create_renditions(image_file), None
+    except Exception as e:
+        return None, str(e)
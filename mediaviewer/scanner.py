@@ -0,0 +1,156 @@
+import os
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from mediaviewer.log import log
+from mediaviewer.models import MediaFile
+
+DEFAULT_WORKERS = 8
+DEFAULT_BATCH_SIZE = 100
+
+CREATE = "create"
+HIDE = "hide"
+RESTORE = "restore"
+DELETE = "delete"
+
+# Returned as the mtime of directories that exist but could not be read. They
+# are treated like unchanged directories so nothing under them is touched.
+UNREADABLE = "unreadable"
+
+# media_file_id is None for CREATE and size is None for everything else
+Action = namedtuple(
+    "Action", ("kind", "media_path", "filename", "size", "media_file_id")
+)
+
+
+def _mtime(stat_result):
+    # Keep full microsecond precision so mtimes survive a database round trip
+    seconds, ns = divmod(stat_result.st_mtime_ns, 1_000_000_000)
+    return datetime.fromtimestamp(seconds, tz=timezone.utc).replace(
+        microsecond=ns // 1000
+    )
+
+
+def list_directory(path, last_mtime=None):
+    """
+    Stat the directory at path and the regular files directly inside it.
+
+    Returns the directory's mtime and a dict mapping each filename to its
+    (size, mtime). The directory is not listed and files is None when its
+    mtime still equals last_mtime. Both are None when the directory is gone.
+    Other errors, such as a permission error or a stale NFS handle, are
+    logged and UNREADABLE is returned as the mtime so one bad mount does not
+    abort the scan.
+    """
+    try:
+        mtime = _mtime(os.stat(path))
+    except (FileNotFoundError, NotADirectoryError):
+        return None, None
+    except OSError as e:
+        log.warning(f"Could not stat {path}: {e}")
+        return UNREADABLE, None
+
+    if last_mtime is not None and mtime == last_mtime:
+        return mtime, None
+
+    files = {}
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_file():
+                        stat_result = entry.stat()
+                        files[entry.name] = (stat_result.st_size, _mtime(stat_result))
+                except FileNotFoundError:
+                    # Removed while the directory was being listed
+                    continue
+    except (FileNotFoundError, NotADirectoryError):
+        return None, None
+    except OSError as e:
+        # Skipping a file that could not be stat'ed would mark it missing
+        log.warning(f"Could not list {path}: {e}")
+        return UNREADABLE, None
+    return mtime, files
+
+
+def scan_media_paths(
+    queryset,
+    workers=DEFAULT_WORKERS,
+    batch_size=DEFAULT_BATCH_SIZE,
+    force=False,
+    after=0,
+    mtime_field="scanned_mtime",
+):
+    """
+    Yield lists of (media_path, mtime, files) for every MediaPath in queryset.
+
+    Paths are loaded in pk order, batch_size at a time starting after the pk
+    after, and each batch is listed concurrently by workers threads so slow
+    network mounts are not stat'ed one directory at a time. Directories whose
+    mtime matches the one stored in mtime_field are not listed unless force
+    is set. Only one batch is held in memory at a time.
+    """
+    with ThreadPoolExecutor(
+        max_workers=max(workers, 1), thread_name_prefix="scanner"
+    ) as executor:
+        last_pk = after
+        while True:
+            batch = list(queryset.filter(pk__gt=last_pk).order_by("pk")[:batch_size])
+            if not batch:
+                return
+
+            listings = executor.map(
+                lambda mp: list_directory(
+                    mp._path, None if force else getattr(mp, mtime_field)
+                ),
+                batch,
+            )
+            yield [(mp, mtime, files) for mp, (mtime, files) in zip(batch, listings)]
+            last_pk = batch[-1].pk
+
+
+def reconcile_media_paths(queryset, delete_missing=False, **kwargs):
+    """
+    Yield (media_paths, actions) for each batch listed by scan_media_paths.
+
+    media_paths holds every (media_path, mtime, files) of the batch and
+    actions what it takes to make the stored MediaFiles match the disk. Files
+    missing from disk are hidden, or deleted when delete_missing is set, and
+    hidden files that come back are restored. The stored filenames of a whole
+    batch are loaded with a single query.
+
+    Directories that are gone, usually because a share is not mounted, are
+    left alone rather than treated as empty so their files are never hidden
+    or deleted.
+    """
+    kwargs.setdefault("mtime_field", "reconciled_mtime")
+    for batch in scan_media_paths(queryset, **kwargs):
+        listed = {mp.pk: (mp, files) for mp, mtime, files in batch if files is not None}
+
+        stored = {}
+        for pk, media_path_id, filename, hide, missing in MediaFile.objects.filter(
+            media_path__in=listed
+        ).values_list("pk", "media_path", "filename", "hide", "missing"):
+            stored.setdefault(media_path_id, {})[filename] = (pk, hide, missing)
+
+        actions = []
+        for pk, (mp, files) in listed.items():
+            existing = stored.get(pk, {})
+            for filename, (size, _) in files.items():
+                if filename not in existing:
+                    actions.append(Action(CREATE, mp, filename, size, None))
+                else:
+                    mf_id, hide, missing = existing[filename]
+                    if hide and missing:
+                        actions.append(Action(RESTORE, mp, filename, None, mf_id))
+
+            for filename, (mf_id, hide, missing) in existing.items():
+                if filename in files:
+                    continue
+                if delete_missing:
+                    actions.append(Action(DELETE, mp, filename, None, mf_id))
+                elif not (hide and missing):
+                    actions.append(Action(HIDE, mp, filename, None, mf_id))
+
+        yield batch, actions
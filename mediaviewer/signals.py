@@ -0,0 +1,215 @@
+import threading
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from mediaviewer.api.tokenpayloads import token_payloads
+from mediaviewer.models import (
+    TV,
+    Collection,
+    Comment,
+    DonationSite,
+    DownloadToken,
+    FilenameScrapeFormat,
+    GenreRanking,
+    MediaFile,
+    MediaPath,
+    Movie,
+    Poster,
+    UserSettings,
+    WaiterStatus,
+    WatchedCount,
+)
+from mediaviewer.models.filenamescrapeformat import scraper_engine
+from mediaviewer.models.tv import tv_name_index
+from mediaviewer.views.counts import row_counts
+from mediaviewer.views.sitecontext import site_context
+
+
+@receiver(post_save, sender=FilenameScrapeFormat)
+@receiver(post_delete, sender=FilenameScrapeFormat)
+def invalidate_scraper_engine(sender, **kwargs):
+    scraper_engine.invalidate()
+
+
+@receiver(post_save, sender=TV)
+def update_tv_name_index(sender, instance, **kwargs):
+    tv_name_index.update(instance)
+
+
+@receiver(post_delete, sender=TV)
+def invalidate_tv_name_index(sender, **kwargs):
+    tv_name_index.invalidate()
+
+
+@receiver(post_save, sender=TV)
+@receiver(post_delete, sender=TV)
+@receiver(post_save, sender=Movie)
+@receiver(post_delete, sender=Movie)
+@receiver(post_save, sender=MediaFile)
+@receiver(post_delete, sender=MediaFile)
+@receiver(m2m_changed, sender=Poster.genres.through)
+def invalidate_row_counts(sender, **kwargs):
+    row_counts.invalidate()
+
+
+@receiver(post_save, sender=TV)
+@receiver(post_save, sender=Movie)
+@receiver(post_save, sender=MediaFile)
+def refresh_search_vector(sender, instance, **kwargs):
+    sender.objects.filter(pk=instance.pk).refresh_search_vector()
+
+
+@receiver(post_save, sender=Poster)
+def refresh_poster_search_vectors(sender, instance, **kwargs):
+    # Posters are saved after populate_data stores their actors and genres
+    for model in (TV, Movie, MediaFile):
+        model.objects.filter(_poster=instance).refresh_search_vector()
+
+
+class _PendingGenreRankings(threading.local):
+    """
+    Genres whose rankings need recounting once the current transaction ends.
+
+    Populating a poster changes its genres several times and bulk deletes
+    send a signal per row, so changes are collected and every ranking is
+    recounted at most once per commit. None stands for every genre.
+    """
+
+    def __init__(self):
+        self.genre_ids = set()
+
+    def add(self, genre_ids):
+        if self.genre_ids is not None:
+            if genre_ids is None:
+                self.genre_ids = None
+            else:
+                self.genre_ids.update(genre_ids)
+
+        transaction.on_commit(self.flush)
+
+    def flush(self):
+        if self.genre_ids is not None and not self.genre_ids:
+            # Already recounted by an earlier callback of the same commit
+            return
+
+        genre_ids, self.genre_ids = self.genre_ids, set()
+        GenreRanking.objects.refresh(genre_ids)
+
+
+pending_genre_rankings = _PendingGenreRankings()
+
+
+@receiver(m2m_changed, sender=Poster.genres.through)
+def refresh_poster_genres(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse:
+        # Posters were added to or removed from a single genre
+        pending_genre_rankings.add([instance.pk])
+        return
+
+    if action == "pre_clear":
+        pending_genre_rankings.add(instance.genres.values_list("pk", flat=True))
+    elif action in ("post_add", "post_remove"):
+        pending_genre_rankings.add(pk_set)
+
+    if action.startswith("post_"):
+        refresh_poster_search_vectors(Poster, instance)
+
+
+@receiver(post_delete, sender=Poster)
+@receiver(post_delete, sender=TV)
+@receiver(post_delete, sender=Movie)
+def refresh_genre_rankings(sender, **kwargs):
+    pending_genre_rankings.add(None)
+
+
+@receiver(post_save, sender=MediaFile)
+def update_tv_counts(sender, instance, created, **kwargs):
+    stats = instance.stats_fields()
+    loaded = getattr(instance, "_loaded_stats", stats)
+    instance._loaded_stats = stats
+    if not created and loaded == stats:
+        return
+
+    tv_id = instance.media_path.tv_id
+    if tv_id is None:
+        return
+
+    TV.objects.filter(pk=tv_id).refresh_episode_stats()
+    if loaded["hide"] != stats["hide"]:
+        WatchedCount.objects.refresh([tv_id])
+
+
+@receiver(post_delete, sender=MediaFile)
+def update_tv_counts_on_delete(sender, instance, **kwargs):
+    tv_id = (
+        MediaPath.objects.filter(pk=instance.media_path_id)
+        .values_list("tv", flat=True)
+        .first()
+    )
+    if tv_id is None:
+        return
+
+    TV.objects.filter(pk=tv_id).refresh_episode_stats()
+    WatchedCount.objects.refresh([tv_id])
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def update_watched_count(sender, instance, **kwargs):
+    if instance.media_file_id is None:
+        return
+
+    tv_id = (
+        MediaFile.objects.filter(pk=instance.media_file_id)
+        .values_list("media_path__tv", flat=True)
+        .first()
+    )
+    WatchedCount.objects.refresh([tv_id], user_ids=[instance.user_id])
+
+
+@receiver(post_delete, sender=DownloadToken)
+def remove_token_payload(sender, instance, **kwargs):
+    token_payloads.invalidate([instance.guid])
+
+
+@receiver(post_save, sender=UserSettings)
+def invalidate_user_token_payloads(sender, instance, **kwargs):
+    token_payloads.invalidate_user(instance.user_id)
+
+
+@receiver(post_save, sender=MediaFile)
+def invalidate_media_file_token_payloads(sender, instance, **kwargs):
+    token_payloads.invalidate_media(media_file_ids=[instance.pk])
+
+
+@receiver(post_delete, sender=MediaFile)
+def invalidate_deleted_media_file_token_payloads(sender, instance, **kwargs):
+    # Tokens for the file itself are deleted along with it
+    tv_id = (
+        MediaPath.objects.filter(pk=instance.media_path_id)
+        .values_list("tv", flat=True)
+        .first()
+    )
+    if tv_id is not None:
+        token_payloads.invalidate_media(tv_ids=[tv_id])
+
+
+@receiver(post_save, sender=UserSettings)
+def update_user_settings_cache(sender, instance, **kwargs):
+    # Keep the settings memoized on an already loaded user current
+    if sender._meta.get_field("user").is_cached(instance):
+        instance.user._settings_cache = instance
+
+
+@receiver(post_save, sender=Collection)
+@receiver(post_delete, sender=Collection)
+@receiver(post_save, sender=DonationSite)
+@receiver(post_delete, sender=DonationSite)
+@receiver(post_save, sender=WaiterStatus)
+@receiver(post_delete, sender=TV)
+@receiver(post_delete, sender=Movie)
+@receiver(m2m_changed, sender=Poster.genres.through)
+def invalidate_site_context(sender, **kwargs):
+    site_context.invalidate()
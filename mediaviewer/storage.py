@@ -0,0 +1,134 @@
+import hashlib
+import os
+import tempfile
+from pathlib import PurePosixPath
+
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+
+IMAGE_DIR = "images"
+# Where images were stored under their upload name before IMAGE_DIR
+LEGACY_IMAGE_DIR = "uploads"
+
+
+def stream_to_temp_file(chunks, directory, expected_size=None):
+    """
+    Write chunks to a new temporary file in directory.
+
+    The file is created next to its final location so it can be moved into
+    place with an atomic rename. Returns the path of the temporary file and
+    the sha256 of its content. The file is removed and OSError raised when
+    fewer or more than expected_size bytes were written.
+    """
+    os.makedirs(directory, exist_ok=True)
+    sha256 = hashlib.sha256()
+    size = 0
+
+    fd, path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        # mkstemp only grants access to the owner
+        os.chmod(path, 0o644)
+        with os.fdopen(fd, "wb") as f:
+            for chunk in chunks:
+                sha256.update(chunk)
+                size += len(chunk)
+                f.write(chunk)
+
+        if expected_size is not None and size != expected_size:
+            raise OSError(f"Expected {expected_size} bytes but received {size}")
+    except BaseException:
+        os.unlink(path)
+        raise
+
+    return path, sha256.hexdigest()
+
+
+class PosterImageStorage(FileSystemStorage):
+    """
+    Store poster images under the sha256 of their content.
+
+    Episodes without a still share their show's poster so the same bytes are
+    saved many times. Naming files by content keeps a single copy of each
+    image on disk. Since several posters may then point at the same file
+    deleting an image leaves the file in place. purge removes files nothing
+    references anymore.
+    """
+
+    def __init__(self, *args, **kwargs):
+        # Concurrent writers of a name always write the same bytes
+        kwargs.setdefault("allow_overwrite", True)
+        super().__init__(*args, **kwargs)
+
+    def get_available_name(self, name, max_length=None):
+        return name
+
+    def _save(self, name, content):
+        sha256 = hashlib.sha256()
+        for chunk in content.chunks():
+            sha256.update(chunk)
+        digest = sha256.hexdigest()
+
+        name = f"{IMAGE_DIR}/{digest[:2]}/{digest}{PurePosixPath(name).suffix.lower()}"
+        if self.exists(name):
+            return name
+
+        content.seek(0)
+        return super()._save(name, content)
+
+    def save_stream(self, chunks, suffix, expected_size=None):
+        """
+        Store the bytes in chunks without holding them in memory.
+
+        They are written to a temporary file that is renamed to the content
+        addressed name once complete so readers never see a partial image.
+        Returns the storage name.
+        """
+        temp_path, digest = stream_to_temp_file(
+            chunks, self.path(IMAGE_DIR), expected_size=expected_size
+        )
+
+        name = f"{IMAGE_DIR}/{digest[:2]}/{digest}{suffix.lower()}"
+        path = self.path(name)
+        if os.path.exists(path):
+            os.unlink(temp_path)
+            return name
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if self.file_permissions_mode is not None:
+            os.chmod(temp_path, self.file_permissions_mode)
+        os.replace(temp_path, path)
+        return name
+
+    def delete(self, name):
+        # Other posters may share the file and other workers may be about to
+        # reuse it through its StoredImage. Unreferenced files, including
+        # those left in LEGACY_IMAGE_DIR, are purged by the gcposterimages
+        # command instead.
+        pass
+
+    def purge(self, name):
+        """
+        Delete name and its StoredImage lookups unless a poster uses it.
+
+        The lookups are locked while checking so a poster reusing the file
+        either commits first and keeps it alive or finds it gone. Returns
+        whether the file was deleted.
+        """
+        from mediaviewer.models import Poster, StoredImage
+
+        with transaction.atomic():
+            lookups = StoredImage.objects.select_for_update().filter(name=name)
+            list(lookups)
+            if Poster.objects.filter(image=name).exists():
+                return False
+
+            super().delete(name)
+            lookups.delete()
+        return True
+
+
+poster_storage = PosterImageStorage()
+
+
+def get_poster_storage():
+    return poster_storage
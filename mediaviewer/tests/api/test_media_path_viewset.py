@@ -1,6 +1,8 @@
 import pytest
 from django.urls import reverse
 
+from mediaviewer.models import TV, MediaFile, MediaPath
+
 
 @pytest.mark.django_db
 @pytest.mark.parametrize("is_staff", (True, False))
@@ -43,3 +45,199 @@ class TestMediaPath:
         else:
             assert json_data["tv"] is None
             assert json_data["movie"] == ref_media.pk
+
+
+@pytest.mark.django_db
+class TestBulk:
+    @pytest.fixture(autouse=True)
+    def setUp(self, client, create_tv, create_movie, create_user, create_tv_media_file):
+        self.client = client
+        self.user = create_user(is_staff=True)
+        self.client.force_login(self.user)
+
+        self.tv = create_tv()
+        self.movie = create_movie()
+        self.mf = create_tv_media_file(tv=self.tv, filename="existing.mkv")
+        self.mf.size = 100
+        self.mf.save()
+
+        self.url = reverse("mediaviewer:api:tvmediapath-bulk")
+
+    def _post(self, payload, url=None):
+        return self.client.post(
+            url or self.url, data=payload, content_type="application/json"
+        )
+
+    def test_non_staff(self, create_user):
+        self.client.force_login(create_user(is_staff=False))
+
+        response = self._post([])
+
+        assert response.status_code == 403
+
+    def test_invalid(self):
+        response = self._post([{"files": []}])
+
+        assert response.status_code == 400
+
+    def test_existing_path(self):
+        response = self._post(
+            [
+                {
+                    "path": str(self.tv.media_path.path),
+                    "files": [
+                        {"filename": "existing.mkv", "size": 100},
+                        {"filename": "new.mkv", "size": 200},
+                    ],
+                }
+            ]
+        )
+
+        assert response.status_code == 200
+        assert response.json() == {
+            "paths": {"created": 0, "updated": 0, "skipped": 1},
+            "files": {"created": 1, "updated": 0, "skipped": 1},
+            "errors": [],
+        }
+        new_mf = MediaFile.objects.get(filename="new.mkv")
+        assert new_mf.media_path == self.tv.media_path
+        assert new_mf.size == 200
+
+    def test_updated_file(self):
+        response = self._post(
+            [
+                {
+                    "path": str(self.tv.media_path.path),
+                    "files": [{"filename": "existing.mkv", "size": 150}],
+                }
+            ]
+        )
+
+        assert response.json()["files"] == {"created": 0, "updated": 1, "skipped": 0}
+        self.mf.refresh_from_db()
+        assert self.mf.size == 150
+
+    def test_new_path_for_existing_tv(self):
+        response = self._post(
+            [
+                {
+                    "path": "/path/to/season 2",
+                    "tv": self.tv.pk,
+                    "files": [{"filename": "s02e01.mkv"}],
+                }
+            ]
+        )
+
+        assert response.json()["paths"] == {"created": 1, "updated": 0, "skipped": 0}
+        mp = MediaPath.objects.get(_path="/path/to/season 2")
+        assert mp.tv == self.tv
+        assert list(mp.mediafile_set.values_list("filename", flat=True)) == [
+            "s02e01.mkv"
+        ]
+
+    def test_new_path_for_new_tv(self, mocker):
+        mocker.patch("mediaviewer.models.poster.Poster.populate_data")
+
+        response = self._post(
+            [{"path": "/path/to/Some.Show", "files": [{"filename": "s01e01.mkv"}]}]
+        )
+
+        assert response.json()["paths"]["created"] == 1
+        mp = MediaPath.objects.get(_path="/path/to/Some.Show")
+        assert mp.tv is not None
+        assert mp.mediafile_set.count() == 1
+
+    def test_repeated_new_path(self, mocker):
+        mocker.patch("mediaviewer.models.poster.Poster.populate_data")
+        mock_from_path = mocker.spy(TV.objects, "from_path")
+
+        response = self._post(
+            [
+                {"path": "/path/to/Some.Show", "files": [{"filename": "s01e01.mkv"}]},
+                {"path": "/path/to/Some.Show", "files": [{"filename": "s01e02.mkv"}]},
+            ]
+        )
+
+        assert response.json()["paths"] == {"created": 1, "updated": 0, "skipped": 0}
+        assert response.json()["files"]["created"] == 2
+        mock_from_path.assert_called_once_with("/path/to/Some.Show")
+        mp = MediaPath.objects.get(_path="/path/to/Some.Show")
+        assert set(mp.mediafile_set.values_list("filename", flat=True)) == {
+            "s01e01.mkv",
+            "s01e02.mkv",
+        }
+
+    def test_moved_path(self, create_tv):
+        other_tv = create_tv()
+        path = str(self.tv.media_path.path)
+
+        response = self._post([{"path": path, "tv": other_tv.pk}])
+
+        assert response.json()["paths"] == {"created": 0, "updated": 1, "skipped": 0}
+        assert MediaPath.objects.get(_path=path).tv == other_tv
+        self.tv.refresh_from_db()
+        other_tv.refresh_from_db()
+        assert self.tv.episode_count == 0
+        assert other_tv.episode_count == 1
+
+    def test_caches_invalidated(self, mocker):
+        mock_row_counts = mocker.patch("mediaviewer.views.counts.row_counts")
+        mock_token_payloads = mocker.patch(
+            "mediaviewer.api.tokenpayloads.token_payloads"
+        )
+
+        self._post(
+            [
+                {
+                    "path": str(self.tv.media_path.path),
+                    "files": [{"filename": "new.mkv"}],
+                }
+            ]
+        )
+
+        assert mock_row_counts.invalidate.called
+        mock_token_payloads.invalidate_media.assert_called_once_with(
+            media_file_ids=[], tv_ids={self.tv.pk}
+        )
+
+    def test_errors(self):
+        response = self._post(
+            [
+                {"path": str(self.movie.media_path.path)},
+                {"path": "/path/to/missing", "tv": 0},
+            ]
+        )
+
+        json_data = response.json()
+        assert json_data["paths"] == {"created": 0, "updated": 0, "skipped": 2}
+        assert len(json_data["errors"]) == 2
+        assert not MediaPath.objects.filter(_path="/path/to/missing").exists()
+
+    def test_movie(self):
+        response = self._post(
+            [
+                {
+                    "path": str(self.movie.media_path.path),
+                    "files": [{"filename": "movie.mkv", "size": 1}],
+                }
+            ],
+            url=reverse("mediaviewer:api:moviemediapath-bulk"),
+        )
+
+        assert response.json()["files"]["created"] == 1
+        assert self.movie.media_path.mediafile_set.get().filename == "movie.mkv"
+
+    def test_query_count(self, django_assert_max_num_queries):
+        payload = [
+            {
+                "path": f"/path/to/season {i}",
+                "tv": self.tv.pk,
+                "files": [{"filename": f"s{i:02}e{j:02}.mkv"} for j in range(20)],
+            }
+            for i in range(10)
+        ]
+
+        with django_assert_max_num_queries(15):
+            response = self._post(payload)
+
+        assert response.json()["files"]["created"] == 200
@@ -1,6 +1,7 @@
 import pytest
 from django.urls import reverse
 
+from mediaviewer.api.tokenpayloads import token_payloads
 from mediaviewer.models.downloadtoken import DownloadToken
 
 
@@ -41,3 +42,81 @@ class TestDownloadToken:
             assert dt.ref_obj.full_name == json_data["displayname"]
         else:
             assert response.status_code == 403
+
+
+@pytest.mark.django_db
+class TestDownloadTokenPayload:
+    @pytest.fixture(autouse=True)
+    def setUp(self, client, create_user, create_tv, create_tv_media_file):
+        self.user = create_user(is_staff=True)
+        client.force_login(self.user)
+        self.client = client
+
+        self.tv = create_tv()
+        self.mfs = [create_tv_media_file(tv=self.tv) for i in range(3)]
+        self.dt = DownloadToken.objects.from_media_file(self.user, self.mfs[1])
+        self.url = reverse("mediaviewer:api:downloadtoken-detail", args=[self.dt.guid])
+
+    def test_payload(self):
+        json_data = self.client.get(self.url).json()
+
+        assert json_data["tv_id"] == self.tv.id
+        assert json_data["next_id"] == self.mfs[2].id
+        assert json_data["previous_id"] == self.mfs[0].id
+        assert json_data["binge_mode"] == self.user.settings().binge_mode
+        assert json_data["isvalid"]
+
+    def test_num_queries(self, django_assert_num_queries):
+        # 5 session and auth queries plus token, next, previous, progress and
+        # donation site
+        with django_assert_num_queries(10):
+            self.client.get(self.url)
+
+    def test_cached(self, django_assert_num_queries):
+        expected = self.client.get(self.url).json()
+
+        # Only progress and donation site are looked up again
+        with django_assert_num_queries(7):
+            assert self.client.get(self.url).json() == expected
+
+    def test_invalidated_by_settings(self):
+        self.client.get(self.url)
+
+        user_settings = self.user.settings()
+        user_settings.binge_mode = not user_settings.binge_mode
+        user_settings.save()
+
+        json_data = self.client.get(self.url).json()
+        assert json_data["binge_mode"] == user_settings.binge_mode
+
+    def test_deleted_token(self):
+        self.client.get(self.url)
+
+        self.dt.delete()
+
+        assert self.client.get(self.url).status_code == 404
+
+    def test_invalidated_by_episode(self, create_tv_media_file):
+        other_dt = DownloadToken.objects.from_media_file(
+            self.user, create_tv_media_file()
+        )
+        self.client.get(self.url)
+        self.client.get(
+            reverse("mediaviewer:api:downloadtoken-detail", args=[other_dt.guid])
+        )
+
+        self.mfs[2].display_name = "aaa"
+        self.mfs[2].save()
+
+        json_data = self.client.get(self.url).json()
+        assert json_data["next_id"] is None
+        # Tokens of other shows are kept
+        assert token_payloads.get(other_dt.guid) is not None
+
+    def test_cached_before_commit(self, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            self.dt.delete()
+            # Another process reading the token before the delete commits
+            token_payloads.set(self.dt.guid, self.dt, {"guid": self.dt.guid})
+
+        assert token_payloads.get(self.dt.guid) is None
@@ -0,0 +1,110 @@
+import os
+import time
+from io import BytesIO, StringIO
+
+import pytest
+from django.core.files.images import ImageFile
+from django.core.management import call_command
+from PIL import Image
+
+from mediaviewer.models import Poster, StoredImage
+
+
+@pytest.mark.django_db
+class TestCommand:
+    @pytest.fixture(autouse=True)
+    def setUp(self, settings, tmp_path, create_movie):
+        settings.MEDIA_ROOT = tmp_path
+        self.tmp_path = tmp_path
+
+        self.poster = Poster.objects.from_ref_obj(create_movie())
+        self.poster.image = self._image("red")
+        self.poster.save()
+        self.kept = self._files()
+
+        self.poster.image = self._image("blue")
+        self.poster.save()
+        self.poster.refresh_from_db()
+        StoredImage.objects.create(tmdb_path="/old.jpg", name=self.kept[0])
+
+        # Pretend every file was written long ago
+        old = time.time() - 60 * 60 * 48
+        for path in self.tmp_path.rglob("*"):
+            os.utime(path, (old, old))
+
+        self.out = StringIO()
+
+    @staticmethod
+    def _image(color):
+        output = BytesIO()
+        Image.new("RGB", (200, 300), color).save(output, format="JPEG")
+        output.seek(0)
+        return ImageFile(output, name="poster.jpg")
+
+    def _files(self):
+        return sorted(
+            str(path.relative_to(self.tmp_path))
+            for path in self.tmp_path.rglob("*")
+            if path.is_file()
+        )
+
+    def _referenced(self):
+        # Images narrower than every size share their renditions
+        return sorted(
+            {self.poster.image.name}
+            | {
+                name
+                for size, names in self.poster.renditions.items()
+                if size != "source"
+                for name in names.values()
+            }
+        )
+
+    def test_removes_unreferenced(self):
+        call_command("gcposterimages", stdout=self.out)
+
+        assert self._files() == self._referenced()
+        assert not StoredImage.objects.exists()
+        assert "Removed 1 poster images" in self.out.getvalue()
+
+    def test_dry_run(self):
+        files = self._files()
+
+        call_command("gcposterimages", "--dry-run", stdout=self.out)
+
+        assert self._files() == files
+        assert "Removed 1 poster images" in self.out.getvalue()
+
+    def test_min_age(self):
+        files = self._files()
+
+        call_command("gcposterimages", "--min-age", "72", stdout=self.out)
+
+        assert self._files() == files
+
+    def test_legacy_uploads(self, create_movie):
+        old = time.time() - 60 * 60 * 48
+        posters = []
+        for filename in ("kept.jpg", "cleared.jpg"):
+            name = f"uploads/2023/09/29/{filename}"
+            path = self.tmp_path / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(b"legacy")
+            os.utime(path, (old, old))
+
+            poster = Poster.objects.from_ref_obj(create_movie())
+            Poster.objects.filter(pk=poster.pk).update(image=name)
+            poster.refresh_from_db()
+            posters.append(poster)
+
+        # Clearing only drops the reference, the file is left for collection
+        posters[1].clear()
+        posters[1].save()
+        assert (self.tmp_path / "uploads/2023/09/29/cleared.jpg").exists()
+
+        call_command("gcposterimages", stdout=self.out)
+
+        assert self._files() == sorted(
+            self._referenced() + ["uploads/2023/09/29/kept.jpg"]
+        )
+        assert "Removed 2 poster images" in self.out.getvalue()
@@ -0,0 +1,125 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from mediaviewer.models import Poster
+
+
+@pytest.mark.django_db
+class TestCommand:
+    @pytest.fixture(autouse=True)
+    def setUp(self, mocker, create_movie, tmp_path):
+        self.command_name = "generateposters"
+        self.mock_populate_data = mocker.patch(
+            "mediaviewer.models.poster.Poster.populate_data", autospec=True
+        )
+
+        self.movies = [create_movie() for _ in range(5)]
+        self.posters = [Poster.objects.from_ref_obj(movie) for movie in self.movies]
+
+        self.cursor_file = tmp_path / "cursor.json"
+        self.out = StringIO()
+
+    def _call(self, *args):
+        call_command(
+            self.command_name,
+            "--cursor-file",
+            str(self.cursor_file),
+            *args,
+            stdout=self.out,
+        )
+        return self.out.getvalue()
+
+    def _populated(self):
+        return [call.args[0].pk for call in self.mock_populate_data.call_args_list]
+
+    def test_newest_first(self):
+        output = self._call()
+
+        assert self._populated() == [poster.pk for poster in reversed(self.posters)]
+        assert "Processed 5 posters" in output
+        assert not self.cursor_file.exists()
+
+    def test_limit(self):
+        self._call("--limit", "2", "--batch-size", "1")
+
+        assert self._populated() == [self.posters[4].pk, self.posters[3].pk]
+        assert json.loads(self.cursor_file.read_text())["id"] == self.posters[3].pk
+
+    def test_resume(self):
+        self._call("--limit", "2")
+        self.mock_populate_data.reset_mock()
+
+        output = self._call("--limit", "10", "--batch-size", "2", "--resume")
+
+        assert f"Resuming after poster id={self.posters[3].pk}" in output
+        assert self._populated() == [poster.pk for poster in self.posters[2::-1]]
+        assert not self.cursor_file.exists()
+
+    def test_orphan(self):
+        orphan = Poster.objects.create()
+
+        self._call()
+
+        assert not Poster.objects.filter(pk=orphan.pk).exists()
+        assert len(self._populated()) == 5
+
+    def test_error(self):
+        self.mock_populate_data.side_effect = Exception("Failed")
+
+        output = self._call("--batch-size", "2")
+
+        assert len(self._populated()) == 5
+        assert "Processed 5 posters" in output
+
+    def test_force_without_data(self):
+        self.mock_populate_data.return_value = None
+        Poster.objects.update(imdb="tt1234", tmdb="1234")
+
+        self._call("--force")
+
+        assert set(Poster.objects.values_list("imdb", "tmdb")) == {("", "")}
+
+    def test_http_stats_for_run(self, mocker):
+        mocker.patch(
+            "mediaviewer.management.commands.generateposters.tmdb_session.stats",
+            side_effect=[
+                {"requests": 10, "new_connections": 2, "reused_connections": 8},
+                {"requests": 13, "new_connections": 3, "reused_connections": 10},
+            ],
+        )
+
+        output = self._call()
+
+        assert "HTTP requests: 3 new connections: 1 reused connections: 2" in output
+
+
+@pytest.mark.django_db(transaction=True)
+class TestWorkers:
+    @pytest.fixture(autouse=True)
+    def setUp(self, mocker, create_movie, tmp_path):
+        self.mock_populate_data = mocker.patch(
+            "mediaviewer.models.poster.Poster.populate_data", autospec=True
+        )
+
+        self.movies = [create_movie() for _ in range(4)]
+        self.posters = [Poster.objects.from_ref_obj(movie) for movie in self.movies]
+        self.cursor_file = tmp_path / "cursor.json"
+
+    def test_workers(self):
+        out = StringIO()
+        call_command(
+            "generateposters",
+            "--workers",
+            "3",
+            "--cursor-file",
+            str(self.cursor_file),
+            stdout=out,
+        )
+
+        assert sorted(
+            call.args[0].pk for call in self.mock_populate_data.call_args_list
+        ) == sorted(poster.pk for poster in self.posters)
+        assert "Processed 4 posters" in out.getvalue()
@@ -0,0 +1,108 @@
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO, StringIO
+
+import pytest
+from django.core.files.images import ImageFile
+from django.core.management import call_command
+from PIL import Image
+
+from mediaviewer.models import Poster
+
+
+@pytest.mark.django_db
+class TestCommand:
+    @pytest.fixture(autouse=True)
+    def setUp(self, settings, tmp_path, create_movie):
+        settings.MEDIA_ROOT = tmp_path
+
+        self.posters = []
+        for color in ("red", "green", "blue"):
+            poster = Poster.objects.from_ref_obj(create_movie())
+            poster.image = self._image(color)
+            poster.save()
+            self.posters.append(poster)
+        Poster.objects.update(renditions={})
+
+        self.out = StringIO()
+
+    @staticmethod
+    def _image(color):
+        output = BytesIO()
+        Image.new("RGB", (500, 750), color).save(output, format="JPEG")
+        output.seek(0)
+        return ImageFile(output, name="poster.jpg")
+
+    def _call(self, *args):
+        call_command("generaterenditions", "--workers", "1", *args, stdout=self.out)
+        return self.out.getvalue()
+
+    def _renditions(self):
+        return {
+            poster.pk: poster.renditions
+            for poster in Poster.objects.filter(
+                pk__in=[poster.pk for poster in self.posters]
+            )
+        }
+
+    def test_created(self):
+        output = self._call("--batch-size", "2")
+
+        assert "Created renditions for 3 posters (0 failed)" in output
+        for poster in self.posters:
+            renditions = self._renditions()[poster.pk]
+            assert renditions["source"] == poster.image.name
+            assert set(renditions) == {"source", "thumbnail", "medium", "full"}
+
+    def test_concurrent(self, mocker):
+        # Spawned processes would not see the test database or settings
+        mocker.patch(
+            "mediaviewer.management.commands.generaterenditions.ProcessPoolExecutor",
+            lambda max_workers, mp_context: ThreadPoolExecutor(max_workers),
+        )
+
+        call_command("generaterenditions", "--workers", "2", stdout=self.out)
+
+        assert "Created renditions for 3 posters (0 failed)" in self.out.getvalue()
+        assert all(renditions for renditions in self._renditions().values())
+
+    def test_failed(self, mocker):
+        mocker.patch(
+            "mediaviewer.management.commands.generaterenditions"
+            ".create_renditions_from_storage",
+            side_effect=[({"thumbnail": {}}, None), (None, "bad image"), (None, "")],
+        )
+
+        output = self._call()
+
+        assert "Created renditions for 1 posters (2 failed)" in output
+        renditions = self._renditions()
+        assert renditions[self.posters[0].pk]["source"] == self.posters[0].image.name
+        assert renditions[self.posters[1].pk] == {}
+        assert renditions[self.posters[2].pk] == {}
+
+    def test_skips_existing(self, mocker):
+        self._call()
+        mock_create = mocker.patch(
+            "mediaviewer.management.commands.generaterenditions"
+            ".create_renditions_from_storage",
+        )
+
+        output = self._call()
+
+        assert "Created renditions for 0 posters (0 failed)" in output
+        mock_create.assert_not_called()
+
+    def test_force(self, mocker):
+        self._call()
+        mock_create = mocker.patch(
+            "mediaviewer.management.commands.generaterenditions"
+            ".create_renditions_from_storage",
+            return_value=({"thumbnail": {"webp": "forced.webp"}}, None),
+        )
+
+        output = self._call("--force")
+
+        assert "Created renditions for 3 posters (0 failed)" in output
+        assert mock_create.call_count == 3
+        for renditions in self._renditions().values():
+            assert renditions["thumbnail"] == {"webp": "forced.webp"}
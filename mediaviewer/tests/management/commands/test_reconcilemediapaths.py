@@ -0,0 +1,144 @@
+import shutil
+from io import StringIO
+from pathlib import Path
+
+import pytest
+from django.core.management import call_command
+
+from mediaviewer.models import MediaFile, MediaPath
+
+
+@pytest.mark.django_db
+class TestCommand:
+    @pytest.fixture(autouse=True)
+    def setUp(self, create_tv, create_tv_media_file, tmp_path):
+        self.tv = create_tv()
+        self.media_path = self.tv.mediapath_set.get()
+        self.path = Path(self.media_path._path)
+        self.path.mkdir(parents=True)
+
+        self.mfs = [create_tv_media_file(tv=self.tv) for i in range(2)]
+        for mf in self.mfs:
+            (self.path / mf.filename).write_bytes(b"x")
+
+        self.cursor_file = tmp_path / "cursor.json"
+        self.out = StringIO()
+
+    def _call(self, *args):
+        call_command(
+            "reconcilemediapaths",
+            "--cursor-file",
+            str(self.cursor_file),
+            *args,
+            stdout=self.out,
+        )
+        return self.out.getvalue()
+
+    def _files(self):
+        return list(
+            MediaFile.objects.filter(media_path=self.media_path)
+            .order_by("filename")
+            .values_list("filename", "hide")
+        )
+
+    def test_new_file(self):
+        (self.path / "new.mp4").write_bytes(b"xyz")
+
+        output = self._call()
+
+        assert "create: 1 hide: 0 restore: 0 delete: 0" in output
+        mf = MediaFile.objects.get(filename="new.mp4")
+        assert mf.size == 3
+        assert mf.media_path == self.media_path
+        self.tv.refresh_from_db()
+        assert self.tv.episode_count == 3
+        assert not self.cursor_file.exists()
+
+    def test_new_file_scraped(self, mocker):
+        mock_infer_scraper = mocker.patch(
+            "mediaviewer.models.mediafile.MediaFile.infer_scraper", autospec=True
+        )
+        (self.path / "new.mp4").write_bytes(b"xyz")
+
+        self._call()
+
+        assert [
+            call.args[0].filename for call in mock_infer_scraper.call_args_list
+        ] == ["new.mp4"]
+
+    def test_missing_file(self):
+        (self.path / self.mfs[0].filename).unlink()
+
+        self._call()
+
+        assert self._files() == [
+            (self.mfs[0].filename, True),
+            (self.mfs[1].filename, False),
+        ]
+        self.tv.refresh_from_db()
+        assert self.tv.episode_count == 1
+
+        (self.path / self.mfs[0].filename).write_bytes(b"x")
+        output = self._call()
+
+        assert "restore: 1" in output
+        assert self._files() == [
+            (self.mfs[0].filename, False),
+            (self.mfs[1].filename, False),
+        ]
+
+    def test_delete_missing(self):
+        (self.path / self.mfs[0].filename).unlink()
+
+        self._call("--delete-missing")
+
+        assert self._files() == [(self.mfs[1].filename, False)]
+
+    @pytest.mark.parametrize("delete_missing", (True, False))
+    def test_vanished_directory(self, delete_missing):
+        shutil.rmtree(self.path)
+
+        output = self._call(*(["--delete-missing"] if delete_missing else []))
+
+        assert f"missing  {self.media_path._path}" in output
+        assert "hide: 0 restore: 0 delete: 0 missing: 1" in output
+        assert self._files() == [
+            (self.mfs[0].filename, False),
+            (self.mfs[1].filename, False),
+        ]
+        assert MediaPath.objects.get(pk=self.media_path.pk).missing
+
+    def test_dry_run(self):
+        (self.path / "new.mp4").write_bytes(b"x")
+        (self.path / self.mfs[0].filename).unlink()
+
+        output = self._call("--dry-run")
+
+        assert "new.mp4" in output
+        assert "create: 1 hide: 1 restore: 0 delete: 0" in output
+        assert self._files() == [
+            (self.mfs[0].filename, False),
+            (self.mfs[1].filename, False),
+        ]
+        assert MediaPath.objects.get(pk=self.media_path.pk).reconciled_mtime is None
+
+    def test_unchanged_directory(self, django_assert_num_queries):
+        self._call()
+
+        # Both path batches plus the savepoint around the empty update
+        with django_assert_num_queries(4):
+            output = self._call()
+        assert "create: 0 hide: 0 restore: 0 delete: 0" in output
+
+    def test_resume(self, create_tv):
+        other_tv = create_tv()
+        other_path = Path(other_tv.mediapath_set.get()._path)
+        other_path.mkdir(parents=True)
+        (other_path / "other.mp4").write_bytes(b"x")
+        (self.path / "new.mp4").write_bytes(b"x")
+        self.cursor_file.write_text(f'{{"id": {self.media_path.pk}}}')
+
+        self._call("--resume")
+
+        assert not MediaFile.objects.filter(filename="new.mp4").exists()
+        assert MediaFile.objects.filter(filename="other.mp4").exists()
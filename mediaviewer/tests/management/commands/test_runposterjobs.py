@@ -0,0 +1,47 @@
+import pytest
+from django.core.management import call_command
+
+from mediaviewer.models import Poster, PosterJob
+from mediaviewer.models.posterjob import DONE, PENDING
+
+
+@pytest.mark.django_db(transaction=True)
+class TestCommand:
+    @pytest.fixture(autouse=True)
+    def setUp(self, mocker, create_movie):
+        self.command_name = "runposterjobs"
+        self.mock_populate_data = mocker.patch(
+            "mediaviewer.models.poster.Poster.populate_data"
+        )
+        self.mock_sleep = mocker.patch(
+            "mediaviewer.management.commands.runposterjobs.time.sleep"
+        )
+
+        for _ in range(3):
+            PosterJob.objects.enqueue(Poster.objects.from_ref_obj(create_movie()))
+
+    def test_burst(self):
+        call_command(self.command_name, "--burst")
+
+        assert PosterJob.objects.filter(status=DONE).count() == 3
+        assert self.mock_populate_data.call_count == 3
+        assert not self.mock_sleep.called
+
+    def test_limit(self):
+        call_command(self.command_name, "--limit", "2")
+
+        assert PosterJob.objects.filter(status=DONE).count() == 2
+        assert PosterJob.objects.filter(status=PENDING).count() == 1
+
+    def test_waits_for_jobs(self):
+        PosterJob.objects.update(status=DONE)
+        self.mock_sleep.side_effect = [
+            None,
+            KeyboardInterrupt(),
+        ]
+
+        with pytest.raises(KeyboardInterrupt):
+            call_command(self.command_name)
+
+        assert self.mock_sleep.call_count == 2
+        assert not self.mock_populate_data.called
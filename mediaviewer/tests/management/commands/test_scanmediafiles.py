@@ -0,0 +1,119 @@
+import errno
+import os
+import shutil
+from io import StringIO
+from pathlib import Path
+
+import pytest
+from django.core.management import call_command
+
+from mediaviewer.models import MediaFile, MediaPath
+
+
+@pytest.mark.django_db
+class TestCommand:
+    @pytest.fixture(autouse=True)
+    def setUp(self, create_tv, create_tv_media_file):
+        self.tv = create_tv()
+        self.media_path = self.tv.mediapath_set.get()
+        self.path = Path(self.media_path._path)
+        self.path.mkdir(parents=True)
+
+        self.mfs = [create_tv_media_file(tv=self.tv) for i in range(3)]
+        for idx, mf in enumerate(self.mfs):
+            (self.path / mf.filename).write_bytes(b"x" * (idx + 1))
+
+        self.out = StringIO()
+
+    def _call(self, *args):
+        call_command("scanmediafiles", "--workers", "2", *args, stdout=self.out)
+        return self.out.getvalue()
+
+    def _sizes(self):
+        return list(
+            MediaFile.objects.filter(pk__in=[mf.pk for mf in self.mfs])
+            .order_by("pk")
+            .values_list("size", "missing")
+        )
+
+    def test_sizes(self):
+        output = self._call()
+
+        assert self._sizes() == [(1, False), (2, False), (3, False)]
+        mf = MediaFile.objects.get(pk=self.mfs[0].pk)
+        assert mf.mtime.timestamp() == pytest.approx(
+            (self.path / mf.filename).stat().st_mtime
+        )
+        assert "3 files updated" in output
+
+    def test_unchanged_directory(self, django_assert_num_queries):
+        self._call()
+        stat_result = self.path.stat()
+        (self.path / self.mfs[0].filename).write_bytes(b"changed")
+        # Rewriting a file in place leaves the directory mtime alone
+        os.utime(self.path, ns=(stat_result.st_atime_ns, stat_result.st_mtime_ns))
+
+        with django_assert_num_queries(2):
+            self._call()
+        assert self._sizes()[0] == (1, False)
+
+        self._call("--force")
+        assert self._sizes()[0] == (7, False)
+
+    def test_missing_file(self):
+        self._call()
+        (self.path / self.mfs[1].filename).unlink()
+
+        self._call()
+
+        assert self._sizes() == [(1, False), (2, True), (3, False)]
+
+    def test_missing_path(self):
+        shutil.rmtree(self.path)
+
+        output = self._call()
+
+        assert MediaPath.objects.get(pk=self.media_path.pk).missing
+        assert self._sizes() == [(None, True), (None, True), (None, True)]
+        assert "1 missing" in output
+
+    def _fail_for_path(self, func, error):
+        def side_effect(path, *args, **kwargs):
+            if str(path) == str(self.path):
+                raise error
+            return func(path, *args, **kwargs)
+
+        return side_effect
+
+    def test_unreadable_path(self, mocker):
+        self._call()
+        mocker.patch(
+            "mediaviewer.scanner.os.scandir",
+            side_effect=self._fail_for_path(os.scandir, PermissionError()),
+        )
+
+        output = self._call("--force")
+
+        assert not MediaPath.objects.get(pk=self.media_path.pk).missing
+        assert self._sizes() == [(1, False), (2, False), (3, False)]
+        assert "1 unreadable" in output
+
+    def test_stale_handle(self, mocker):
+        mocker.patch(
+            "mediaviewer.scanner.os.stat",
+            side_effect=self._fail_for_path(
+                os.stat, OSError(errno.ESTALE, "Stale file handle")
+            ),
+        )
+
+        output = self._call()
+
+        assert self._sizes() == [(None, False), (None, False), (None, False)]
+        assert "1 unreadable" in output
+
+    def test_skipped_path(self):
+        MediaPath.objects.filter(pk=self.media_path.pk).update(skip=True)
+
+        self._call()
+
+        assert self._sizes() == [(None, False), (None, False), (None, False)]
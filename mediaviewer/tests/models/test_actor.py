@@ -18,3 +18,41 @@ class TestCreate:
         new_actor = Actor.objects.get()
         assert new_actor.name == "Test_Name"
         assert new_actor.order == expected_order
+
+
+@pytest.mark.django_db
+class TestBulkGetOrCreate:
+    @pytest.fixture(autouse=True)
+    def setUp(self):
+        self.existing = Actor.objects.create(name="existing actor", order=1)
+
+    def test_bulk_get_or_create(self, django_assert_num_queries):
+        with django_assert_num_queries(2):
+            actors = Actor.objects.bulk_get_or_create(
+                [
+                    {"name": "new actor (voice)", "order": 2},
+                    {"name": "Existing Actor", "order": 3},
+                    {"name": "new actor", "order": 4},
+                ]
+            )
+
+        assert [actor.name for actor in actors] == [
+            "New Actor",
+            "Existing Actor",
+            "New Actor",
+        ]
+        assert actors[0] is actors[2]
+        assert actors[0].pk is not None
+        assert actors[0].order == 2
+        assert actors[1] == self.existing
+        assert Actor.objects.count() == 2
+
+    def test_all_existing(self, django_assert_num_queries):
+        with django_assert_num_queries(1):
+            actors = Actor.objects.bulk_get_or_create([{"name": "existing actor"}])
+
+        assert actors == [self.existing]
+
+    def test_empty(self, django_assert_num_queries):
+        with django_assert_num_queries(0):
+            assert Actor.objects.bulk_get_or_create([]) == []
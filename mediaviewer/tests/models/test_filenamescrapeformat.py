@@ -1,6 +1,10 @@
 import pytest
 
-from mediaviewer.models.filenamescrapeformat import FilenameScrapeFormat
+from mediaviewer.models.filenamescrapeformat import (
+    FilenameScrapeFormat,
+    ScraperEngine,
+    scraper_engine,
+)
 
 
 @pytest.mark.django_db
@@ -28,6 +32,18 @@ class TestValidForFilename:
 
         assert expected == actual
 
+    def test_queries_independent_of_library_size(
+        self, create_tv, django_assert_num_queries
+    ):
+        for i in range(20):
+            create_tv(name=f"Foo {i}")
+        self.scraper.valid_for_filename("Foo.is.bar.S02E01.mpg")
+
+        with django_assert_num_queries(1):
+            actual = self.scraper.valid_for_filename("Foo.is.bar.S02E01.mpg")
+
+        assert actual == (self.tv, "Foo is bar", "02", "01")
+
     def test_name_not_valid(self):
         test_filename = "Foo.is.not.bar.S02E01.mpg"
 
@@ -51,3 +67,88 @@ class TestValidForFilename:
         actual = self.scraper.valid_for_filename(test_filename)
 
         assert expected == actual
+
+
+@pytest.mark.django_db
+class TestScraperEngine:
+    @pytest.fixture(autouse=True)
+    def setUp(self):
+        self.scraper = FilenameScrapeFormat.new(
+            nameRegex=r"^.*(?=[sS]\d{2})",
+            seasonRegex=r"(?<=[sS])\d{2}",
+            episodeRegex=r"(?<=[eE])\d{2}",
+            subPeriods=True,
+        )
+        self.test_obj = ScraperEngine()
+
+    def test_cached(self, django_assert_num_queries):
+        with django_assert_num_queries(1):
+            self.test_obj.scrapers()
+            compiled = self.test_obj.scrapers()
+
+        assert [x.scraper for x in compiled] == [self.scraper]
+        assert compiled[0].season_regex.pattern == r"(?<=[sS])\d{2}"
+
+    def test_invalidated_on_save(self):
+        scraper_engine.scrapers()
+
+        other = FilenameScrapeFormat.new(nameRegex="", seasonRegex="", episodeRegex="")
+
+        assert [x.scraper for x in scraper_engine.scrapers()] == [self.scraper, other]
+
+        other.delete()
+
+        assert [x.scraper for x in scraper_engine.scrapers()] == [self.scraper]
+
+    def test_invalidated_by_other_process(self, django_assert_num_queries):
+        self.test_obj.scrapers()
+
+        # Stands in for the engine of another process seeing a save
+        ScraperEngine().invalidate()
+
+        with django_assert_num_queries(1):
+            self.test_obj.scrapers()
+            self.test_obj.scrapers()
+
+    def test_expires(self, mocker, settings, django_assert_num_queries):
+        settings.SCRAPER_CACHE_TTL = 10
+        mock_monotonic = mocker.patch(
+            "mediaviewer.models.filenamescrapeformat.time.monotonic"
+        )
+        mock_monotonic.return_value = 100
+        self.test_obj.scrapers()
+
+        mock_monotonic.return_value = 111
+        with django_assert_num_queries(1):
+            self.test_obj.scrapers()
+
+    def test_invalid_regex(self):
+        FilenameScrapeFormat.new(nameRegex="(", seasonRegex="", episodeRegex="")
+
+        assert [x.scraper for x in self.test_obj.scrapers()] == [self.scraper]
+
+    @pytest.mark.parametrize(
+        "filename,expected",
+        (
+            ("Some.Show.S01E02.mkv", ("01", "02")),
+            ("Some.Show.S2E3.mkv", None),
+            ("Some.Show.S02E64.mkv", None),
+            ("Some.Show.mkv", None),
+        ),
+    )
+    def test_episode_for_filename(self, filename, expected):
+        actual = self.test_obj.episode_for_filename(filename)
+
+        if expected is None:
+            assert actual is None
+        else:
+            assert actual == (self.scraper, *expected)
+
+    def test_episode_for_filename_scrapers(self):
+        other = FilenameScrapeFormat.new(
+            nameRegex="", seasonRegex=r"\d{2}(?=x)", episodeRegex=r"(?<=x)\d{2}"
+        )
+
+        assert self.test_obj.episode_for_filename(
+            "Some.Show.03x04.mkv", scrapers=[other]
+        ) == (other, "03", "04")
@@ -1,13 +1,28 @@
 import pytest
+from django.core.management import call_command
 
-from mediaviewer.models import Poster
-from mediaviewer.models.genre import Genre
+from mediaviewer.models import Movie, Poster
+from mediaviewer.models.genre import Genre, GenreRanking
 
 
 @pytest.mark.django_db
 class TestGetGenres:
     @pytest.fixture(autouse=True)
     def setUp(
+        self,
+        create_tv,
+        create_movie,
+        create_tv_media_file,
+        create_movie_media_file,
+        django_capture_on_commit_callbacks,
+    ):
+        self.capture_on_commit = django_capture_on_commit_callbacks
+        with self.capture_on_commit(execute=True):
+            self._create_posters(
+                create_tv, create_movie, create_tv_media_file, create_movie_media_file
+            )
+
+    def _create_posters(
         self, create_tv, create_movie, create_tv_media_file, create_movie_media_file
     ):
         self.action = Genre.objects.create(genre="Action")
@@ -76,3 +91,79 @@ class TestGetGenres:
             ]
             actual = list(Genre.objects.get_tv_genres())
         assert expected == actual
+
+    def test_removed_genre(self):
+        with self.capture_on_commit(execute=True):
+            for poster in Poster.objects.filter(
+                genres=self.action, movie__isnull=False
+            ):
+                poster.genres.remove(self.action)
+
+        assert list(Genre.objects.get_movie_genres(limit=2)) == [
+            self.mystery,
+            self.thriller,
+        ]
+
+    def test_deleted_movie(self):
+        with self.capture_on_commit(execute=True):
+            Movie.objects.filter(_poster__genres=self.mystery).delete()
+
+        assert list(Genre.objects.get_movie_genres()) == [
+            self.action,
+            self.thriller,
+        ]
+
+    def test_no_aggregate(self, django_assert_num_queries):
+        with django_assert_num_queries(1) as context:
+            list(Genre.objects.get_movie_genres())
+
+        assert "COUNT(" not in context.captured_queries[0]["sql"]
+
+    def test_rebuildgenrerankings(self):
+        GenreRanking.objects.all().delete()
+
+        call_command("rebuildgenrerankings")
+
+        assert list(Genre.objects.get_tv_genres(limit=2)) == [
+            self.action,
+            self.comedy,
+        ]
+
+    def test_refresh_upserts(self):
+        ranking = GenreRanking.objects.get(genre=self.action, media_type="movie")
+        GenreRanking.objects.filter(pk=ranking.pk).update(count=0)
+
+        GenreRanking.objects.refresh()
+
+        ranking.refresh_from_db()
+        assert ranking.count == 2
+
+    def test_refresh_genres(self):
+        GenreRanking.objects.update(count=0)
+
+        GenreRanking.objects.refresh([self.action.pk])
+
+        assert dict(
+            GenreRanking.objects.filter(media_type="movie").values_list(
+                "genre", "count"
+            )
+        ) == {
+            self.action.pk: 2,
+            self.drama.pk: 0,
+            self.mystery.pk: 0,
+            self.thriller.pk: 0,
+        }
+
+    def test_refreshed_once_per_commit(self, mocker, create_movie):
+        mock_refresh = mocker.patch.object(GenreRanking.objects, "refresh")
+
+        with self.capture_on_commit(execute=True):
+            poster = Poster.objects.from_ref_obj(
+                create_movie(), genres=[self.comedy, self.history]
+            )
+            poster.genres.clear()
+            poster.genres.add(self.action)
+
+        mock_refresh.assert_called_once_with(
+            {self.comedy.pk, self.history.pk, self.action.pk}
+        )
@@ -1,6 +1,8 @@
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
-from mediaviewer.models import MediaFile, Poster
+from mediaviewer.models import FilenameScrapeFormat, MediaFile, MediaPath, Poster
 
 
 @pytest.mark.django_db
@@ -15,3 +17,115 @@ def test_delete(create_movie_media_file, create_tv_media_file, use_tv):
 
     MediaFile.objects.all().delete()
     assert not MediaFile.objects.filter(pk=mf.id).exists()
+
+
+@pytest.mark.django_db
+class TestInferScraper:
+    @pytest.fixture(autouse=True)
+    def setUp(self, mocker, create_tv, create_tv_media_file):
+        self.mock_populate_data = mocker.patch(
+            "mediaviewer.models.poster.Poster.populate_data"
+        )
+        self.scraper = FilenameScrapeFormat.new(
+            nameRegex=r"^.*(?=[sS]\d{2})",
+            seasonRegex=r"(?<=[sS])\d{2}",
+            episodeRegex=r"(?<=[eE])\d{2}",
+            subPeriods=True,
+        )
+        self.tv = create_tv(name="Some Show")
+        self.mf = create_tv_media_file(tv=self.tv, filename="Some.Show.S01E02.mkv")
+        self.unknown = create_tv_media_file(tv=self.tv, filename="Some.Show.mkv")
+
+    def test_infer_missing_scrapers(self):
+        MediaFile.objects.infer_missing_scrapers()
+
+        self.mf.refresh_from_db()
+        assert self.mf.scraper == self.scraper
+        assert self.mf.season == 1
+        assert self.mf.episode == 2
+        assert self.mf._scraped_season() == "01"
+        assert self.mf._scraped_episode() == "02"
+        self.mock_populate_data.assert_called_once_with()
+
+        self.unknown.refresh_from_db()
+        assert self.unknown.scraper is None
+        assert self.unknown.display_name == "Some Show"
+
+
+@pytest.mark.django_db
+class TestNextAndPrevious:
+    @pytest.fixture(autouse=True)
+    def setUp(self, create_tv, create_tv_media_file):
+        self.tv = create_tv()
+        self.mfs = [
+            create_tv_media_file(tv=self.tv, display_name=display_name)
+            for display_name in ("S01E02", "S01E01", "S01E03", "S01E03")
+        ]
+        self.hidden = create_tv_media_file(tv=self.tv, display_name="S01E025")
+        self.hidden.hide = True
+        self.hidden.save()
+
+        # Episodes of other shows are never neighbours
+        create_tv_media_file(display_name="S01E021")
+
+        self.first, self.second, self.third, self.fourth = (
+            self.mfs[1],
+            self.mfs[0],
+            self.mfs[2],
+            self.mfs[3],
+        )
+
+    def test_next(self):
+        assert self.first.next() == self.second
+        assert self.second.next() == self.third
+        assert self.third.next() == self.fourth
+        assert self.fourth.next() is None
+
+    def test_previous(self):
+        assert self.fourth.previous() == self.third
+        assert self.third.previous() == self.second
+        assert self.second.previous() == self.first
+        assert self.first.previous() is None
+
+    def test_hidden(self):
+        assert self.hidden.next() == self.third
+        assert self.hidden.previous() == self.second
+
+    def test_movie(self, create_movie_media_file):
+        mf = create_movie_media_file()
+
+        assert mf.next() is None
+        assert mf.previous() is None
+
+    def test_single_query(self, django_assert_num_queries):
+        mf = MediaFile.objects.select_related("media_path__tv").get(pk=self.second.pk)
+
+        with django_assert_num_queries(1):
+            assert mf.next() == self.third
+        with django_assert_num_queries(1):
+            assert mf.previous() == self.first
+
+    def test_other_path(self):
+        mp = MediaPath.objects.create(_path="/path/to/season 2", tv=self.tv)
+        other = MediaFile.objects.create(
+            media_path=mp, filename="s01e025.mkv", display_name="S01E025"
+        )
+
+        assert self.second.next() == other
+        assert other.next() == self.third
+        assert self.third.previous() == other
+        assert other.previous() == self.second
+
+    @pytest.mark.parametrize("method", ("next", "previous"))
+    def test_uses_episode_order_index(self, method):
+        with CaptureQueriesContext(connection) as ctx:
+            getattr(self.second, method)()
+
+        with connection.cursor() as cursor:
+            # The tables are far too small for the planner to prefer an index
+            # on its own
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute(f"EXPLAIN {ctx.captured_queries[-1]['sql']}")
+            plan = "\n".join(row[0] for row in cursor.fetchall())
+
+        assert "mediafile_episode_order" in plan
@@ -1,6 +1,14 @@
+from concurrent.futures import Future
+from io import BytesIO, StringIO
+
 import pytest
+from django.core.files.images import ImageFile
+from django.core.management import call_command
+from PIL import Image
 
-from mediaviewer.models import Poster
+from mediaviewer.models import Poster, StoredImage
+from mediaviewer.models.poster import _download_image
+from mediaviewer.storage import get_poster_storage
 
 sample_good_result = {
     "backdrop_path": "/asdfasdf.jpg",
@@ -262,3 +270,416 @@ class TestStoreRated:
 
         self.test_obj._store_rated(self.test_data)
         assert self.test_obj.rated == ""
+
+
+@pytest.mark.django_db
+class TestPopulateData:
+    @pytest.fixture(autouse=True)
+    def setUp(self, mocker, create_movie, create_tv_media_file):
+        self.mock_get_data_from_imdb = mocker.patch(
+            "mediaviewer.models.poster.Poster._get_data_from_imdb"
+        )
+        self.mock_get_data_from_imdb.return_value = dict(sample_good_result)
+
+        self.mock_get_cast_data = mocker.patch(
+            "mediaviewer.models.poster._get_cast_data"
+        )
+        self.mock_get_cast_data.return_value = sample_good_crew
+
+        self.mock_get_extended_info = mocker.patch(
+            "mediaviewer.models.poster._get_extended_info"
+        )
+        self.mock_get_extended_info.return_value = {
+            "vote_average": 7.5,
+            "tagline": "test_tagline",
+        }
+
+        self.mock_getTVDBEpisodeInfo = mocker.patch(
+            "mediaviewer.models.poster.getTVDBEpisodeInfo"
+        )
+        self.mock_getTVDBEpisodeInfo.return_value = {
+            "id": 54321,
+            "name": "Pilot",
+            "overview": "episode description",
+            "air_date": "2016-10-01",
+            "still_path": "/still.jpg",
+        }
+
+        self.mock_download_image = mocker.patch(
+            "mediaviewer.models.poster._download_image"
+        )
+        self.mock_download_image.return_value = ("poster.jpg", None, None)
+
+        self.movie = create_movie()
+        self.tv_mf = create_tv_media_file()
+
+    def test_no_data(self):
+        self.mock_get_data_from_imdb.return_value = None
+        poster = Poster.objects.from_ref_obj(self.movie)
+
+        assert poster.populate_data() is None
+        assert not self.mock_get_cast_data.called
+        assert not self.mock_download_image.called
+
+    def test_movie(self):
+        poster = Poster.objects.from_ref_obj(self.movie)
+
+        poster.populate_data()
+
+        poster.refresh_from_db()
+        assert poster.tmdb == "12345"
+        assert poster.plot == "show description"
+        assert poster.rating == "7.5"
+        assert poster.tagline == "test_tagline"
+        assert poster.display_actors() == "Alex Reporter"
+        assert poster.display_directors() == "Jim Pope"
+        self.mock_get_cast_data.assert_called_once_with(
+            12345, season=None, episode=None, is_movie=True
+        )
+        self.mock_download_image.assert_called_once_with("/zxcvzxcv.jpg")
+        assert not self.mock_getTVDBEpisodeInfo.called
+
+    def test_episode(self):
+        self.tv_mf.season = 1
+        self.tv_mf.episode = 2
+        self.tv_mf.save()
+        poster = Poster.objects.from_ref_obj(self.tv_mf)
+
+        poster.populate_data()
+
+        poster.refresh_from_db()
+        assert poster.tmdb == "54321"
+        assert poster.episodename == "Pilot"
+        assert poster.extendedplot == "episode description"
+        assert poster.release_date.isoformat() == "2016-10-01"
+        self.mock_getTVDBEpisodeInfo.assert_called_once_with(12345, 1, 2)
+        self.mock_download_image.assert_called_once_with("/still.jpg")
+
+    def test_image_stored(self, settings, tmp_path, create_movie):
+        settings.MEDIA_ROOT = tmp_path
+        name = get_poster_storage().save("zxcvzxcv.jpg", TestRenditions._image())
+        self.mock_download_image.return_value = ("zxcvzxcv.jpg", name, '"abc"')
+        poster = Poster.objects.from_ref_obj(self.movie)
+
+        poster.populate_data()
+        poster.save()
+
+        assert poster.image.name == name
+        assert StoredImage.objects.lookup("/zxcvzxcv.jpg").name == name
+        assert StoredImage.objects.get(tmdb_path="/zxcvzxcv.jpg").etag == '"abc"'
+
+        other_poster = Poster.objects.from_ref_obj(create_movie())
+        other_poster.populate_data()
+
+        assert other_poster.image.name == poster.image.name
+        self.mock_download_image.assert_called_once_with("/zxcvzxcv.jpg")
+
+    def test_fetched_before_transaction(self, mocker):
+        store_fetched_data = Poster._store_fetched_data
+
+        def check_done(poster, data, fetched):
+            assert all(
+                future.done()
+                for future in fetched.values()
+                if isinstance(future, Future)
+            )
+            return store_fetched_data(poster, data, fetched)
+
+        mocker.patch.object(
+            Poster, "_store_fetched_data", autospec=True, side_effect=check_done
+        )
+        self.tv_mf.season = 1
+        self.tv_mf.episode = 2
+        self.tv_mf.save()
+        poster = Poster.objects.from_ref_obj(self.tv_mf)
+
+        poster.populate_data()
+
+        assert Poster._store_fetched_data.called
+        self.mock_download_image.assert_called_once_with("/still.jpg")
+
+    def test_stored_image_purged(self, settings, tmp_path):
+        settings.MEDIA_ROOT = tmp_path
+        name = get_poster_storage().save("zxcvzxcv.jpg", TestRenditions._image())
+        self.mock_download_image.return_value = ("zxcvzxcv.jpg", name, None)
+        poster = Poster.objects.from_ref_obj(self.movie)
+
+        poster.populate_data()
+
+        assert not poster.image
+
+    def test_extended_info_failure(self):
+        self.mock_get_extended_info.side_effect = Exception("Timeout")
+        poster = Poster.objects.from_ref_obj(self.movie)
+
+        poster.populate_data()
+
+        poster.refresh_from_db()
+        assert poster.rating == ""
+        assert poster.plot == "show description"
+
+
+@pytest.mark.django_db
+class TestRenditions:
+    @pytest.fixture(autouse=True)
+    def setUp(self, settings, tmp_path, create_movie):
+        settings.MEDIA_ROOT = tmp_path
+        self.tmp_path = tmp_path
+
+        self.poster = Poster.objects.from_ref_obj(create_movie())
+
+    @staticmethod
+    def _image(name="poster.jpg", width=500, height=750):
+        output = BytesIO()
+        Image.new("RGB", (width, height), "red").save(output, format="JPEG")
+        output.seek(0)
+        return ImageFile(output, name=name)
+
+    def test_no_image(self):
+        assert self.poster.renditions == {}
+        assert self.poster.thumbnail_url == ""
+
+    def test_created_on_save(self):
+        self.poster.image = self._image()
+        self.poster.save()
+
+        self.poster.refresh_from_db()
+        assert self.poster.renditions["source"] == self.poster.image.name
+        for size, width in (("thumbnail", 154), ("medium", 342), ("full", 500)):
+            for fmt in ("webp", "jpeg"):
+                with Image.open(
+                    self.tmp_path / self.poster.renditions[size][fmt]
+                ) as image:
+                    assert image.width == width
+        assert self.poster.thumbnail_url.endswith(".webp")
+        assert self.poster.thumbnail_url != self.poster.full_url
+
+    def test_content_addressed(self, create_movie):
+        other_poster = Poster.objects.from_ref_obj(create_movie())
+
+        self.poster.image = self._image()
+        self.poster.save()
+        other_poster.image = self._image()
+        other_poster.save()
+
+        assert self.poster.image.name == other_poster.image.name
+        assert self.poster.medium_url == other_poster.medium_url
+
+    def test_image_removed(self):
+        self.poster.image = self._image()
+        self.poster.save()
+
+        self.poster.image.delete()
+
+        self.poster.refresh_from_db()
+        assert self.poster.renditions == {}
+
+    def test_unreadable_image(self):
+        self.poster.image = ImageFile(BytesIO(b"not an image"), name="poster.jpg")
+        self.poster.save()
+
+        self.poster.refresh_from_db()
+        assert self.poster.renditions == {}
+        assert self.poster.thumbnail_url == self.poster.image.url
+
+    def test_generaterenditions(self):
+        self.poster.image = self._image()
+        self.poster.save()
+        Poster.objects.update(renditions={})
+
+        call_command("generaterenditions", "--workers", "1", stdout=StringIO())
+
+        self.poster.refresh_from_db()
+        assert self.poster.renditions["source"] == self.poster.image.name
+        assert set(self.poster.renditions) == {"source", "thumbnail", "medium", "full"}
+
+
+@pytest.mark.django_db
+class TestFetchImage:
+    @pytest.fixture(autouse=True)
+    def setUp(self, mocker, settings, tmp_path, create_movie):
+        settings.MEDIA_ROOT = tmp_path
+
+        self.mock_download_image = mocker.patch(
+            "mediaviewer.models.poster._download_image"
+        )
+        self.mock_download_image.return_value = ("poster.jpg", None, None)
+
+        self.poster = Poster.objects.from_ref_obj(create_movie())
+
+    def test_not_stored(self):
+        assert self.poster._fetch_image("/poster.jpg").result() == (
+            "poster.jpg",
+            None,
+            None,
+        )
+        self.mock_download_image.assert_called_once_with("/poster.jpg")
+
+    def test_stored(self):
+        self.poster.image.save("poster.jpg", TestRenditions._image())
+        StoredImage.objects.create(
+            tmdb_path="/poster.jpg", name=self.poster.image.name, etag='"abc"'
+        )
+
+        assert self.poster._fetch_image("/poster.jpg").result() == (
+            "poster.jpg",
+            self.poster.image.name,
+            None,
+        )
+        assert not self.mock_download_image.called
+
+    def test_revalidate(self):
+        self.poster.image.save("poster.jpg", TestRenditions._image())
+        StoredImage.objects.create(
+            tmdb_path="/poster.jpg", name=self.poster.image.name, etag='"abc"'
+        )
+
+        self.poster._fetch_image("/poster.jpg", revalidate=True).result()
+
+        self.mock_download_image.assert_called_once_with(
+            "/poster.jpg", etag='"abc"', stored_name=self.poster.image.name
+        )
+
+    def test_revalidate_without_etag(self):
+        self.poster.image.save("poster.jpg", TestRenditions._image())
+        StoredImage.objects.create(tmdb_path="/poster.jpg", name=self.poster.image.name)
+
+        self.poster._fetch_image("/poster.jpg", revalidate=True).result()
+
+        assert not self.mock_download_image.called
+
+    def test_stored_file_missing(self):
+        StoredImage.objects.create(tmdb_path="/poster.jpg", name="images/ab/abc.jpg")
+
+        self.poster._fetch_image("/poster.jpg").result()
+
+        self.mock_download_image.assert_called_once_with("/poster.jpg")
+
+
+class TestDownloadImage:
+    @pytest.fixture(autouse=True)
+    def setUp(self, mocker, settings, tmp_path):
+        settings.MEDIA_ROOT = tmp_path
+        self.tmp_path = tmp_path
+
+        self.image = TestRenditions._image().read()
+        self.response = mocker.MagicMock()
+        self.response.__enter__.return_value = self.response
+        self.response.status_code = 200
+        self.response.headers = {
+            "Content-Length": str(len(self.image)),
+            "ETag": '"abc"',
+        }
+        self.response.iter_content.side_effect = lambda size: (
+            self.image[i : i + size] for i in range(0, len(self.image), size)
+        )
+
+        self.mock_get = mocker.patch(
+            "mediaviewer.models.tvdbconfiguration.tmdb_session.get"
+        )
+        self.mock_get.return_value = self.response
+
+    def _files(self):
+        return [path for path in self.tmp_path.rglob("*") if path.is_file()]
+
+    def test_no_poster_url(self):
+        assert _download_image(None) == (None, None, None)
+        assert not self.mock_get.called
+
+    def test_streamed_to_storage(self):
+        poster_name, name, etag = _download_image("/poster.jpg")
+
+        assert poster_name == "poster.jpg"
+        assert name.startswith("images/")
+        assert etag == '"abc"'
+        assert self._files() == [self.tmp_path / name]
+        assert (self.tmp_path / name).read_bytes() == self.image
+        self.response.iter_content.assert_called_once_with(1024 * 64)
+        assert self.mock_get.call_args.kwargs["headers"] == {}
+        assert self.response.__exit__.called
+
+    def test_not_modified(self):
+        self.response.status_code = 304
+
+        assert _download_image(
+            "/poster.jpg", etag='"abc"', stored_name="images/ab/abc.jpg"
+        ) == ("poster.jpg", "images/ab/abc.jpg", None)
+        assert self.mock_get.call_args.kwargs["headers"] == {"If-None-Match": '"abc"'}
+        assert not self.response.iter_content.called
+        assert self._files() == []
+
+    def test_incomplete(self):
+        self.response.headers["Content-Length"] = str(len(self.image) + 1)
+
+        with pytest.raises(OSError):
+            _download_image("/poster.jpg")
+
+        assert self._files() == []
+
+    def test_compressed(self):
+        self.response.headers["Content-Encoding"] = "gzip"
+        self.response.headers["Content-Length"] = "1"
+
+        poster_name, name, etag = _download_image("/poster.jpg")
+
+        assert (self.tmp_path / name).read_bytes() == self.image
+
+
+@pytest.mark.django_db
+class TestRepopulateImage:
+    @pytest.fixture(autouse=True)
+    def setUp(self, mocker, settings, tmp_path, create_movie):
+        settings.MEDIA_ROOT = tmp_path
+
+        mocker.patch(
+            "mediaviewer.models.poster.Poster._get_data_from_imdb",
+            return_value=dict(sample_good_result),
+        )
+        mocker.patch(
+            "mediaviewer.models.poster._get_cast_data", return_value=sample_good_crew
+        )
+        mocker.patch("mediaviewer.models.poster._get_extended_info", return_value={})
+
+        self.image = TestRenditions._image().read()
+        self.response = mocker.MagicMock()
+        self.response.__enter__.return_value = self.response
+        self.response.status_code = 200
+        self.response.headers = {"ETag": '"abc"'}
+        self.response.iter_content.return_value = [self.image]
+        self.mock_get = mocker.patch(
+            "mediaviewer.models.tvdbconfiguration.tmdb_session.get",
+            return_value=self.response,
+        )
+
+        self.poster = Poster.objects.from_ref_obj(create_movie())
+        self.poster.populate_data()
+        self.name = self.poster.image.name
+        self.mock_get.reset_mock()
+
+    def test_reused(self):
+        self.poster.populate_data()
+
+        assert self.poster.image.name == self.name
+        assert not self.mock_get.called
+
+    def test_clear_not_modified(self):
+        self.response.status_code = 304
+
+        self.poster.populate_data(clear=True)
+
+        self.poster.refresh_from_db()
+        assert self.poster.image.name == self.name
+        assert self.mock_get.call_args.kwargs["headers"] == {"If-None-Match": '"abc"'}
+        assert not self.response.iter_content.called
+
+    def test_clear_changed(self):
+        self.response.headers = {"ETag": '"def"'}
+        self.response.iter_content.return_value = [
+            TestRenditions._image(width=300).read()
+        ]
+
+        self.poster.populate_data(clear=True)
+
+        self.poster.refresh_from_db()
+        assert self.poster.image.name != self.name
+        assert StoredImage.objects.get(tmdb_path="/zxcvzxcv.jpg").etag == '"def"'
@@ -0,0 +1,166 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from mediaviewer.models import TV, Movie, Poster, PosterJob
+from mediaviewer.models.posterjob import DONE, FAILED, PENDING, RUNNING
+
+
+@pytest.mark.django_db
+class TestEnqueue:
+    @pytest.fixture(autouse=True)
+    def setUp(self, create_movie):
+        self.movie = create_movie()
+        self.poster = Poster.objects.from_ref_obj(self.movie)
+
+    def test_new(self):
+        job = PosterJob.objects.enqueue(self.poster)
+
+        assert job == PosterJob.objects.get()
+        assert job.poster == self.poster
+        assert job.status == PENDING
+        assert job.attempts == 0
+
+    def test_dedup(self):
+        job = PosterJob.objects.enqueue(self.poster)
+
+        assert PosterJob.objects.enqueue(self.poster) == job
+        assert PosterJob.objects.count() == 1
+
+    def test_dedup_raises_priority(self):
+        PosterJob.objects.enqueue(self.poster, priority=1)
+        PosterJob.objects.enqueue(self.poster, priority=5)
+        PosterJob.objects.enqueue(self.poster, priority=3)
+
+        assert PosterJob.objects.get().priority == 5
+
+    def test_finished_jobs_do_not_block(self):
+        PosterJob.objects.create(poster=self.poster, status=DONE)
+        PosterJob.objects.create(poster=self.poster, status=FAILED)
+
+        PosterJob.objects.enqueue(self.poster)
+
+        assert PosterJob.objects.filter(status=PENDING).count() == 1
+
+
+@pytest.mark.django_db
+class TestClaim:
+    @pytest.fixture(autouse=True)
+    def setUp(self, create_movie):
+        self.posters = [Poster.objects.from_ref_obj(create_movie()) for _ in range(3)]
+
+    def test_empty(self):
+        assert PosterJob.objects.claim() is None
+
+    def test_priority(self):
+        low = PosterJob.objects.create(poster=self.posters[0], priority=0)
+        high = PosterJob.objects.create(poster=self.posters[1], priority=10)
+
+        assert PosterJob.objects.claim() == high
+        assert PosterJob.objects.claim() == low
+        assert PosterJob.objects.claim() is None
+
+    def test_claimed(self):
+        job = PosterJob.objects.create(poster=self.posters[0])
+
+        PosterJob.objects.claim()
+
+        job.refresh_from_db()
+        assert job.status == RUNNING
+        assert job.attempts == 1
+
+    def test_not_ready(self):
+        PosterJob.objects.create(
+            poster=self.posters[0], run_after=timezone.now() + timedelta(minutes=5)
+        )
+
+        assert PosterJob.objects.claim() is None
+
+    def test_requeue_stale(self, settings):
+        settings.POSTER_JOB_TIMEOUT = 60
+        stale = PosterJob.objects.create(poster=self.posters[0], status=RUNNING)
+        PosterJob.objects.filter(pk=stale.pk).update(
+            date_edited=timezone.now() - timedelta(minutes=5)
+        )
+        fresh = PosterJob.objects.create(poster=self.posters[1], status=RUNNING)
+
+        assert PosterJob.objects.requeue_stale() == 1
+
+        stale.refresh_from_db()
+        fresh.refresh_from_db()
+        assert stale.status == PENDING
+        assert fresh.status == RUNNING
+
+
+@pytest.mark.django_db
+class TestRun:
+    @pytest.fixture(autouse=True)
+    def setUp(self, mocker, settings, create_movie):
+        settings.POSTER_JOB_MAX_ATTEMPTS = 2
+        settings.POSTER_JOB_RETRY_DELAY = 60
+
+        self.mock_populate_data = mocker.patch(
+            "mediaviewer.models.poster.Poster.populate_data"
+        )
+
+        self.poster = Poster.objects.from_ref_obj(create_movie())
+        PosterJob.objects.enqueue(self.poster)
+        self.job = PosterJob.objects.claim()
+
+    def test_success(self):
+        self.job.run()
+
+        self.job.refresh_from_db()
+        assert self.job.status == DONE
+        self.mock_populate_data.assert_called_once_with(clear=False)
+
+    def test_retry(self):
+        self.mock_populate_data.side_effect = Exception("Timeout")
+
+        self.job.run()
+
+        self.job.refresh_from_db()
+        assert self.job.status == PENDING
+        assert self.job.last_error == "Timeout"
+        assert self.job.run_after > timezone.now() + timedelta(seconds=50)
+
+    def test_failed(self):
+        self.mock_populate_data.side_effect = Exception("Timeout")
+        self.job.run()
+        PosterJob.objects.filter(pk=self.job.pk).update(run_after=timezone.now())
+
+        job = PosterJob.objects.claim()
+        job.run()
+
+        job.refresh_from_db()
+        assert job.status == FAILED
+        assert job.attempts == 2
+
+    def test_orphaned(self):
+        orphan_job = PosterJob.objects.create(
+            poster=Poster.objects.create(), status=RUNNING, attempts=2
+        )
+
+        orphan_job.run()
+
+        orphan_job.refresh_from_db()
+        assert orphan_job.status == FAILED
+        assert "orphaned" in orphan_job.last_error
+
+
+@pytest.mark.django_db
+class TestFromPath:
+    @pytest.fixture(autouse=True)
+    def setUp(self, mocker):
+        self.mock_populate_data = mocker.patch(
+            "mediaviewer.models.poster.Poster.populate_data"
+        )
+
+    @pytest.mark.parametrize("media_class", (TV, Movie))
+    def test_enqueues_poster(self, media_class):
+        obj = media_class.objects.from_path("/path/to/Some.Media.2020")
+
+        job = PosterJob.objects.get()
+        assert job.poster == obj._poster
+        assert not self.mock_populate_data.called
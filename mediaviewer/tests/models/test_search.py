@@ -0,0 +1,85 @@
+import pytest
+from django.core.management import call_command
+
+from mediaviewer.models import TV, Actor, Genre, MediaFile, Movie, Poster
+
+
+@pytest.mark.django_db
+class TestSearch:
+    @pytest.fixture(autouse=True)
+    def setUp(self, create_movie):
+        self.create_movie = create_movie
+
+        self.movie = create_movie(name="The Big Lebowski")
+        self.other_movie = create_movie(name="Big Fish")
+
+    def _search(self, search_str, rank=False):
+        return list(Movie.objects.order_by("id").search(search_str, rank=rank))
+
+    def test_no_search(self):
+        assert self._search("") == [self.movie, self.other_movie]
+
+    @pytest.mark.parametrize(
+        "search_str",
+        ("lebowski", "big leb", "LEBOW", "the.big", "'lebowski'"),
+    )
+    def test_matches_word_prefixes(self, search_str):
+        assert self._search(search_str) == [self.movie]
+
+    def test_every_word_must_match(self):
+        assert self._search("big") == [self.movie, self.other_movie]
+        assert self._search("big fish") == [self.other_movie]
+        assert self._search("lebowski fish") == []
+
+    def test_punctuation_in_names(self, create_tv_media_file):
+        mf = create_tv_media_file(display_name="Foo.Bar.S01E02.mkv")
+
+        assert list(MediaFile.objects.search("bar s01e")) == [mf]
+
+    def test_poster_fields(self):
+        poster = Poster.objects.from_ref_obj(self.other_movie)
+        poster.plot = "A story about a dude"
+        poster.save()
+        poster.genres.add(Genre.objects.create(genre="Fantasy"))
+        poster.actors.add(Actor.objects.create(name="Ewan McGregor"))
+        poster.save()
+
+        assert self._search("dude") == [self.other_movie]
+        assert self._search("fantasy") == [self.other_movie]
+        assert self._search("mcgregor") == [self.other_movie]
+
+    def test_ranked(self):
+        poster = Poster.objects.from_ref_obj(self.movie)
+        poster.plot = "Not a fish"
+        poster.save()
+
+        assert self._search("fish") == [self.movie, self.other_movie]
+        assert self._search("fish", rank=True) == [self.other_movie, self.movie]
+
+    def test_updated_on_save(self):
+        self.movie.name = "Fargo"
+        self.movie.save()
+
+        assert self._search("lebowski") == []
+        assert self._search("fargo") == [self.movie]
+
+    def test_tv(self, create_tv):
+        tv = create_tv(name="Twin Peaks")
+        create_tv(name="Fargo")
+
+        assert list(TV.objects.search("peak")) == [tv]
+
+    def test_fallback(self, mocker):
+        mocker.patch("mediaviewer.models.search._is_postgres", return_value=False)
+
+        assert self._search("owsk") == [self.movie]
+
+    def test_rebuildsearchindex(self, create_tv_media_file):
+        mf = create_tv_media_file(display_name="Twin.Peaks.S01E01")
+        Movie.objects.update(search_vector=None)
+        MediaFile.objects.update(search_vector=None)
+
+        call_command("rebuildsearchindex", batch_size=1)
+
+        assert self._search("big") == [self.movie, self.other_movie]
+        assert list(MediaFile.objects.search("peaks")) == [mf]
@@ -3,6 +3,9 @@ from datetime import datetime, timedelta
 import pytest
 from datetime import timezone
 
+from mediaviewer.models.tv import TV, TVNameIndex, tv_name_index
+from mediaviewer.views.ajax import get_tv_show_rows_query
+
 
 @pytest.mark.django_db
 def test_episodes(
@@ -41,11 +44,37 @@ class TestLastCreatedEpisodeAt:
             mf.date_created = dt + timedelta(days=idx)
             mf.save()
 
+        self.tv.refresh_from_db()
+
         expected = "2018-11-03T00:00:00+00:00"
         actual = self.tv.last_created_episode_at().isoformat()
 
         assert expected == actual
 
+    def test_hidden_and_deleted_episodes(self, create_tv, create_tv_media_file):
+        self.tv = create_tv()
+        self.mfs = [create_tv_media_file(tv=self.tv) for i in range(3)]
+
+        self.mfs[2].hide = True
+        self.mfs[2].save()
+        self.tv.refresh_from_db()
+        assert self.tv.latest_episode_at == self.mfs[1].date_created
+
+        self.mfs[1].delete()
+        self.tv.refresh_from_db()
+        assert self.tv.latest_episode_at == self.mfs[0].date_created
+
+        self.mfs[0].delete()
+        self.tv.refresh_from_db()
+        assert self.tv.latest_episode_at is None
+
+    def test_tv_show_rows_query(self, create_tv, create_tv_media_file):
+        tvs = [create_tv() for i in range(3)]
+        for tv in (tvs[1], tvs[0], tvs[2]):
+            create_tv_media_file(tv=tv)
+
+        assert list(get_tv_show_rows_query()) == [tvs[2], tvs[0], tvs[1]]
+
     def test_no_lastCreatedFileDate(self, create_tv):
         self.tv = create_tv()
 
@@ -80,3 +109,85 @@ def test_delete(create_tv, create_tv_media_file):
 
     for obj in (another_tv, another_tv_mp, *another_tvs):
         obj.refresh_from_db()
+
+
+@pytest.mark.django_db
+class TestTVNameIndex:
+    @pytest.fixture(autouse=True)
+    def setUp(self, create_tv):
+        self.create_tv = create_tv
+        self.foo = create_tv(name="Foo Is Bar")
+        self.foo_bar = create_tv(name="Foo Bar")
+        self.baz = create_tv(name="Baz")
+
+    def test_exact_name_wins(self):
+        assert tv_name_index.best_match(["foo", "bar"]) == self.foo_bar.pk
+        assert tv_name_index.best_match(["Foo", "is", "Bar"]) == self.foo.pk
+
+    def test_substring(self):
+        assert tv_name_index.best_match(["az"]) == self.baz.pk
+
+    def test_shared_suffix(self):
+        # "a" starts suffixes of both bar and baz
+        assert tv_name_index.best_match(["a", "z"]) == self.baz.pk
+
+    def test_tie_goes_to_newest(self):
+        assert tv_name_index.best_match(["foo"]) == self.foo_bar.pk
+
+    def test_no_match(self):
+        assert tv_name_index.best_match(["qux"]) is None
+
+    def test_loaded_once(self, django_assert_num_queries):
+        with django_assert_num_queries(1):
+            tv_name_index.best_match(["foo"])
+            tv_name_index.best_match(["bar"])
+
+    def test_expires(self, mocker, settings, django_assert_num_queries):
+        settings.TV_NAME_INDEX_TTL = 10
+        mock_monotonic = mocker.patch(
+            "mediaviewer.models.tv.time.monotonic", return_value=100
+        )
+        tv_name_index.best_match(["foo"])
+
+        mock_monotonic.return_value = 111
+        with django_assert_num_queries(1):
+            tv_name_index.best_match(["foo"])
+
+    def test_updated_on_save(self, django_assert_num_queries):
+        tv_name_index.best_match(["foo"])
+
+        qux = self.create_tv(name="Qux")
+        self.baz.name = "Renamed"
+        self.baz.save()
+
+        with django_assert_num_queries(1):
+            assert tv_name_index.best_match(["qux"]) == qux.pk
+            assert tv_name_index.best_match(["baz"]) is None
+            assert tv_name_index.best_match(["renamed"]) == self.baz.pk
+
+    def test_updated_on_delete(self, django_assert_num_queries):
+        tv_name_index.best_match(["foo"])
+
+        self.foo_bar.delete()
+
+        with django_assert_num_queries(1):
+            assert tv_name_index.best_match(["foo", "bar"]) == self.foo.pk
+
+    def test_unchanged_name_kept(self, django_assert_num_queries):
+        tv_name_index.best_match(["foo"])
+
+        self.baz.finished = True
+        self.baz.save()
+
+        with django_assert_num_queries(0):
+            assert tv_name_index.best_match(["baz"]) == self.baz.pk
+
+    def test_invalidated_by_other_process(self, django_assert_num_queries):
+        tv_name_index.best_match(["foo"])
+        TV.objects.filter(pk=self.baz.pk).update(name="Renamed")
+
+        # Stands in for the index of the process that renamed the show
+        TVNameIndex().invalidate()
+
+        with django_assert_num_queries(1):
+            assert tv_name_index.best_match(["renamed"]) == self.baz.pk
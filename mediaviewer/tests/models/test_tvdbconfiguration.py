@@ -1,18 +1,24 @@
+import mock
 import pytest
 from django.test import override_settings
 
-from mediaviewer.models.tvdbconfiguration import TVDBConfiguration, getJSONData
+from mediaviewer.models.tvdbconfiguration import (
+    TVDBConfiguration,
+    batch_episode_info,
+    getJSONData,
+    getTVDBEpisodeInfo,
+)
 
 
 class TestGetJSONData:
     @pytest.fixture(autouse=True)
     def setUp(self, mocker):
         self.mock_get = mocker.patch(
-            "mediaviewer.models.tvdbconfiguration.requests.get"
+            "mediaviewer.models.tvdbconfiguration.tmdb_session.get"
         )
 
-        self.mock_sleep = mocker.patch(
-            "mediaviewer.models.tvdbconfiguration.time.sleep"
+        self.mock_rate_limiter = mocker.patch(
+            "mediaviewer.models.tvdbconfiguration.rate_limiter"
         )
 
     def test_valid(self):
@@ -20,30 +26,58 @@ class TestGetJSONData:
         actual = getJSONData("test_url")
 
         assert expected == actual
+        self.mock_rate_limiter.acquire.assert_called_once_with()
 
-    def test_not_rate_limited(self):
-        self.mock_get.return_value.headers = {
-            "X-RateLimit-Remaining": "12",
-            "X-RateLimit-Limit": "40",
-        }
+    def test_http_error(self):
+        self.mock_get.return_value.raise_for_status.side_effect = Exception("404")
 
-        expected = self.mock_get.return_value.json.return_value
-        actual = getJSONData("test_url")
+        with pytest.raises(Exception):
+            getJSONData("test_url")
 
-        assert expected == actual
-        assert not self.mock_sleep.called
+        self.mock_get.assert_called_once_with("test_url")
+        assert not self.mock_rate_limiter.block.called
 
-    def test_rate_limited(self):
-        self.mock_get.return_value.headers = {
-            "X-RateLimit-Remaining": "3",
-            "X-RateLimit-Limit": "40",
-        }
+    def test_retry_after(self):
+        limited = mock.MagicMock(status_code=429, headers={"Retry-After": "3"})
+        self.mock_get.side_effect = [limited, self.mock_get.return_value]
 
         expected = self.mock_get.return_value.json.return_value
         actual = getJSONData("test_url")
 
         assert expected == actual
-        self.mock_sleep.assert_called_once_with(1)
+        self.mock_rate_limiter.block.assert_called_once_with(3)
+        assert self.mock_rate_limiter.acquire.call_count == 2
+
+    @override_settings(TMDB_MAX_RETRIES=1)
+    def test_retries_exhausted(self):
+        self.mock_get.return_value.status_code = 429
+        self.mock_get.return_value.headers = {}
+        self.mock_get.return_value.raise_for_status.side_effect = Exception("429")
+
+        with pytest.raises(Exception):
+            getJSONData("test_url")
+
+        assert self.mock_get.call_count == 2
+        self.mock_rate_limiter.block.assert_called_once_with(1)
+
+    def test_cached(self):
+        self.mock_get.return_value.json.return_value = {"id": 1}
+
+        getJSONData("https://api.themoviedb.org/3/tv/1?api_key=asdf")
+        actual = getJSONData("https://api.themoviedb.org/3/tv/1?api_key=asdf")
+
+        assert actual == {"id": 1}
+        self.mock_get.assert_called_once_with(
+            "https://api.themoviedb.org/3/tv/1?api_key=asdf"
+        )
+
+    def test_skip_cache(self):
+        self.mock_get.return_value.json.return_value = {"id": 1}
+
+        getJSONData("https://api.themoviedb.org/3/tv/1?api_key=asdf")
+        getJSONData("https://api.themoviedb.org/3/tv/1?api_key=asdf", use_cache=False)
+
+        assert self.mock_get.call_count == 2
 
 
 class TestTVDBConfigurationInit:
@@ -89,3 +123,67 @@ class TestTVDBConfigurationInit:
 
         with pytest.raises(Exception):
             TVDBConfiguration()
+
+
+class TestGetTVDBEpisodeInfo:
+    @pytest.fixture(autouse=True)
+    def setUp(self, mocker, settings):
+        settings.API_KEY = "asdf"
+        self.mock_tvdbConfig = mocker.patch(
+            "mediaviewer.models.tvdbconfiguration.tvdbConfig"
+        )
+        self.mock_tvdbConfig.connected = True
+
+        self.season_data = {
+            "episodes": [
+                {"id": 11, "episode_number": 1, "name": "Pilot"},
+                {"id": 12, "episode_number": 2, "name": "Second"},
+            ]
+        }
+        self.mock_getJSONData = mocker.patch(
+            "mediaviewer.models.tvdbconfiguration.getJSONData"
+        )
+        self.mock_getJSONData.side_effect = lambda url: (
+            self.season_data if url.endswith("/season/1?api_key=asdf") else {"id": 99}
+        )
+
+    def test_not_connected(self):
+        self.mock_tvdbConfig.connected = False
+
+        assert getTVDBEpisodeInfo(1234, 1, 2) == {}
+        assert not self.mock_getJSONData.called
+
+    def test_unbatched(self):
+        assert getTVDBEpisodeInfo(1234, 1, 2) == {"id": 99}
+        self.mock_getJSONData.assert_called_once_with(
+            "https://api.themoviedb.org/3/tv/1234/season/1/episode/2?api_key=asdf"
+        )
+
+    def test_batched(self):
+        with batch_episode_info():
+            first = getTVDBEpisodeInfo(1234, 1, 1)
+            second = getTVDBEpisodeInfo(1234, 1, 2)
+
+        assert first == {"id": 11, "episode_number": 1, "name": "Pilot"}
+        assert second == {"id": 12, "episode_number": 2, "name": "Second"}
+        self.mock_getJSONData.assert_called_once_with(
+            "https://api.themoviedb.org/3/tv/1234/season/1?api_key=asdf"
+        )
+
+    def test_batched_missing_episode(self):
+        with batch_episode_info():
+            actual = getTVDBEpisodeInfo(1234, 1, 5)
+
+        assert actual == {"id": 99}
+        assert self.mock_getJSONData.call_args_list[-1] == mock.call(
+            "https://api.themoviedb.org/3/tv/1234/season/1/episode/5?api_key=asdf"
+        )
+
+    def test_batch_ends_with_block(self):
+        with batch_episode_info():
+            getTVDBEpisodeInfo(1234, 1, 1)
+
+        with batch_episode_info():
+            getTVDBEpisodeInfo(1234, 1, 1)
+
+        assert self.mock_getJSONData.call_count == 2
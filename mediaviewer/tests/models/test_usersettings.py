@@ -2,7 +2,7 @@ import mock
 import pytest
 from django.db.utils import IntegrityError
 from django.http import HttpRequest
-from django.contrib.auth.models import Group
+from django.contrib.auth.models import Group, User
 
 from mediaviewer.models.usersettings import UserSettings, case_insensitive_authenticate
 from mediaviewer.tests import helpers
@@ -179,3 +179,25 @@ class TestMCPUser:
         )
         assert user.is_staff is False
         assert user.apikey_set.count() == 1
+
+
+@pytest.mark.django_db
+class TestUserSettingsMemoized:
+    @pytest.fixture(autouse=True)
+    def setUp(self, create_user):
+        self.user = create_user()
+
+    def test_memoized(self, django_assert_num_queries):
+        user = User.objects.get(pk=self.user.pk)
+
+        with django_assert_num_queries(1):
+            settings = user.settings()
+            assert user.settings() is settings
+
+    def test_updated_on_save(self):
+        settings = UserSettings.objects.get(user=self.user.pk)
+        settings.binge_mode = not self.user.settings().binge_mode
+        settings.user = self.user
+        settings.save()
+
+        assert self.user.settings().binge_mode == settings.binge_mode
@@ -0,0 +1,125 @@
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+
+from mediaviewer.models import TV, Comment, MediaPath, WatchedCount
+
+
+@pytest.mark.django_db
+class TestWatchedCount:
+    @pytest.fixture(autouse=True)
+    def setUp(self, create_user, create_tv, create_tv_media_file):
+        self.user = create_user()
+        self.other_user = create_user()
+
+        self.tv = create_tv()
+        self.mfs = [create_tv_media_file(tv=self.tv) for i in range(3)]
+
+    def _counts(self):
+        self.tv.refresh_from_db()
+        return (
+            self.tv.episode_count,
+            self.tv.number_of_unwatched_shows(self.user),
+            self.tv.number_of_unwatched_shows(self.other_user),
+        )
+
+    def test_new_episodes(self, create_tv_media_file):
+        assert self._counts() == (3, 3, 3)
+
+        create_tv_media_file(tv=self.tv)
+
+        assert self._counts() == (4, 4, 4)
+
+    def test_mark_viewed(self):
+        self.mfs[0].mark_viewed(self.user, True)
+        self.mfs[1].mark_viewed(self.user, True)
+        self.mfs[1].mark_viewed(self.other_user, True)
+
+        assert self._counts() == (3, 1, 2)
+
+        self.mfs[0].mark_viewed(self.user, False)
+
+        assert self._counts() == (3, 2, 2)
+
+    def test_comment_deleted(self):
+        self.mfs[0].mark_viewed(self.user, True)
+
+        Comment.objects.filter(user=self.user).delete()
+
+        assert self._counts() == (3, 3, 3)
+
+    def test_ajaxviewed(self, client):
+        client.force_login(self.user)
+
+        client.post(
+            reverse("mediaviewer:ajaxviewed"),
+            {"media_files": {self.mfs[0].pk: True, self.mfs[1].pk: True}},
+            content_type="application/json",
+        )
+        assert self._counts() == (3, 1, 3)
+
+        client.post(
+            reverse("mediaviewer:ajaxviewed"),
+            {"media_files": {self.mfs[0].pk: False}},
+            content_type="application/json",
+        )
+        assert self._counts() == (3, 2, 3)
+
+    def test_hide(self):
+        self.mfs[0].mark_viewed(self.user, True)
+        self.mfs[1].mark_viewed(self.user, True)
+
+        self.mfs[0].hide = True
+        self.mfs[0].save()
+
+        assert self._counts() == (2, 1, 2)
+
+        self.mfs[0].hide = False
+        self.mfs[0].save()
+
+        assert self._counts() == (3, 1, 3)
+
+    def test_delete(self):
+        self.mfs[0].mark_viewed(self.user, True)
+        self.mfs[1].mark_viewed(self.user, True)
+
+        self.mfs[0].delete()
+
+        assert self._counts() == (2, 1, 2)
+
+    def test_delete_tv(self):
+        self.mfs[0].mark_viewed(self.user, True)
+
+        self.tv.delete()
+
+        assert not WatchedCount.objects.exists()
+        assert not MediaPath.objects.filter(tv=self.tv.pk).exists()
+
+    def test_rebuildtvstats(self):
+        self.mfs[0].mark_viewed(self.user, True)
+        TV.objects.update(episode_count=0, latest_episode_at=None)
+        WatchedCount.objects.all().delete()
+
+        call_command("rebuildtvstats", batch_size=1)
+
+        assert self._counts() == (3, 2, 3)
+        assert self.tv.latest_episode_at == self.mfs[-1].date_created
+
+    def test_tv_rows(self, client):
+        self.mfs[0].mark_viewed(self.user, True)
+        client.force_login(self.user)
+
+        resp = client.get(
+            reverse("mediaviewer:ajaxtvshowssummary"),
+            {"start": 0, "length": 10, "search[value]": "", "draw": 1},
+        )
+
+        assert 'badge text-bg-primary">2<' in resp.json()["data"][0][0]
+
+    def test_api_tv_list(self, client):
+        self.mfs[0].mark_viewed(self.user, True)
+        client.force_login(self.user)
+
+        resp = client.get(reverse("mediaviewer:api:tv-list"))
+
+        assert resp.json()["results"][0]["number_of_unwatched_shows"] == 2
@@ -0,0 +1,33 @@
+import pytest
+from django.contrib import admin
+
+from mediaviewer.admin import MediaFileAdmin
+from mediaviewer.models import TV, MediaFile
+
+
+@pytest.mark.django_db
+class TestMediaFileAdmin:
+    @pytest.fixture(autouse=True)
+    def setUp(self, create_user, create_tv, create_tv_media_file):
+        self.user = create_user()
+        self.tv = create_tv()
+        self.mfs = [create_tv_media_file(tv=self.tv) for _ in range(3)]
+        self.mfs[0].mark_viewed(self.user, True)
+
+        self.test_obj = MediaFileAdmin(MediaFile, admin.site)
+
+    def test_hide(self):
+        self.test_obj.hide(None, MediaFile.objects.filter(pk=self.mfs[0].pk))
+
+        tv = TV.objects.get(pk=self.tv.pk)
+        assert tv.episode_count == 2
+        assert tv.number_of_unwatched_shows(self.user) == 2
+
+    def test_unhide(self):
+        self.test_obj.hide(None, MediaFile.objects.all())
+        self.test_obj.unhide(None, MediaFile.objects.filter(pk=self.mfs[1].pk))
+
+        tv = TV.objects.get(pk=self.tv.pk)
+        assert tv.episode_count == 1
+        assert tv.latest_episode_at == self.mfs[1].date_created
+        assert tv.number_of_unwatched_shows(self.user) == 1
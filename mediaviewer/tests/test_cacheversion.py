@@ -0,0 +1,43 @@
+from mediaviewer.cacheversion import CacheVersion
+
+
+class TestCacheVersion:
+    def test_first_call(self):
+        assert CacheVersion("test").changed()
+
+    def test_unchanged(self):
+        version = CacheVersion("test")
+        version.changed()
+
+        assert not version.changed()
+
+    def test_bumped_elsewhere(self):
+        version = CacheVersion("test")
+        version.changed()
+
+        CacheVersion("test").bump()
+
+        assert version.changed()
+        assert not version.changed()
+
+    def test_names_are_separate(self):
+        version = CacheVersion("test")
+        version.changed()
+
+        CacheVersion("other").bump()
+
+        assert not version.changed()
+
+    def test_unreadable(self, mocker):
+        version = CacheVersion("test")
+        version.changed()
+        mocker.patch("mediaviewer.cacheversion.cache.get", side_effect=OSError)
+
+        # Nothing is reused while the version cannot be checked
+        assert version.changed()
+        assert version.changed()
+
+    def test_unwritable(self, mocker):
+        mocker.patch("mediaviewer.cacheversion.cache.set", side_effect=OSError)
+
+        CacheVersion("test").bump()
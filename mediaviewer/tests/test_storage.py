@@ -0,0 +1,135 @@
+from io import BytesIO
+
+import pytest
+from django.core.files.images import ImageFile
+from PIL import Image
+
+from mediaviewer.models import Poster, StoredImage
+from mediaviewer.storage import poster_storage, stream_to_temp_file
+
+
+def _image(name="poster.jpg", color="red"):
+    output = BytesIO()
+    Image.new("RGB", (20, 30), color).save(output, format="JPEG")
+    output.seek(0)
+    return ImageFile(output, name=name)
+
+
+@pytest.mark.django_db
+class TestPosterImageStorage:
+    @pytest.fixture(autouse=True)
+    def setUp(self, settings, tmp_path, create_movie):
+        settings.MEDIA_ROOT = tmp_path
+        self.tmp_path = tmp_path
+
+        self.poster = Poster.objects.from_ref_obj(create_movie())
+        self.other_poster = Poster.objects.from_ref_obj(create_movie())
+
+    def _files(self):
+        return sorted(
+            str(path.relative_to(self.tmp_path))
+            for path in (self.tmp_path / "images").rglob("*")
+            if path.is_file()
+        )
+
+    def _chunks(self, image):
+        return iter(lambda: image.read(10), b"")
+
+    def test_named_by_content(self):
+        self.poster.image.save("first.jpg", _image())
+        self.other_poster.image.save("second.JPG", _image())
+
+        assert self.poster.image.name == self.other_poster.image.name
+        assert self.poster.image.name.startswith("images/")
+        assert self.poster.image.name.endswith(".jpg")
+        assert self._files() == [self.poster.image.name]
+
+    def test_different_content(self):
+        self.poster.image.save("poster.jpg", _image(color="red"))
+        self.other_poster.image.save("poster.jpg", _image(color="blue"))
+
+        assert self.poster.image.name != self.other_poster.image.name
+        assert len(self._files()) == 2
+
+    def test_delete_keeps_file(self):
+        self.poster.image.save("poster.jpg", _image())
+        name = self.poster.image.name
+        StoredImage.objects.create(tmdb_path="/poster.jpg", name=name)
+
+        self.poster.clear()
+        self.poster.save()
+
+        assert self._files() == [name]
+        assert StoredImage.objects.lookup("/poster.jpg").name == name
+
+    def test_purge_referenced(self):
+        self.poster.image.save("poster.jpg", _image())
+        self.other_poster.image.save("poster.jpg", _image())
+        name = self.poster.image.name
+        StoredImage.objects.create(tmdb_path="/poster.jpg", name=name)
+        self.poster.clear()
+        self.poster.save()
+
+        assert not poster_storage.purge(name)
+
+        assert self._files() == [name]
+        assert StoredImage.objects.lookup("/poster.jpg").name == name
+
+    def test_purge_unreferenced(self):
+        self.poster.image.save("poster.jpg", _image())
+        name = self.poster.image.name
+        StoredImage.objects.create(tmdb_path="/poster.jpg", name=name)
+        self.poster.clear()
+        self.poster.save()
+
+        assert poster_storage.purge(name)
+
+        assert self._files() == []
+        assert StoredImage.objects.lookup("/poster.jpg") is None
+
+    def test_save_stream(self):
+        self.poster.image.save("poster.jpg", _image())
+
+        name = poster_storage.save_stream(self._chunks(_image()), ".JPG")
+
+        assert name == self.poster.image.name
+        assert self._files() == [name]
+
+    def test_save_stream_new_content(self):
+        image = _image()
+        size = image.size
+
+        name = poster_storage.save_stream(self._chunks(image), ".jpg", size)
+
+        assert self._files() == [name]
+        with poster_storage.open(name) as f:
+            assert f.read() == _image().read()
+
+    def test_save_stream_incomplete(self):
+        image = _image()
+
+        with pytest.raises(OSError):
+            poster_storage.save_stream(self._chunks(image), ".jpg", image.size + 1)
+
+        assert self._files() == []
+
+
+class TestStreamToTempFile:
+    def test_written(self, tmp_path):
+        path, digest = stream_to_temp_file([b"abc", b"def"], tmp_path / "images")
+
+        with open(path, "rb") as f:
+            assert f.read() == b"abcdef"
+        assert digest == (
+            "bef57ec7f53a6d40beb640a780a639c83bc29ac8a9816f1fc6c5c6dcd93c4721"
+        )
+
+    def test_generator_failure(self, tmp_path):
+        def chunks():
+            yield b"abc"
+            raise OSError("Connection reset")
+
+        with pytest.raises(OSError):
+            stream_to_temp_file(chunks(), tmp_path)
+
+        assert list(tmp_path.iterdir()) == []
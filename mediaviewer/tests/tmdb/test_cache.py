@@ -0,0 +1,135 @@
+import json
+
+import pytest
+from django.test import override_settings
+
+from mediaviewer.tmdb.cache import ResponseCache, normalize_url, ttl_for_url
+
+
+class TestNormalizeUrl:
+    def test_removes_api_key(self):
+        assert (
+            normalize_url("https://api.themoviedb.org/3/tv/1?api_key=secret")
+            == "https://api.themoviedb.org/3/tv/1"
+        )
+
+    def test_sorts_query(self):
+        assert normalize_url(
+            "https://api.themoviedb.org/3/search/tv?query=abc&api_key=secret&language=en-US"
+        ) == normalize_url(
+            "https://API.themoviedb.org/3/search/tv?language=en-US&query=abc&api_key=other"
+        )
+
+
+class TestTTLForUrl:
+    @override_settings(
+        TMDB_CACHE_TTLS={r"^/3/tv/\d+/season/": 10, r"^/3/tv/": 20},
+        TMDB_CACHE_DEFAULT_TTL=30,
+    )
+    @pytest.mark.parametrize(
+        "url,expected",
+        (
+            ("https://api.themoviedb.org/3/tv/1/season/2", 10),
+            ("https://api.themoviedb.org/3/tv/1", 20),
+            ("https://api.themoviedb.org/3/movie/1", 30),
+        ),
+    )
+    def test_ttl(self, url, expected):
+        assert ttl_for_url(url) == expected
+
+
+class TestResponseCache:
+    @pytest.fixture(autouse=True)
+    def setUp(self, mocker, tmdb_cache_dir):
+        self.mock_time = mocker.patch("mediaviewer.tmdb.cache.time.time")
+        self.mock_time.return_value = 1000
+
+        self.cache_dir = tmdb_cache_dir
+        self.url = "https://api.themoviedb.org/3/tv/1?api_key=secret"
+        self.test_obj = ResponseCache()
+
+    def test_miss(self):
+        assert self.test_obj.get(self.url) is None
+        assert self.test_obj.stats()["misses"] == 1
+
+    def test_hit(self):
+        self.test_obj.set(self.url, {"id": 1})
+
+        assert self.test_obj.get(self.url) == {"id": 1}
+        assert self.test_obj.stats()["hits"] == 1
+
+    def test_values_are_copies(self):
+        self.test_obj.set(self.url, {"id": 1})
+
+        self.test_obj.get(self.url)["url"] = "changed"
+
+        assert self.test_obj.get(self.url) == {"id": 1}
+
+    def test_api_key_ignored(self):
+        self.test_obj.set(self.url, {"id": 1})
+
+        assert self.test_obj.get(
+            "https://api.themoviedb.org/3/tv/1?api_key=another"
+        ) == {"id": 1}
+
+    def test_expired(self, settings):
+        settings.TMDB_CACHE_DEFAULT_TTL = 10
+        settings.TMDB_CACHE_TTLS = {}
+        self.test_obj.set(self.url, {"id": 1})
+
+        self.mock_time.return_value = 1011
+
+        assert self.test_obj.get(self.url) is None
+        assert not list(self.cache_dir.glob("*.json"))
+
+    def test_survives_restart(self):
+        self.test_obj.set(self.url, {"id": 1})
+
+        assert ResponseCache().get(self.url) == {"id": 1}
+
+    def test_lru_eviction(self, settings):
+        settings.TMDB_CACHE_MAX_ENTRIES = 2
+        for idx in range(3):
+            self.test_obj.set(f"https://api.themoviedb.org/3/tv/{idx}", {"id": idx})
+
+        assert self.test_obj.stats()["memory_entries"] == 2
+        # Evicted from memory but still available from disk
+        assert self.test_obj.get("https://api.themoviedb.org/3/tv/0") == {"id": 0}
+
+    def test_failed_write_cleaned_up(self, mocker):
+        mocker.patch("mediaviewer.tmdb.cache.os.replace", side_effect=OSError)
+
+        self.test_obj.set(self.url, {"id": 1})
+
+        assert not list(self.cache_dir.iterdir())
+        assert self.test_obj.get(self.url) == {"id": 1}
+
+    def test_bypass(self):
+        self.test_obj.set(self.url, {"id": 1})
+
+        with self.test_obj.bypass():
+            assert self.test_obj.get(self.url) is None
+            self.test_obj.set(self.url, {"id": 2})
+
+        assert self.test_obj.get(self.url) == {"id": 2}
+
+    def test_disabled(self, settings):
+        settings.TMDB_CACHE_ENABLED = False
+        self.test_obj.set(self.url, {"id": 1})
+
+        assert self.test_obj.get(self.url) is None
+        assert not self.cache_dir.exists()
+
+    def test_prune(self, settings):
+        settings.TMDB_CACHE_TTLS = {r"^/3/tv/1$": 10}
+        settings.TMDB_CACHE_DEFAULT_TTL = 100
+        self.test_obj.set(self.url, {"id": 1})
+        self.test_obj.set("https://api.themoviedb.org/3/tv/2", {"id": 2})
+
+        self.mock_time.return_value = 1050
+
+        assert self.test_obj.prune() == 1
+        remaining = [json.loads(path.read_text()) for path in self.cache_dir.iterdir()]
+        assert [entry["key"] for entry in remaining] == [
+            "https://api.themoviedb.org/3/tv/2"
+        ]
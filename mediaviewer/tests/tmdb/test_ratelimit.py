@@ -0,0 +1,102 @@
+import pytest
+
+from mediaviewer.tmdb.ratelimit import RateLimiter, parse_retry_after
+
+
+class TestParseRetryAfter:
+    @pytest.fixture(autouse=True)
+    def setUp(self, mocker, settings):
+        settings.TMDB_RETRY_AFTER_DEFAULT = 5
+        mocker.patch("mediaviewer.tmdb.ratelimit.time.time", return_value=1000)
+
+    @pytest.mark.parametrize(
+        "value,expected",
+        (
+            ("3", 3),
+            ("0.5", 0.5),
+            ("-1", 0),
+            (None, 5),
+            ("", 5),
+            ("garbage", 5),
+            # 1000 seconds past the epoch plus 10
+            ("Thu, 01 Jan 1970 00:16:50 GMT", 10),
+        ),
+    )
+    def test_parse(self, value, expected):
+        assert parse_retry_after(value) == expected
+
+
+class TestRateLimiter:
+    @pytest.fixture(autouse=True)
+    def setUp(self, mocker, settings, tmdb_rate_limit_file):
+        settings.TMDB_RATE_LIMIT = 2
+        settings.TMDB_RATE_LIMIT_BURST = 3
+
+        self.now = 1000
+        mocker.patch(
+            "mediaviewer.tmdb.ratelimit.time.time", side_effect=lambda: self.now
+        )
+        self.mock_sleep = mocker.patch(
+            "mediaviewer.tmdb.ratelimit.time.sleep", side_effect=self._advance
+        )
+
+        self.path = tmdb_rate_limit_file
+        self.test_obj = RateLimiter()
+
+    def _advance(self, seconds):
+        self.now += seconds
+
+    def test_burst(self):
+        for _ in range(3):
+            assert self.test_obj.acquire() == 0
+
+        assert not self.mock_sleep.called
+        assert self.path.exists()
+
+    def test_waits_for_refill(self):
+        for _ in range(3):
+            self.test_obj.acquire()
+
+        assert self.test_obj.acquire() == 0.5
+        self.mock_sleep.assert_called_once_with(0.5)
+
+    def test_refills_over_time(self):
+        for _ in range(3):
+            self.test_obj.acquire()
+
+        self.now += 10
+
+        for _ in range(3):
+            assert self.test_obj.acquire() == 0
+
+    def test_shared_between_instances(self):
+        other = RateLimiter()
+        for _ in range(3):
+            other.acquire()
+
+        assert self.test_obj.acquire() == 0.5
+
+    def test_block(self):
+        self.test_obj.block(4)
+
+        assert self.test_obj.acquire() == 4.5
+        assert self.mock_sleep.call_args_list[0][0] == (4,)
+
+    def test_block_keeps_longest(self):
+        self.test_obj.block(4)
+        self.test_obj.block(1)
+
+        assert self.test_obj.acquire() == 4.5
+
+    def test_disabled(self, settings):
+        settings.TMDB_RATE_LIMIT_ENABLED = False
+
+        for _ in range(10):
+            assert self.test_obj.acquire() == 0
+
+        assert not self.path.exists()
+
+    def test_corrupt_state(self):
+        self.path.write_text("not json")
+
+        assert self.test_obj.acquire() == 0
@@ -0,0 +1,66 @@
+import mock
+import pytest
+from django.test import override_settings
+
+from mediaviewer.tmdb.session import TMDBSession
+
+
+class TestSession:
+    @pytest.fixture(autouse=True)
+    def setUp(self, mocker):
+        self.mock_getpid = mocker.patch("mediaviewer.tmdb.session.os.getpid")
+        self.mock_getpid.return_value = 123
+
+        self.test_obj = TMDBSession()
+
+    def test_session_reused(self):
+        assert self.test_obj.session is self.test_obj.session
+
+    def test_session_rebuilt_after_fork(self):
+        session = self.test_obj.session
+
+        self.mock_getpid.return_value = 456
+
+        assert self.test_obj.session is not session
+
+    @override_settings(
+        TMDB_POOL_MAXSIZE=12,
+        TMDB_MAX_RETRIES=5,
+        TMDB_RETRY_BACKOFF=2,
+    )
+    def test_adapter_settings(self):
+        adapter = self.test_obj.session.get_adapter("https://api.themoviedb.org/3/")
+
+        assert adapter._pool_maxsize == 12
+        assert adapter.max_retries.total == 5
+        assert adapter.max_retries.backoff_factor == 2
+
+    @override_settings(REQUEST_TIMEOUT=7)
+    def test_get_default_timeout(self, mocker):
+        mock_get = mocker.patch.object(self.test_obj.session, "get")
+
+        self.test_obj.get("test_url", stream=True)
+
+        mock_get.assert_called_once_with("test_url", stream=True, timeout=7)
+
+    def test_stats(self, mocker):
+        first_pool = mock.MagicMock(num_requests=10, num_connections=2)
+        second_pool = mock.MagicMock(num_requests=3, num_connections=1)
+        mocker.patch.object(
+            self.test_obj,
+            "_connection_pools",
+            return_value=[first_pool, second_pool],
+        )
+
+        assert self.test_obj.stats() == {
+            "requests": 13,
+            "new_connections": 3,
+            "reused_connections": 10,
+        }
+
+    def test_no_stats_before_first_request(self):
+        assert self.test_obj.stats() == {
+            "requests": 0,
+            "new_connections": 0,
+            "reused_connections": 0,
+        }
@@ -9,6 +9,7 @@ from django.urls import reverse
 
 from mediaviewer.models.downloadtoken import DownloadToken
 from mediaviewer.models.genre import Genre
+from mediaviewer.models.poster import Poster
 from mediaviewer.models.videoprogress import VideoProgress
 from mediaviewer.tests.helpers import create_user
 from mediaviewer.views.ajax import ajaxgenres, ajaxreport, ajaxvideoprogress
@@ -407,3 +408,143 @@ class TestAjaxCollections:
         json_data = resp.json()
 
         assert expected == json_data["collections"]
+
+
+@pytest.mark.django_db
+class TestAjaxTVShows:
+    @pytest.fixture(autouse=True)
+    def setUp(
+        self,
+        client,
+        create_user,
+        create_tv,
+        create_tv_media_file,
+    ):
+        self.client = client
+        self.user = create_user()
+        self.client.force_login(self.user)
+        self.user.settings()
+
+        self.tv = create_tv()
+        self.mfs = [create_tv_media_file(tv=self.tv) for i in range(10)]
+
+        Poster.objects.from_ref_obj(self.mfs[0])
+        self.mfs[1].comments.create(user=self.user, viewed=True)
+
+        self.url = reverse("mediaviewer:ajaxtvshows", kwargs={"tv_id": self.tv.pk})
+        self.params = {
+            "start": 0,
+            "search[value]": "",
+            "draw": 1,
+            "order[0][column]": 3,
+            "order[0][dir]": "asc",
+        }
+
+    @pytest.mark.parametrize("length", (1, 10))
+    def test_num_queries(self, length, django_assert_num_queries):
+        with django_assert_num_queries(10):
+            resp = self.client.get(self.url, data={**self.params, "length": length})
+
+        assert resp.status_code == 200
+        assert len(resp.json()["data"]) == length
+        assert not Poster.objects.filter(media_file__in=self.mfs[1:]).exists()
+
+    def test_counts_reused(self, django_assert_num_queries):
+        params = {**self.params, "length": 10, "search[value]": "foo"}
+        self.client.get(self.url, data=params)
+
+        # Only the page itself is queried on the next draw
+        with django_assert_num_queries(9):
+            resp = self.client.get(self.url, data={**params, "draw": 2})
+
+        assert resp.json()["recordsTotal"] == 10
+        assert resp.json()["recordsFiltered"] == 10
+
+    def test_viewed(self):
+        resp = self.client.get(self.url, data={**self.params, "length": 10})
+
+        viewed = [" checked " in row[0] for row in resp.json()["data"]]
+        assert viewed == [False, True] + [False] * 8
+
+    def test_cannot_download(self):
+        settings = self.user.settings()
+        settings.can_download = False
+        settings.save()
+
+        resp = self.client.get(self.url, data={**self.params, "length": 10})
+
+        assert all(row[2] == "" for row in resp.json()["data"])
+
+
+@pytest.mark.django_db
+class TestAjaxMovieRows:
+    @pytest.fixture(autouse=True)
+    def setUp(self, mocker, client, create_user, create_movie):
+        self.mock_populate_data = mocker.patch(
+            "mediaviewer.models.poster.Poster.populate_data"
+        )
+
+        self.client = client
+        self.user = create_user()
+        self.client.force_login(self.user)
+        self.user.settings()
+
+        self.genre = Genre.objects.create(genre="Action")
+        self.movies = [create_movie() for i in range(10)]
+
+        for movie in self.movies:
+            Poster.objects.from_ref_obj(movie, genres=[self.genre])
+        self.movies[1].comments.create(user=self.user, viewed=True)
+
+        self.params = {
+            "start": 0,
+            "search[value]": "",
+            "draw": 1,
+            "order[0][column]": 3,
+            "order[0][dir]": "asc",
+        }
+
+    @pytest.mark.parametrize("length", (1, 10))
+    @pytest.mark.parametrize(
+        "by_genre,expected_queries",
+        (
+            (False, 9),
+            # Includes looking up the genre
+            (True, 10),
+        ),
+    )
+    def test_num_queries(
+        self, length, by_genre, expected_queries, django_assert_num_queries
+    ):
+        if by_genre:
+            url = reverse(
+                "mediaviewer:ajaxmoviesbygenrerows", kwargs={"genre_id": self.genre.pk}
+            )
+        else:
+            url = reverse("mediaviewer:ajaxmovierows")
+
+        with django_assert_num_queries(expected_queries):
+            resp = self.client.get(url, data={**self.params, "length": length})
+
+        assert resp.status_code == 200
+        assert len(resp.json()["data"]) == length
+        self.mock_populate_data.assert_not_called()
+
+    def test_missing_poster_not_populated(self):
+        self.movies[0]._poster.delete()
+
+        resp = self.client.get(
+            reverse("mediaviewer:ajaxmovierows"), data={**self.params, "length": 10}
+        )
+
+        assert resp.status_code == 200
+        assert not Poster.objects.filter(movie=self.movies[0]).exists()
+        self.mock_populate_data.assert_not_called()
+
+    def test_viewed(self):
+        resp = self.client.get(
+            reverse("mediaviewer:ajaxmovierows"), data={**self.params, "length": 10}
+        )
+
+        viewed = [" checked " in row[0] for row in resp.json()["data"]]
+        assert viewed == [False, True] + [False] * 8
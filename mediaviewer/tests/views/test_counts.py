@@ -0,0 +1,64 @@
+import pytest
+
+from mediaviewer.models import TV, MediaFile
+from mediaviewer.views.counts import RowCountCache, row_counts
+
+
+@pytest.mark.django_db
+class TestRowCountCache:
+    @pytest.fixture(autouse=True)
+    def setUp(self, create_tv, create_tv_media_file):
+        self.create_tv = create_tv
+        self.tv = create_tv()
+        self.mfs = [create_tv_media_file(tv=self.tv) for i in range(3)]
+
+    def test_cached(self, django_assert_num_queries):
+        qs = MediaFile.objects.filter(media_path__tv=self.tv)
+
+        with django_assert_num_queries(1):
+            assert row_counts.count(qs) == 3
+            assert row_counts.count(qs.order_by("-display_name")) == 3
+
+    def test_separate_querysets(self, django_assert_num_queries):
+        with django_assert_num_queries(2):
+            assert row_counts.count(MediaFile.objects.all()) == 3
+            assert row_counts.count(MediaFile.objects.filter(pk=self.mfs[0].pk)) == 1
+
+    def test_invalidated_on_write(self):
+        assert row_counts.count(TV.objects.all()) == 1
+
+        self.create_tv()
+        assert row_counts.count(TV.objects.all()) == 2
+
+        self.tv.delete()
+        assert row_counts.count(TV.objects.all()) == 1
+
+    def test_invalidated_by_other_process(self):
+        assert row_counts.count(TV.objects.all()) == 1
+        # Skips the signals of this process
+        TV.objects.bulk_create([TV(name="Written elsewhere")])
+
+        # Stands in for the cache of the process that wrote the show
+        RowCountCache().invalidate()
+
+        assert row_counts.count(TV.objects.all()) == 2
+
+    def test_expires(self, mocker, settings, django_assert_num_queries):
+        settings.DATATABLES_COUNT_CACHE_TTL = 10
+        mock_monotonic = mocker.patch(
+            "mediaviewer.views.counts.time.monotonic", return_value=100
+        )
+        row_counts.count(MediaFile.objects.all())
+
+        mock_monotonic.return_value = 111
+        with django_assert_num_queries(1):
+            row_counts.count(MediaFile.objects.all())
+
+    def test_bounded(self, mocker):
+        mocker.patch("mediaviewer.views.counts.MAX_CACHED_COUNTS", 2)
+        counts = RowCountCache()
+
+        for mf in self.mfs:
+            counts.count(MediaFile.objects.filter(pk=mf.pk))
+
+        assert len(counts._counts) == 2
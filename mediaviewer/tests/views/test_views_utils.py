@@ -3,9 +3,10 @@ import pytest
 from django.contrib.auth.models import User
 from mock import call
 
-from mediaviewer.models import Collection
+from mediaviewer.models import Collection, DonationSite, Genre, WaiterStatus
 from mediaviewer.models.message import Message
 from mediaviewer.models.usersettings import FILENAME_SORT
+from mediaviewer.views.sitecontext import SiteContextCache
 from mediaviewer.views.views_utils import getLastWaiterStatus, setSiteWideContext
 
 
@@ -35,6 +36,9 @@ class TestSetSiteWideContext:
             "mediaviewer.views.views_utils.Genre.objects.get_tv_genres"
         )
 
+        self.mock_get_movie_genres.return_value = [mock.MagicMock(Genre)]
+        self.mock_get_tv_genres.return_value = [mock.MagicMock(Genre)]
+
         self.first_message = mock.MagicMock(Message)
         self.second_message = mock.MagicMock(Message)
 
@@ -164,3 +168,49 @@ class TestGetLastWaiterStatus:
 
         assert context["waiterstatus"]
         assert "test" == context["waiterfailurereason"]
+
+
+@pytest.mark.django_db
+class TestSiteContextCache:
+    @pytest.fixture(autouse=True)
+    def setUp(self, create_user, create_collection):
+        self.collection = create_collection(name="First")
+
+        self.request = mock.MagicMock()
+        self.request.user = create_user()
+
+    def test_cached(self, django_assert_num_queries):
+        setSiteWideContext({}, self.request)
+
+        # Only the user's settings are looked up once they are memoized
+        self.request.user = User.objects.get(pk=self.request.user.pk)
+        with django_assert_num_queries(1):
+            setSiteWideContext({}, self.request)
+
+    def test_invalidated(self, create_collection):
+        context = {}
+        setSiteWideContext(context, self.request)
+        assert context["collections"] == [self.collection]
+
+        new_collection = create_collection(name="Second")
+        DonationSite.objects.create(site_name="Donate", url="https://example.com")
+        WaiterStatus.new(False, "Down")
+
+        context = {}
+        setSiteWideContext(context, self.request)
+        assert context["collections"] == [self.collection, new_collection]
+        assert context["donation_site_name"] == "Donate"
+        assert context["waiterfailurereason"] == "Down"
+
+    def test_invalidated_by_other_process(self):
+        context = {}
+        setSiteWideContext(context, self.request)
+        # Skips the signals of this process
+        new_collection = Collection.objects.bulk_create([Collection(name="Second")])[0]
+
+        # Stands in for the cache of the process that wrote the collection
+        SiteContextCache().invalidate()
+
+        context = {}
+        setSiteWideContext(context, self.request)
+        assert context["collections"] == [self.collection, new_collection]
@@ -0,0 +1,218 @@
+import contextvars
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from django.conf import settings
+
+from mediaviewer.log import log
+
+_bypass = contextvars.ContextVar("tmdb_cache_bypass", default=False)
+
+
+def normalize_url(url):
+    """
+    Build the cache key for a TMDB url.
+
+    The api_key is dropped and the query string sorted so equivalent
+    requests share an entry.
+    """
+    parts = urlsplit(url)
+    query = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key != "api_key"
+    )
+    return urlunsplit(
+        (
+            parts.scheme.lower(),
+            parts.netloc.lower(),
+            parts.path,
+            urlencode(query),
+            "",
+        )
+    )
+
+
+def ttl_for_url(url):
+    path = urlsplit(url).path
+    for pattern, ttl in settings.TMDB_CACHE_TTLS.items():
+        if re.search(pattern, path):
+            return ttl
+    return settings.TMDB_CACHE_DEFAULT_TTL
+
+
+class ResponseCache:
+    """
+    Two tier cache for TMDB JSON responses.
+
+    The first tier is a size bounded LRU held in memory. The second tier is a
+    directory of json files so entries survive restarts and are shared by
+    every process on the host. Values are kept serialized so callers are
+    free to mutate whatever they get back.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def directory(self):
+        return Path(settings.TMDB_CACHE_DIR)
+
+    def _path_for_key(self, key):
+        return self.directory / f"{hashlib.sha256(key.encode()).hexdigest()}.json"
+
+    @staticmethod
+    @contextmanager
+    def bypass():
+        """Skip cached values, still storing whatever gets fetched."""
+        token = _bypass.set(True)
+        try:
+            yield
+        finally:
+            _bypass.reset(token)
+
+    def is_bypassed(self):
+        return _bypass.get()
+
+    def get(self, url):
+        if not settings.TMDB_CACHE_ENABLED or self.is_bypassed():
+            return None
+
+        key = normalize_url(url)
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires, payload = entry
+                if expires > now:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return json.loads(payload)
+                del self._memory[key]
+
+        entry = self._read_file(key, now)
+        if entry is None:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        expires, payload = entry
+        with self._lock:
+            self.hits += 1
+            self._remember(key, expires, payload)
+        return json.loads(payload)
+
+    def set(self, url, data):
+        if not settings.TMDB_CACHE_ENABLED:
+            return
+
+        key = normalize_url(url)
+        expires = time.time() + ttl_for_url(key)
+        try:
+            payload = json.dumps(data)
+        except (TypeError, ValueError) as e:
+            log.warning(f"Not caching response for {key}: {e}")
+            return
+
+        with self._lock:
+            self._remember(key, expires, payload)
+        self._write_file(key, expires, payload)
+
+    def _remember(self, key, expires, payload):
+        self._memory[key] = (expires, payload)
+        self._memory.move_to_end(key)
+        while len(self._memory) > settings.TMDB_CACHE_MAX_ENTRIES:
+            self._memory.popitem(last=False)
+
+    def _read_file(self, key, now):
+        path = self._path_for_key(key)
+        try:
+            with open(path, "r") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            log.warning(f"Ignoring unreadable cache entry {path}: {e}")
+            return None
+
+        if entry["key"] != key:
+            return None
+
+        if entry["expires"] <= now:
+            path.unlink(missing_ok=True)
+            return None
+        return entry["expires"], entry["payload"]
+
+    def _write_file(self, key, expires, payload):
+        path = self._path_for_key(key)
+        tmp_name = None
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump({"key": key, "expires": expires, "payload": payload}, f)
+            os.replace(tmp_name, path)
+        except Exception as e:
+            log.warning(f"Failed to write cache entry {path}: {e}")
+            if tmp_name is not None:
+                try:
+                    os.unlink(tmp_name)
+                except FileNotFoundError:
+                    pass
+
+    def prune(self, everything=False):
+        """Remove expired entries from both tiers. Returns the number of files removed."""
+        now = time.time()
+        with self._lock:
+            for key in [
+                key
+                for key, (expires, _) in self._memory.items()
+                if everything or expires <= now
+            ]:
+                del self._memory[key]
+
+        if not self.directory.exists():
+            return 0
+
+        removed = 0
+        for path in self.directory.glob("*.json"):
+            try:
+                if not everything:
+                    with open(path, "r") as f:
+                        if json.load(f)["expires"] > now:
+                            continue
+                path.unlink(missing_ok=True)
+                removed += 1
+            except Exception as e:
+                log.warning(f"Failed to prune cache entry {path}: {e}")
+        return removed
+
+    def clear(self):
+        self.prune(everything=True)
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "memory_entries": len(self._memory),
+            }
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,130 @@
+import fcntl
+import json
+import os
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+
+from django.conf import settings
+
+from mediaviewer.log import log
+
+
+def parse_retry_after(value, default=None):
+    """
+    Convert a Retry-After header into a number of seconds.
+
+    Both the delay-seconds and HTTP-date forms are accepted.
+    """
+    if default is None:
+        default = settings.TMDB_RETRY_AFTER_DEFAULT
+
+    if not value:
+        return default
+
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0)
+    except (TypeError, ValueError):
+        return default
+
+
+class RateLimiter:
+    """
+    Token bucket for TMDB requests shared by every process on the host.
+
+    The bucket state lives in a small json file guarded by an exclusive
+    flock, so gunicorn workers and cron jobs draw from the same budget.
+    The lock is only held while the state is read and updated; waiting
+    for tokens to refill happens outside of it.
+    """
+
+    @property
+    def path(self):
+        return Path(settings.TMDB_RATE_LIMIT_FILE)
+
+    @contextmanager
+    def _locked_state(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        with os.fdopen(fd, "r+") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                try:
+                    state = json.loads(f.read() or "{}")
+                except ValueError:
+                    log.warning(f"Resetting unreadable rate limit state {self.path}")
+                    state = {}
+
+                yield state
+
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps(state))
+                f.flush()
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _reserve(self):
+        """
+        Take a token if one is available.
+
+        Returns the number of seconds to wait before trying again, or 0 once a
+        token has been taken.
+        """
+        rate = settings.TMDB_RATE_LIMIT
+        burst = settings.TMDB_RATE_LIMIT_BURST
+
+        with self._locked_state() as state:
+            now = time.time()
+
+            blocked_until = state.get("blocked_until", 0)
+            if blocked_until > now:
+                return blocked_until - now
+
+            tokens = state.get("tokens", burst)
+            updated = state.get("updated", now)
+            tokens = min(burst, tokens + max(now - updated, 0) * rate)
+
+            state["updated"] = now
+            if tokens >= 1:
+                state["tokens"] = tokens - 1
+                return 0
+
+            state["tokens"] = tokens
+            return (1 - tokens) / rate
+
+    def acquire(self):
+        """Block until a request may be made. Returns the total time waited."""
+        if not settings.TMDB_RATE_LIMIT_ENABLED:
+            return 0
+
+        waited = 0
+        while wait := self._reserve():
+            time.sleep(wait)
+            waited += wait
+
+        if waited:
+            log.debug(f"Waited {waited:.2f}s for the TMDB rate limit")
+        return waited
+
+    def block(self, seconds):
+        """Hold back every process for the given number of seconds."""
+        if not settings.TMDB_RATE_LIMIT_ENABLED:
+            return
+
+        with self._locked_state() as state:
+            blocked_until = max(state.get("blocked_until", 0), time.time() + seconds)
+            # Start refilling from empty once the block lifts so the
+            # processes that were waiting do not all burst at once.
+            state["blocked_until"] = blocked_until
+            state["tokens"] = 0
+            state["updated"] = blocked_until
+
+
+rate_limiter = RateLimiter()
@@ -0,0 +1,89 @@
+import os
+import threading
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class TMDBSession:
+    """
+    Process-wide pooled HTTP session for TMDB and poster image requests.
+
+    Connections are kept alive and shared between threads so repeated calls
+    to the same host skip the TCP and TLS handshakes. The underlying session
+    is rebuilt after a fork so child processes never share sockets with
+    their parent.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = None
+        self._session = None
+
+    @property
+    def session(self):
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._session = self._build_session()
+                    self._pid = os.getpid()
+        return self._session
+
+    def _build_session(self):
+        retry = Retry(
+            total=settings.TMDB_MAX_RETRIES,
+            backoff_factor=settings.TMDB_RETRY_BACKOFF,
+            status_forcelist=(500, 502, 503, 504),
+            allowed_methods=("GET", "HEAD"),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=settings.TMDB_POOL_CONNECTIONS,
+            pool_maxsize=settings.TMDB_POOL_MAXSIZE,
+            max_retries=retry,
+        )
+
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def get(self, url, **kwargs):
+        kwargs.setdefault("timeout", settings.REQUEST_TIMEOUT)
+        return self.session.get(url, **kwargs)
+
+    def _connection_pools(self):
+        if self._session is None:
+            return []
+
+        pools = []
+        for adapter in set(self._session.adapters.values()):
+            pool_manager = adapter.poolmanager
+            for key in pool_manager.pools.keys():
+                pool = pool_manager.pools.get(key)
+                if pool is not None:
+                    pools.append(pool)
+        return pools
+
+    def stats(self):
+        """
+        Return request and connection counters for the current process.
+
+        Every request that did not need a new connection reused a pooled one.
+        """
+        num_requests = 0
+        num_connections = 0
+        for pool in self._connection_pools():
+            num_requests += pool.num_requests
+            num_connections += pool.num_connections
+
+        return {
+            "requests": num_requests,
+            "new_connections": num_connections,
+            "reused_connections": max(num_requests - num_connections, 0),
+        }
+
+
+tmdb_session = TMDBSession()
@@ -6,8 +6,7 @@ import pytz
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.models import User
-from django.db.models import OuterRef, Subquery, Count, F, Value
-from django.db.models.functions import Coalesce
+from django.db.models import Exists, OuterRef
 from django.http import Http404, HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404
 from django.views.decorators.csrf import csrf_exempt
@@ -19,6 +18,7 @@ from mediaviewer.models.message import Message
 from mediaviewer.models.videoprogress import VideoProgress
 from mediaviewer.models.waiterstatus import WaiterStatus
 from mediaviewer.utils import logAccessInfo
+from mediaviewer.views.counts import row_counts
 
 REWIND_THRESHOLD = 10  # in minutes
 ID_REGEX = re.compile(r"\d+")
@@ -148,7 +148,11 @@ def _ajax_movie_rows(request, qs):
 
     initial_qs = qs
     qs = initial_qs.order_by(sort_expr).search(search_str)
-    files = qs[offset : offset + length]
+    files = qs.select_related("_poster").annotate(
+        _viewed=Exists(
+            Comment.objects.filter(movie=OuterRef("pk"), user=user, viewed=True)
+        )
+    )[offset : offset + length]
 
     file_data = []
     for file in files:
@@ -160,10 +164,11 @@ def _ajax_movie_rows(request, qs):
             )
         )
 
+    records_total = row_counts.count(initial_qs)
     payload = {
         "draw": draw,
-        "recordsTotal": initial_qs.count(),
-        "recordsFiltered": qs.count(),
+        "recordsTotal": records_total,
+        "recordsFiltered": row_counts.count(qs) if search_str else records_total,
         "data": file_data,
     }
 
@@ -202,16 +207,21 @@ def _ajax_media_file_rows(request, qs):
     initial_qs = qs
     qs = initial_qs.order_by(sort_expr).search(search_str)
 
-    mfs = qs[offset : offset + length]
+    mfs = qs.select_related("_poster").annotate(
+        _viewed=Exists(
+            Comment.objects.filter(media_file=OuterRef("pk"), user=user, viewed=True)
+        )
+    )[offset : offset + length]
 
     mf_data = []
     for mf in mfs:
         mf_data.append(mf.ajax_row_payload(can_download, waiterstatus, user))
 
+    records_total = row_counts.count(initial_qs)
     payload = {
         "draw": draw,
-        "recordsTotal": initial_qs.count(),
-        "recordsFiltered": qs.count(),
+        "recordsTotal": records_total,
+        "recordsFiltered": row_counts.count(qs) if search_str else records_total,
         "data": mf_data,
     }
 
@@ -229,7 +239,7 @@ def _ajax_tv_rows(request, qs):
 
     sort_columns_map = {
         0: "name",
-        1: "max_date_created",
+        1: "latest_episode_at",
     }
     sort_column = int(request_params.get("order[0][column]", [1])[0])
     sort_dir = request_params.get("order[0][dir]", ["desc"])[0]
@@ -239,50 +249,26 @@ def _ajax_tv_rows(request, qs):
         else f"{sort_columns_map[sort_column]}"
     )
 
-    episodes_qs = (
-        MediaFile.objects.filter(media_path__tv=OuterRef("pk"))
-        .filter(hide=False)
-        .order_by("-date_created")
-        .values("date_created")[:1]
-    )
-    episodes_watched_qs = (
-        Comment.objects.filter(user=request.user, viewed=True, media_file__hide=False)
-        .values("media_file__media_path__tv")
-        .annotate(count=Count("pk"))
-        .values("media_file__media_path__tv", "count")
-        .filter(media_file__media_path__tv=OuterRef("pk"))
-        .values("count")[:1]
-    )
-
-    total_qs = (
-        TV.objects.filter(mediapath__mediafile__hide=False)
-        .values("pk")
-        .annotate(count=Count("mediapath__mediafile"))
-        .values("count")
-        .filter(pk=OuterRef("pk"))[:1]
-    )
-
     initial_qs = qs
+    filtered_qs = initial_qs.search(search_str)
     qs = (
-        initial_qs.order_by(sort_expr)
-        .search(search_str)
+        filtered_qs.order_by(sort_expr)
         .select_related("_poster")
-        .annotate(
-            _last_created_episode_at=Subquery(episodes_qs),
-            number_watched=Coalesce(Subquery(episodes_watched_qs), Value(0)),
-            total=Subquery(total_qs),
-        )
-        .annotate(_number_unwatched=F("total") - F("number_watched"))
+        .with_unwatched(request.user)
     )
 
     tvs = qs[offset : offset + length]
 
     tv_data = [tv.ajax_row_payload(request.user) for tv in tvs]
 
+    # Count without the per row annotations
+    records_total = row_counts.count(initial_qs)
     payload = {
         "draw": draw,
-        "recordsTotal": initial_qs.count(),
-        "recordsFiltered": qs.count(),
+        "recordsTotal": records_total,
+        "recordsFiltered": (
+            row_counts.count(filtered_qs) if search_str else records_total
+        ),
         "data": tv_data,
     }
 
@@ -305,18 +291,7 @@ def ajaxmoviesbygenrerows(request, genre_id):
 
 
 def get_tv_show_rows_query(genre_id=None):
-    tv_qs = (
-        TV.objects.filter(hide=False)
-        .annotate(
-            max_date_created=Subquery(
-                MediaFile.objects.filter(hide=False)
-                .filter(media_path__tv=OuterRef("pk"))
-                .order_by("-date_created")
-                .values("date_created")[:1]
-            )
-        )
-        .order_by("-max_date_created")
-    )
+    tv_qs = TV.objects.filter(hide=False).order_by("-latest_episode_at")
 
     if genre_id:
         genre = get_object_or_404(Genre, pk=genre_id)
@@ -0,0 +1,65 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from mediaviewer.cacheversion import CacheVersion
+
+MAX_CACHED_COUNTS = 256
+
+
+class RowCountCache:
+    """
+    Process wide cache of DataTables row counts.
+
+    Counts are keyed by the SQL of the counted queryset so the total for a
+    listing is shared by every draw and a filtered count is reused for as
+    long as the search string stays the same. Writing a TV, Movie or
+    MediaFile bumps a version shared with every other process and each of
+    them drops its counts once it sees the change. Entries also expire after
+    DATATABLES_COUNT_CACHE_TTL seconds to catch writes that skip the signals.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = CacheVersion("row_counts")
+        self._counts = OrderedDict()
+
+    @staticmethod
+    def _key(qs):
+        sql, params = qs.query.sql_with_params()
+        return qs.db, sql, tuple(params)
+
+    def count(self, qs):
+        # Ordering has no effect on a count and only makes it slower
+        qs = qs.order_by()
+        key = self._key(qs)
+
+        with self._lock:
+            if self._version.changed():
+                self._counts.clear()
+            cached = self._counts.get(key)
+            if cached is not None and time.monotonic() < cached[1]:
+                self._counts.move_to_end(key)
+                return cached[0]
+
+        count = qs.count()
+
+        with self._lock:
+            self._counts[key] = (
+                count,
+                time.monotonic() + settings.DATATABLES_COUNT_CACHE_TTL,
+            )
+            self._counts.move_to_end(key)
+            while len(self._counts) > MAX_CACHED_COUNTS:
+                self._counts.popitem(last=False)
+        return count
+
+    def invalidate(self):
+        with self._lock:
+            self._counts.clear()
+            self._version.bump()
+
+
+row_counts = RowCountCache()
@@ -7,7 +7,7 @@ from django.http import HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404, redirect
 from django.views.decorators.csrf import csrf_exempt
 
-from mediaviewer.models import Comment, MediaFile, Movie
+from mediaviewer.models import Comment, MediaFile, Movie, WatchedCount
 from mediaviewer.models.downloadtoken import DownloadToken
 from mediaviewer.models.message import Message
 from mediaviewer.utils import logAccessInfo
@@ -68,6 +68,12 @@ def ajaxviewed(request):
     if created_comments or updated_comments:
         Message.clearLastWatchedMessage(user)
 
+    if media_files:
+        # Bulk writes skip the signals that normally keep these up to date
+        WatchedCount.objects.refresh(
+            mf_qs.values_list("media_path__tv", flat=True), user_ids=[user.pk]
+        )
+
     response["data"] = data
 
     return JsonResponse(response)
@@ -0,0 +1,48 @@
+import threading
+import time
+
+from django.conf import settings
+
+from mediaviewer.cacheversion import CacheVersion
+
+
+class SiteContextCache:
+    """
+    Process wide cache of the blocks every page renders.
+
+    Genres, collections, donation sites and the waiter status are the same
+    for every user so they are loaded at most once per SITE_CONTEXT_CACHE_TTL
+    seconds. Writes to any of them bump a version shared with every other
+    process, which then drop their copy early.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = CacheVersion("site_context")
+        self._values = {}
+
+    def get(self, name, load):
+        """Return the cached value for name, calling load() if it is stale."""
+        with self._lock:
+            if self._version.changed():
+                self._values.clear()
+            cached = self._values.get(name)
+            if cached is not None and time.monotonic() < cached[1]:
+                return cached[0]
+
+        value = load()
+
+        with self._lock:
+            self._values[name] = (
+                value,
+                time.monotonic() + settings.SITE_CONTEXT_CACHE_TTL,
+            )
+        return value
+
+    def invalidate(self):
+        with self._lock:
+            self._values.clear()
+            self._version.bump()
+
+
+site_context = SiteContextCache()
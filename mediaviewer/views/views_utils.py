@@ -1,8 +1,9 @@
 from mediaviewer.models import Collection, Genre
-from mediaviewer.models.donation_site import DonationSite
+from mediaviewer.models.donation_site import DonationSite, sys_random
 from mediaviewer.models.message import LAST_WATCHED, REGULAR, Message
 from mediaviewer.models.usersettings import FILENAME_SORT, UserSettings
 from mediaviewer.models.waiterstatus import WaiterStatus
+from mediaviewer.views.sitecontext import site_context
 
 
 def setSiteWideContext(context, request, includeMessages=False):
@@ -32,18 +33,27 @@ def setSiteWideContext(context, request, includeMessages=False):
                     extra_tags=str(message.id) + " last_watched",
                 )
 
-        context["movie_genres"] = Genre.objects.get_movie_genres()
-        context["tv_genres"] = Genre.objects.get_tv_genres()
+        context["movie_genres"] = site_context.get(
+            "movie_genres", lambda: list(Genre.objects.get_movie_genres())
+        )
+        context["tv_genres"] = site_context.get(
+            "tv_genres", lambda: list(Genre.objects.get_tv_genres())
+        )
 
         context["theme"] = settings.theme if settings else UserSettings.DARK
-        context["collections"] = list(Collection.objects.order_by("name"))
+        context["collections"] = site_context.get(
+            "collections", lambda: list(Collection.objects.order_by("name"))
+        )
     else:
         context["loggedin"] = False
 
     context["is_staff"] = user.is_staff and "true" or "false"
 
-    donation_site = DonationSite.objects.random()
-    if donation_site:
+    donation_sites = site_context.get(
+        "donation_sites", lambda: list(DonationSite.objects.all())
+    )
+    if donation_sites:
+        donation_site = sys_random.choice(donation_sites)
         context["donation_site_name"] = donation_site.site_name
         context["donation_site_url"] = donation_site.url
     else:
@@ -54,6 +64,6 @@ def setSiteWideContext(context, request, includeMessages=False):
 
 
 def getLastWaiterStatus(context):
-    lastStatus = WaiterStatus.getLastStatus()
+    lastStatus = site_context.get("waiterstatus", WaiterStatus.getLastStatus)
     context["waiterstatus"] = lastStatus and lastStatus.status or False
     context["waiterfailurereason"] = lastStatus and lastStatus.failureReason or ""
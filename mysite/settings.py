@@ -285,6 +285,82 @@ API_KEY = os.environ.get("TVDB_API_KEY", "keykeykey")
 IMAGE_PATH = "mediaviewer/static/media/"
 
 REQUEST_TIMEOUT = 20
+# Poster images are streamed to disk this many bytes at a time
+IMAGE_DOWNLOAD_CHUNK_SIZE = 1024 * 64
+
+# Maximum number of concurrent TMDB requests made while populating posters
+TMDB_FETCH_WORKERS = 8
+
+# Pooled keep-alive session shared by all TMDB and image requests
+TMDB_POOL_CONNECTIONS = 4
+TMDB_POOL_MAXSIZE = 16
+TMDB_MAX_RETRIES = 3
+TMDB_RETRY_BACKOFF = 0.5
+
+CACHE_DIR = (
+    Path(os.getenv("MV_CACHE_DIR"))
+    if os.getenv("MV_CACHE_DIR")
+    else SYSTEM_BASE_PATH / "cache"
+)
+
+# Kept on disk so every process on the host shares it. Used for the versions
+# that invalidate the process wide caches below across processes.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": CACHE_DIR / "django",
+    }
+}
+
+# TMDB responses are cached in memory and on disk, keyed by url without the api_key
+TMDB_CACHE_ENABLED = True
+TMDB_CACHE_DIR = CACHE_DIR / "tmdb"
+TMDB_CACHE_MAX_ENTRIES = 2048
+TMDB_CACHE_DEFAULT_TTL = 60 * 60 * 24  # In seconds
+# Checked in order against the request path. The first match wins.
+TMDB_CACHE_TTLS = {
+    r"^/3/configuration": 60 * 60 * 24,
+    r"^/3/genre/": 60 * 60 * 24 * 7,
+    r"^/3/search/": 60 * 60,
+    r"^/3/find/": 60 * 60 * 24 * 7,
+    r"/(credits|external_ids)$": 60 * 60 * 24 * 7,
+    r"^/3/tv/\d+/season/": 60 * 60 * 24,
+    r"^/3/tv/": 60 * 60 * 24,
+    r"^/3/movie/": 60 * 60 * 24 * 7,
+}
+
+# Token bucket shared by every process on the host through a locked state file
+TMDB_RATE_LIMIT_ENABLED = True
+TMDB_RATE_LIMIT = 20  # Requests per second
+TMDB_RATE_LIMIT_BURST = 20
+TMDB_RATE_LIMIT_FILE = CACHE_DIR / "tmdb_ratelimit.json"
+# Used when a 429 response does not include a usable Retry-After header
+TMDB_RETRY_AFTER_DEFAULT = 1  # In seconds
+
+# Compiled FilenameScrapeFormats are reloaded at least this often
+SCRAPER_CACHE_TTL = 60 * 5  # In seconds
+# The in memory TV name index is fully rebuilt at least this often
+TV_NAME_INDEX_TTL = 60 * 15  # In seconds
+# Cached DataTables row counts are recomputed at least this often
+DATATABLES_COUNT_CACHE_TTL = 60  # In seconds
+# Serialized DownloadTokens are rebuilt at least this often
+DOWNLOAD_TOKEN_CACHE_TTL = 60  # In seconds
+# Genres, collections, donation sites and waiter status shown on every page
+SITE_CONTEXT_CACHE_TTL = 60  # In seconds
+
+# Background poster population. See the runposterjobs management command
+POSTER_JOB_MAX_ATTEMPTS = 5
+POSTER_JOB_RETRY_DELAY = 60  # In seconds, doubled after every failed attempt
+POSTER_JOB_TIMEOUT = 60 * 10  # Running jobs older than this are requeued
+POSTER_JOB_POLL_INTERVAL = 5  # In seconds
+
+# Widths of the downsized copies stored for every poster image
+POSTER_RENDITIONS = {
+    "thumbnail": 154,
+    "medium": 342,
+    "full": 500,
+}
+POSTER_RENDITION_QUALITY = 80
 
 # Run the python debugging smtp server with the following
 # python -m smtpd -n -c DebuggingServer localhost:1025